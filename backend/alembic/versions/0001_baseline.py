@@ -0,0 +1,90 @@
+"""Baseline schema
+
+Creates every table the app had before migrations. Databases that were set up
+by the old create_all() on startup already have some or all of them, so each
+table is only created when missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing(table: str) -> bool:
+    if op.get_context().as_sql:
+        # Offline (--sql) mode can't inspect; emit the full schema
+        return True
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade() -> None:
+    if _missing("posts"):
+        op.create_table(
+            "posts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("image_url", sa.String(500), nullable=True),
+            sa.Column("hashtag", sa.String(50), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("user_token", sa.String(36), nullable=False),
+            sa.Column("fictional_name", sa.String(50), nullable=True),
+            sa.Column("reactions", sa.JSON(), nullable=True),
+        )
+        op.create_index("ix_posts_id", "posts", ["id"])
+
+    if _missing("scan_tracker"):
+        op.create_table(
+            "scan_tracker",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("ip_address", sa.String(45), nullable=True),
+            sa.Column("user_agent", sa.String(255), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_scan_tracker_id", "scan_tracker", ["id"])
+
+    if _missing("wild_thoughts"):
+        op.create_table(
+            "wild_thoughts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("ip_address", sa.String(45), nullable=True),
+        )
+        op.create_index("ix_wild_thoughts_id", "wild_thoughts", ["id"])
+
+    if _missing("post_counts"):
+        op.create_table(
+            "post_counts",
+            sa.Column("key", sa.String(100), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False),
+        )
+
+    if _missing("counters"):
+        op.create_table(
+            "counters",
+            sa.Column("name", sa.String(50), primary_key=True),
+            sa.Column("value", sa.Integer(), nullable=False),
+        )
+
+    if _missing("image_assets"):
+        op.create_table(
+            "image_assets",
+            sa.Column("source_url", sa.String(500), primary_key=True),
+            sa.Column("digest", sa.String(64), nullable=False),
+            sa.Column("variants", sa.JSON(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_image_assets_digest", "image_assets", ["digest"])
+
+
+def downgrade() -> None:
+    for table in ("image_assets", "counters", "post_counts", "wild_thoughts", "scan_tracker", "posts"):
+        op.drop_table(table)
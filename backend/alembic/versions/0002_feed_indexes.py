@@ -0,0 +1,48 @@
+"""Composite indexes for the feed access paths
+
+- hashtag = ? ORDER BY created_at DESC, id DESC  (hashtag feed + cursor seek)
+- user_token = ? ORDER BY created_at DESC, id DESC  (My Dumps)
+- ORDER BY created_at DESC, id DESC / created_at > ?  (global feed, /posts/new)
+- wild_thoughts ORDER BY created_at DESC
+
+The leading hashtag / user_token columns also make these covering for the
+count(*) fallbacks and the GROUP BY in rebuild_post_counts.py (index-only scans).
+On Postgres they are built CONCURRENTLY so a live posts table isn't locked.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_posts_hashtag_created_id", "posts", ["hashtag", sa.text("created_at DESC"), sa.text("id DESC")]),
+    ("ix_posts_user_token_created_id", "posts", ["user_token", sa.text("created_at DESC"), sa.text("id DESC")]),
+    ("ix_posts_created_id", "posts", [sa.text("created_at DESC"), sa.text("id DESC")]),
+    ("ix_wild_thoughts_created_id", "wild_thoughts", [sa.text("created_at DESC"), sa.text("id DESC")]),
+]
+
+
+def upgrade() -> None:
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=concurrently)
+    if concurrently:
+        op.execute("ANALYZE posts")
+        op.execute("ANALYZE wild_thoughts")
+
+
+def downgrade() -> None:
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=concurrently)
@@ -0,0 +1,42 @@
+"""GIN full-text indexes for /api/posts/search (Postgres only)
+
+Expression indexes on to_tsvector('english', content), so Postgres keeps them
+current on every insert/update/delete with no extra column or trigger. The
+search query must use the identical expression (app/core/search.py ts_vector).
+SQLite/dev falls back to the in-process inverted index and skips this.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_posts_content_fts", "posts"),
+    ("ix_wild_thoughts_content_fts", "wild_thoughts"),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {table} USING gin (to_tsvector('english', content))"
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
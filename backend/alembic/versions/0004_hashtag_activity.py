@@ -0,0 +1,29 @@
+"""Per-minute hashtag activity for trending hashtags
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "hashtag_activity",
+        sa.Column("hashtag", sa.String(50), primary_key=True),
+        sa.Column("minute", sa.Integer(), primary_key=True),
+        sa.Column("posts", sa.Integer(), nullable=False),
+        sa.Column("reactions", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_hashtag_activity_minute", "hashtag_activity", ["minute"])
+
+
+def downgrade() -> None:
+    op.drop_table("hashtag_activity")
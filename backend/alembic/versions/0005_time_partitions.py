@@ -0,0 +1,123 @@
+"""Monthly partitions for posts and scan_tracker; daily scan aggregates
+
+On Postgres, posts and scan_tracker become tables range-partitioned by month
+on created_at, so feed queries (newest first, created_at > since) only touch
+the recent partitions, and the retention job (retention.py) can drop a whole
+old month instead of deleting its rows. Each table is rebuilt: the old heap is
+renamed, a partitioned table with the same columns takes its name, one
+partition per month from the oldest row to PARTITION_MONTHS_AHEAD months out
+(plus a DEFAULT partition) is created, the rows are copied across and the
+indexes from 0001-0003 are recreated on the parent. The primary key becomes
+(id, created_at), as Postgres requires the partition key in it; ids keep
+coming from the same sequence. The copy holds an exclusive lock on each table
+for its duration, so run this in a maintenance window on a big database.
+
+scan_daily (all backends) holds per-day scan counts for rows the retention
+job compacted out of scan_tracker.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.partitions import default_partition, ensure_partitions
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# Indexes each table gets back on its parent (they cascade to every partition)
+INDEXES = {
+    "posts": [
+        "CREATE INDEX ix_posts_hashtag_created_id ON posts (hashtag, created_at DESC, id DESC)",
+        "CREATE INDEX ix_posts_user_token_created_id ON posts (user_token, created_at DESC, id DESC)",
+        "CREATE INDEX ix_posts_created_id ON posts (created_at DESC, id DESC)",
+        "CREATE INDEX ix_posts_content_fts ON posts USING gin (to_tsvector('english', content))",
+    ],
+    "scan_tracker": [
+        "CREATE INDEX ix_scan_tracker_created_at ON scan_tracker (created_at)",
+    ],
+}
+# Indexes the unpartitioned tables had (0001-0003)
+PLAIN_INDEXES = {
+    "posts": [
+        "CREATE INDEX ix_posts_id ON posts (id)",
+    ] + INDEXES["posts"],
+    "scan_tracker": [
+        "CREATE INDEX ix_scan_tracker_id ON scan_tracker (id)",
+    ],
+}
+
+
+def _columns(table: str):
+    return [column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)]
+
+
+def _sequence(table: str) -> str:
+    return op.get_bind().scalar(sa.text(f"SELECT pg_get_serial_sequence('{table}', 'id')"))
+
+
+def _partition(table: str):
+    bind = op.get_bind()
+    legacy = f"{table}_unpartitioned"
+    op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    op.execute(f"ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey")
+    op.execute(f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)")
+    op.execute(f"CREATE TABLE {default_partition(table)} PARTITION OF {table} DEFAULT")
+    ensure_partitions(bind, table, first=bind.scalar(sa.text(f"SELECT min(created_at) FROM {legacy}")))
+
+    columns = _columns(legacy)
+    # The partition key can't be NULL; such rows (if any) get the migration time
+    select_list = ", ".join("COALESCE(created_at, now())" if name == "created_at" else name for name in columns)
+    op.execute(f"INSERT INTO {table} ({', '.join(columns)}) SELECT {select_list} FROM {legacy}")
+    # Hand the id sequence over before the old table (its owner) is dropped
+    op.execute(f"ALTER SEQUENCE {_sequence(legacy)} OWNED BY {table}.id")
+    op.execute(f"DROP TABLE {legacy}")
+    for statement in INDEXES[table]:
+        op.execute(statement)
+    op.execute(f"ANALYZE {table}")
+
+
+def _unpartition(table: str):
+    partitioned = f"{table}_partitioned"
+    op.execute(f"ALTER TABLE {table} RENAME TO {partitioned}")
+    op.execute(f"ALTER TABLE {partitioned} RENAME CONSTRAINT {table}_pkey TO {partitioned}_pkey")
+    for statement in INDEXES[table]:
+        name = statement.split()[2]
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_partitioned")
+    op.execute(f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS)")
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN created_at DROP NOT NULL")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+    columns = ", ".join(_columns(partitioned))
+    op.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {partitioned}")
+    op.execute(f"ALTER SEQUENCE {_sequence(partitioned)} OWNED BY {table}.id")
+    # Dropping the parent drops every partition with it
+    op.execute(f"DROP TABLE {partitioned}")
+    for statement in PLAIN_INDEXES[table]:
+        op.execute(statement)
+    op.execute(f"ANALYZE {table}")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scan_daily",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("scans", sa.Integer(), nullable=False),
+    )
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in ("posts", "scan_tracker"):
+        _partition(table)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        for table in ("scan_tracker", "posts"):
+            _unpartition(table)
+    op.drop_table("scan_daily")
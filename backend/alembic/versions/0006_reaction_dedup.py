@@ -0,0 +1,32 @@
+"""Per-post reaction dedup fingerprints
+
+One row per post that has reactions: the sorted 32-bit fingerprints of every
+(reaction, user_token) currently reacting, so a token can't add the same
+reaction twice and a second tap takes it back. Written in batches by
+app/core/reaction_dedup.py.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "reaction_dedup",
+        sa.Column("post_id", sa.Integer(), primary_key=True),
+        sa.Column("fingerprints", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("reaction_dedup")
@@ -0,0 +1,32 @@
+"""Database-backed feed versions
+
+One row per feed ("global", "hashtag:<name>", plus "all" for bulk changes),
+bumped in the same transaction as each feed write. Feed ETags and
+Last-Modified come from these rows, so every worker reports the same
+version for the same data.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "feed_versions",
+        sa.Column("key", sa.String(100), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("modified", sa.Float(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("feed_versions")
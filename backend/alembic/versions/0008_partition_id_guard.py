@@ -0,0 +1,58 @@
+"""Keep ids unique on the partitioned posts and scan_tracker tables
+
+0005 had to widen their primary keys to (id, created_at), and Postgres can't
+enforce a unique index on id alone across partitions, so nothing stopped a
+second row with an existing id (e.g. an archive restored twice with
+`bulk_data.py import`). A BEFORE INSERT trigger on each parent (cloned to
+every partition, present and future) now raises unique_violation when the id
+is already in the table. The lookup probes the (id, created_at) key of each
+partition, so inserts pay one index probe per partition. Ids from the
+sequence never collide; explicit ids inserted concurrently by two
+transactions can still both get through, so bulk imports skip existing ids
+themselves (bulk.py).
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+TABLES = ("posts", "scan_tracker")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("""
+        CREATE FUNCTION reject_duplicate_id() RETURNS trigger AS $$
+        DECLARE
+            taken boolean;
+        BEGIN
+            -- TG_ARGV[0] is the parent table; TG_TABLE_NAME would be the partition
+            EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE id = $1)', TG_ARGV[0]) INTO taken USING NEW.id;
+            IF taken THEN
+                RAISE unique_violation USING MESSAGE = format('duplicate id %s in %s', NEW.id, TG_ARGV[0]);
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_unique_id BEFORE INSERT ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION reject_duplicate_id('{table}')"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_unique_id ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS reject_duplicate_id()")
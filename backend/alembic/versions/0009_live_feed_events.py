@@ -0,0 +1,34 @@
+"""Shared ids and overflow storage for the live feed relay
+
+On Postgres every API worker relays live feed events to the others through
+LISTEN/NOTIFY (live_feed.py). The id sequence of live_feed_events numbers the
+events, so every worker streams them under the same ids and clients can resume
+on any worker; the table itself only holds events too big for a NOTIFY
+payload, for an hour.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(
+        "CREATE TABLE live_feed_events ("
+        "id bigserial PRIMARY KEY, payload text NOT NULL, created_at timestamptz NOT NULL DEFAULT now())"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP TABLE live_feed_events")
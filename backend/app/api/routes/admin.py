@@ -0,0 +1,143 @@
+import asyncio
+import io
+import logging
+import os
+import queue
+import secrets
+import tempfile
+import threading
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+
+from app.core.bulk import FORMATS, TABLES, export_rows, import_rows
+from app.core.database import engine
+from app.core.snapshots import feed_snapshots
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Admin endpoints are off (404) unless this is set; send it as X-Admin-Token
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# Request bodies above this spill from memory to a temp file
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _check(table: str, fmt: str):
+    if table not in TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table {table}")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format {fmt}")
+
+
+class _ChunkQueue(io.TextIOBase):
+    """Text sink that hands chunks to the response through a bounded queue"""
+
+    def __init__(self):
+        self.chunks: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=16)
+        self._buffer = []
+        self._size = 0
+        # Set when the client goes away, so the export stops instead of blocking
+        self.abandoned = threading.Event()
+
+    def write(self, data) -> int:
+        if isinstance(data, str):
+            data = data.encode()
+        self._buffer.append(data)
+        self._size += len(data)
+        if self._size >= EXPORT_CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if not self._buffer:
+            return
+        chunk = b"".join(self._buffer)
+        self._buffer, self._size = [], 0
+        while True:
+            if self.abandoned.is_set():
+                raise ConnectionAbortedError("Export abandoned by client")
+            try:
+                self.chunks.put(chunk, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+
+def _stream_export(table: str, fmt: str):
+    """Run the export on a thread and yield its output as it is produced"""
+    sink = _ChunkQueue()
+
+    def run():
+        try:
+            export_rows(engine, table, fmt, sink)
+            sink.flush()
+        except ConnectionAbortedError:
+            return
+        except Exception:
+            logger.exception("Export of %s failed", table)
+        if not sink.abandoned.is_set():
+            sink.chunks.put(None)
+
+    threading.Thread(target=run, name=f"export-{table}", daemon=True).start()
+    try:
+        while True:
+            chunk = sink.chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        sink.abandoned.set()
+
+
+# Stream a whole table out as NDJSON or CSV
+@router.get("/export/{table}", dependencies=[Depends(require_admin)])
+def export_table(table: str, format: str = Query("ndjson")):
+    _check(table, format)
+    return StreamingResponse(
+        _stream_export(table, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
+
+
+# Load an NDJSON or CSV request body into a table
+@router.post("/import/{table}", dependencies=[Depends(require_admin)])
+async def import_table(request: Request, table: str, format: str = Query("ndjson")):
+    """
+    Body is the raw file (not multipart). It is spooled to disk as it arrives,
+    then loaded in one transaction; the response reports rows, rows skipped as
+    already present, and rows/sec.
+    """
+    _check(table, format)
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        src = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        try:
+            result = await asyncio.to_thread(import_rows, engine, table, format, src)
+        except (ValueError, UnicodeDecodeError) as e:
+            # BulkError and unparseable values
+            raise HTTPException(status_code=400, detail=str(e))
+        except IntegrityError as e:
+            raise HTTPException(status_code=409, detail=f"Rows conflict with existing data: {e.orig}")
+        finally:
+            src.detach()
+
+    if table == "posts" and result["rows"]:
+        feed_snapshots.schedule()
+    return dict(result, table=table, format=format)
@@ -1,30 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, File, UploadFile
-from sqlalchemy.orm import Session
-from sqlalchemy.orm.attributes import flag_modified
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Header
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.models.models import Post
-from app.schemas.schemas import PostCreate, PostUpdate, PostResponse, PostListResponse
+from app.core.replicas import get_read_db, read_router
+from app.core.pagination import paginate_rows
+from app.core.counters import adjust_post_counts, move_hashtag_count, get_post_count
+from app.core.reactions import REACTION_TYPES, increment_reaction
+from app.core.reaction_buffer import REACTION_WRITE_BEHIND, reaction_buffer
+from app.core.reaction_dedup import REACTION_DEDUP, delete_rows, reaction_dedup
+from app.core.live_feed import live_feed
+from app.core.rate_limit import rate_limiter
+from app.core.feed_cache import feed_cache
+from app.core.etag import BOOT_ID, feed_versions, make_etag, not_modified, set_validators
+from app.core.uploads import save_image_upload
+from app.core.images import image_pipeline
+from app.core.s3 import presign_put, public_url
+from app.core.search import post_index, search_documents
+from app.core.snapshots import feed_snapshots
+from app.core.serialization import encode_post_list, feed_select, rows_to_posts
+from app.core.trending import TRENDING_HALF_LIFE_MINUTES, TRENDING_WINDOW_MINUTES, trending
+from app.models.models import ImageAsset, Post
+from app.schemas.schemas import PostCreate, PostUpdate, PostResponse, PostListResponse, PostSearchResponse
 from typing import List, Optional
 import uuid
 import os
-import shutil
 from datetime import datetime
-import boto3
 from pydantic import BaseModel
 
 router = APIRouter()
-limiter = Limiter(key_func=get_remote_address)
-
-# S3 client setup
-def get_s3_client():
-    return boto3.client(
-        's3',
-        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-        region_name=os.getenv('AWS_REGION')
-    )
 
 # Pydantic model for presigned URL request
 class PresignedUrlRequest(BaseModel):
@@ -36,14 +40,72 @@ class PresignedUrlResponse(BaseModel):
     upload_url: str
     image_url: str
 
+# Most images a single post can attach
+MAX_BATCH_UPLOADS = 10
+# Presigned URLs per client, single or batched, drawn from one bucket
+PRESIGN_LIMIT = "50/hour"
+PRESIGN_BUCKET = "/upload/presign"
+
+# Pydantic models for presigning several uploads at once
+class BatchPresignedUrlRequest(BaseModel):
+    files: List[PresignedUrlRequest]
+
+class BatchPresignedUrlResponse(BaseModel):
+    uploads: List[PresignedUrlResponse]
+
+def _presign_upload(bucket_name: str, presigned_request: PresignedUrlRequest) -> PresignedUrlResponse:
+    # Generate unique filename
+    file_extension = os.path.splitext(presigned_request.filename)[1]
+    unique_filename = f"{uuid.uuid4()}{file_extension}"
+    s3_key = f"images/{unique_filename}"
+    
+    return PresignedUrlResponse(
+        upload_url=presign_put(bucket_name, s3_key, presigned_request.content_type),
+        # The public URL the file will have once uploaded
+        image_url=public_url(bucket_name, s3_key)
+    )
+
+def _post_payload(db_post) -> dict:
+    return PostResponse.model_validate(db_post).model_dump(mode="json")
+
+def _feed_changed(event: str, data: dict, hashtags: List[str]):
+    """Push the change to live streams and re-render snapshots (cached pages follow feed_versions)"""
+    live_feed.publish(event, data, hashtags)
+    feed_snapshots.schedule()
+
+def _schedule_variants(db_post):
+    """Build resized variants for a post image the pipeline hasn't seen yet (e.g. S3 uploads)"""
+    if db_post.image_url and db_post.image_variants is None:
+        image_pipeline.schedule(db_post.image_url)
+
+async def _feed_validators(db: AsyncSession, hashtag: Optional[str]):
+    """ETag and Last-Modified for a feed, from the feed_versions rows every writer bumps"""
+    version, modified = await feed_versions.get(db, hashtag)
+    if REACTION_WRITE_BEHIND:
+        # Unflushed reactions are overlaid per process, so this process's view is part of the tag
+        return make_etag(version, BOOT_ID, reaction_buffer.generation), modified
+    return make_etag(version), modified
+
+def _json_response(body: bytes, etag: Optional[str] = None, last_modified: Optional[float] = None) -> Response:
+    response = Response(content=body, media_type="application/json")
+    if etag:
+        set_validators(response, etag, last_modified)
+    return response
+
 # Create a new post
-@router.post("/create", response_model=PostResponse)
-@limiter.limit("20/hour")
-async def create_post(request: Request, post: PostCreate, db: Session = Depends(get_db)):
+@router.post("/create", response_model=PostResponse, dependencies=[Depends(rate_limiter.limit("20/hour"))])
+async def create_post(request: Request, response: Response, post: PostCreate, db: AsyncSession = Depends(get_db)):
     db_post = Post(**post.dict())
     db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
+    await adjust_post_counts(db, db_post.hashtag, db_post.user_token, 1)
+    await feed_versions.bump(db, [db_post.hashtag])
+    await db.commit()
+    await db.refresh(db_post)
+    _schedule_variants(db_post)
+    post_index.add(db_post.id, db_post.content, db_post.hashtag)
+    trending.record_post(db_post.hashtag)
+    read_router.note_write(response, db_post.user_token)
+    _feed_changed("post_created", _post_payload(db_post), [db_post.hashtag])
     return db_post
 
 # Get all posts (global feed)
@@ -51,233 +113,315 @@ async def create_post(request: Request, post: PostCreate, db: Session = Depends(
 async def get_posts(
     request: Request,
     hashtag: Optional[str] = Query(None, description="Filter by hashtag"),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor"),
     limit: int = Query(20, ge=1, le=100, description="Posts per page"),
-    db: Session = Depends(get_db)
+    approximate: bool = Query(False, description="Allow a slightly stale total"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = db.query(Post)
-    
-    if hashtag:
-        query = query.filter(Post.hashtag == hashtag)
+    etag, modified = await _feed_validators(db, hashtag)
+    cached = not_modified(request, etag, modified)
+    if cached:
+        return cached
     
-    total = query.count()
-    posts = query.order_by(Post.created_at.desc()).offset((page - 1) * limit).limit(limit).all()
+    async def load() -> bytes:
+        filters = [Post.hashtag == hashtag] if hashtag else []
+        
+        total = await get_post_count(db, select(Post).where(*filters), hashtag=hashtag, approximate=approximate)
+        # Core rows straight to bytes; same body PostListResponse would produce
+        rows, next_cursor = await paginate_rows(db, feed_select(*filters), limit, page=page, cursor=cursor)
+        return encode_post_list(rows_to_posts(rows), total, page, limit, next_cursor)
     
-    return PostListResponse(
-        posts=posts,
-        total=total,
-        page=page,
-        limit=limit
-    )
+    # Replica and primary pages differ while a replica lags, so never share one; keyed by
+    # the ETag too, so a cached body always matches the validator sent with it
+    key = ("posts", hashtag, page, cursor, limit, approximate, db.info["read_from"], etag)
+    return _json_response(await feed_cache.get_or_load(key, load), etag, modified)
+
+# Trending hashtags, from in-memory per-minute counters
+@router.get("/hashtags/trending")
+async def get_trending_hashtags(limit: int = Query(10, ge=1, le=50)):
+    """
+    Hashtags with the most recent posts and reactions, best first.
+    Older activity counts for less (half-life decay); no database query.
+    """
+    return {
+        "hashtags": trending.top(limit),
+        "window_minutes": TRENDING_WINDOW_MINUTES,
+        "half_life_minutes": TRENDING_HALF_LIFE_MINUTES
+    }
 
 # Get posts for a specific hashtag (dynamic endpoint)
 @router.get("/hashtags/{hashtag}/posts", response_model=PostListResponse)
 async def get_hashtag_posts(
     hashtag: str,
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor"),
     limit: int = Query(20, ge=1, le=100, description="Posts per page"),
-    db: Session = Depends(get_db)
+    approximate: bool = Query(False, description="Allow a slightly stale total"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get all posts for a specific hashtag.
     Example: /api/hashtags/barca/posts
+    Pass next_cursor back as ?cursor= to scroll without OFFSET.
     """
-    query = db.query(Post).filter(Post.hashtag == hashtag)
+    etag, _ = await _feed_validators(db, hashtag)
     
-    total = query.count()
-    posts = query.order_by(Post.created_at.desc()).offset((page - 1) * limit).limit(limit).all()
+    async def load() -> bytes:
+        total = await get_post_count(db, select(Post).where(Post.hashtag == hashtag), hashtag=hashtag, approximate=approximate)
+        rows, next_cursor = await paginate_rows(db, feed_select(Post.hashtag == hashtag), limit, page=page, cursor=cursor)
+        return encode_post_list(rows_to_posts(rows), total, page, limit, next_cursor)
     
-    return PostListResponse(
-        posts=posts,
-        total=total,
-        page=page,
-        limit=limit
-    )
+    key = ("hashtag", hashtag, page, cursor, limit, approximate, db.info["read_from"], etag)
+    return _json_response(await feed_cache.get_or_load(key, load))
 
 # Get user's own posts
 @router.get("/mydumps", response_model=PostListResponse)
 async def get_my_posts(
     token: str = Query(..., description="User token"),
     page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    approximate: bool = Query(False),
+    db: AsyncSession = Depends(get_read_db)
+):
+    total = await get_post_count(db, select(Post).where(Post.user_token == token), user_token=token, approximate=approximate)
+    rows, next_cursor = await paginate_rows(db, feed_select(Post.user_token == token), limit, page=page, cursor=cursor)
+    return _json_response(encode_post_list(rows_to_posts(rows), total, page, limit, next_cursor))
+
+# Full-text search over post content
+@router.get("/search", response_model=PostSearchResponse)
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=200, description="Search words; quotes and -exclusions work on Postgres"),
+    hashtag: Optional[str] = Query(None, description="Only search this hashtag"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor"),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = db.query(Post).filter(Post.user_token == token)
-    total = query.count()
-    posts = query.order_by(Post.created_at.desc()).offset((page - 1) * limit).limit(limit).all()
+    """Search posts by content, best match first"""
+    posts, next_cursor = await search_documents(
+        db, Post, post_index, q, limit, cursor=cursor, tag_column=Post.hashtag, tag=hashtag
+    )
+    reaction_buffer.overlay(posts)
     
-    return PostListResponse(
+    return PostSearchResponse(
         posts=posts,
-        total=total,
-        page=page,
-        limit=limit
+        query=q,
+        limit=limit,
+        next_cursor=next_cursor
     )
 
 # Update a post
 @router.patch("/post/{post_id}", response_model=PostResponse)
 async def update_post(
+    response: Response,
     post_id: int,
     post_update: PostUpdate,
     token: str = Query(..., description="User token"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_post = db.query(Post).filter(Post.id == post_id, Post.user_token == token).first()
+    db_post = await db.scalar(select(Post).where(Post.id == post_id, Post.user_token == token))
     
     if not db_post:
         raise HTTPException(status_code=404, detail="Post not found or not authorized")
     
     update_data = post_update.dict(exclude_unset=True)
+    old_hashtag = db_post.hashtag
     for field, value in update_data.items():
         setattr(db_post, field, value)
+    if update_data.get("hashtag"):
+        await move_hashtag_count(db, old_hashtag, db_post.hashtag)
+    await feed_versions.bump(db, [old_hashtag, db_post.hashtag])
     
-    db.commit()
-    db.refresh(db_post)
+    await db.commit()
+    await db.refresh(db_post)
+    reaction_buffer.overlay([db_post])
+    _schedule_variants(db_post)
+    post_index.add(db_post.id, db_post.content, db_post.hashtag)
+    read_router.note_write(response, token)
+    # Also tell the old hashtag's streams, so a moved post disappears there
+    _feed_changed("post_updated", _post_payload(db_post), [old_hashtag, db_post.hashtag])
     return db_post
 
 # Delete a post
 @router.delete("/post/{post_id}")
 async def delete_post(
+    response: Response,
     post_id: int,
     token: str = Query(..., description="User token"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_post = db.query(Post).filter(Post.id == post_id, Post.user_token == token).first()
+    db_post = await db.scalar(select(Post).where(Post.id == post_id, Post.user_token == token))
     
     if not db_post:
         raise HTTPException(status_code=404, detail="Post not found or not authorized")
     
-    db.delete(db_post)
-    db.commit()
+    await db.delete(db_post)
+    await adjust_post_counts(db, db_post.hashtag, db_post.user_token, -1)
+    await delete_rows(db, [post_id])
+    await feed_versions.bump(db, [db_post.hashtag])
+    await db.commit()
+    post_index.remove(post_id)
+    reaction_dedup.forget([post_id])
+    read_router.note_write(response, token)
+    _feed_changed("post_deleted", {"id": post_id, "hashtag": db_post.hashtag}, [db_post.hashtag])
     return {"message": "Post deleted successfully"}
 
+async def _count_reaction(db: AsyncSession, post_id: int, reaction: str, delta: int):
+    """Move a reaction count by delta and return the post; 404 if it doesn't exist"""
+    if REACTION_WRITE_BEHIND:
+        # Buffer the tap and answer from a read; the flusher batches the writes
+        db_post = await db.get(Post, post_id)
+        if db_post:
+            reaction_buffer.add(post_id, reaction, delta)
+            reaction_buffer.overlay([db_post])
+    else:
+        # Single atomic UPDATE ... RETURNING - no read-modify-write race
+        db_post = await increment_reaction(db, post_id, reaction, delta)
+        if db_post and db_post["image_url"]:
+            # RETURNING gives bare columns; add the variants a loaded Post would carry
+            asset = await db.get(ImageAsset, db_post["image_url"])
+            db_post["image_variants"] = asset.variants if asset else None
+    
+    if not db_post:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return db_post
+
 # React to a post
-@router.post("/post/{post_id}/react")
-@limiter.limit("100/hour")
+@router.post("/post/{post_id}/react", response_model=PostResponse, dependencies=[Depends(rate_limiter.limit("100/hour"))])
 async def react_to_post(
     request: Request,
+    response: Response,
     post_id: int,
     reaction: str = Query(..., description="Reaction type"),
     token: str = Query(..., description="User token"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_post = db.query(Post).filter(Post.id == post_id).first()
-    
-    if not db_post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
-    # Initialize reactions if not exists
-    if not db_post.reactions:
-        db_post.reactions = {
-            "thumbs_up": 0,
-            "heart": 0,
-            "laugh": 0,
-            "angry": 0
-        }
-    
-    # Simple increment - just add 1 to the reaction count
-    current_count = db_post.reactions.get(reaction, 0)
-    db_post.reactions[reaction] = current_count + 1
+    if reaction not in REACTION_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid reaction type")
     
-    # Mark the JSON field as modified so SQLAlchemy detects the change
-    flag_modified(db_post, "reactions")
+    delta = 1
+    if REACTION_DEDUP:
+        # One reaction of each type per token; tapping again takes it back.
+        # The flip only sticks if the count below is written.
+        async with reaction_dedup.toggle(db, post_id, reaction, token) as added:
+            if added is None:
+                raise HTTPException(status_code=404, detail="Post not found")
+            delta = 1 if added else -1
+            db_post = await _count_reaction(db, post_id, reaction, delta)
+    else:
+        db_post = await _count_reaction(db, post_id, reaction, delta)
     
-    db.commit()
-    db.refresh(db_post)
-    
-    return db_post
+    post = PostResponse.model_validate(db_post)
+    if delta > 0:
+        trending.record_reaction(post.hashtag)
+    read_router.note_write(response, token)
+    _feed_changed(
+        "post_reacted",
+        {"id": post.id, "hashtag": post.hashtag, "reactions": post.reactions},
+        [post.hashtag]
+    )
+    return post
 
 # Upload image
-@router.post("/upload-image")
-@limiter.limit("10/hour")
-async def upload_image(request: Request, file: UploadFile = File(...)):
+@router.post("/upload-image", dependencies=[Depends(rate_limiter.limit("10/hour"))], openapi_extra={
+    # The body is parsed by hand (streamed), so describe it for the docs here
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "properties": {"file": {"type": "string", "format": "binary"}},
+            "required": ["file"]
+        }}}
+    }
+})
+async def upload_image(request: Request):
     """Upload an image file and return the URL"""
-    # Validate file type
-    if not file.content_type or not file.content_type.startswith('image/'):
-        raise HTTPException(status_code=400, detail="File must be an image")
-    
-    # Validate file size (max 5MB)
-    file_size = 0
-    content = await file.read()
-    file_size = len(content)
-    if file_size > 5 * 1024 * 1024:  # 5MB
-        raise HTTPException(status_code=400, detail="File size must be less than 5MB")
-    
-    # Create uploads directory if it doesn't exist
-    upload_dir = "uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Generate unique filename
-    file_extension = os.path.splitext(file.filename)[1] if file.filename else '.jpg'
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(upload_dir, unique_filename)
-    
-    # Save the file
-    with open(file_path, "wb") as buffer:
-        buffer.write(content)
+    # Streams to disk in chunks; rejects non-images and files over the size cap
+    unique_filename = await save_image_upload(request)
     
     # Return the URL path
     image_url = f"/uploads/{unique_filename}"
+    # Start on the thumbnails now so they are usually ready when the post is created
+    image_pipeline.schedule(image_url)
     return {"image_url": image_url, "message": "Image uploaded successfully"}
 
 # Get only new posts since a timestamp
 @router.get("/posts/new", response_model=PostListResponse)
 async def get_new_posts(
+    request: Request,
     since: datetime = Query(..., description="Only posts after this timestamp (ISO format)"),
     hashtag: Optional[str] = Query(None, description="Filter by hashtag"),
     limit: int = Query(20, ge=1, le=100, description="Maximum posts to return"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get only new posts created after the specified timestamp.
     This is much more efficient than fetching all posts.
+    Send If-None-Match to get a bodyless 304 while nothing has changed.
     """
-    query = db.query(Post).filter(Post.created_at > since)
-    
-    if hashtag:
-        query = query.filter(Post.hashtag == hashtag)
+    etag, modified = await _feed_validators(db, hashtag)
+    cached = not_modified(request, etag, modified)
+    if cached:
+        return cached
     
-    posts = query.order_by(Post.created_at.desc()).limit(limit).all()
+    async def load() -> bytes:
+        stmt = feed_select(Post.created_at > since)
+        
+        if hashtag:
+            stmt = stmt.where(Post.hashtag == hashtag)
+        
+        rows = (await db.execute(stmt.order_by(Post.created_at.desc()).limit(limit))).all()
+        return encode_post_list(rows_to_posts(rows), len(rows), 1, limit)
     
-    return PostListResponse(
-        posts=posts,
-        total=len(posts),
-        page=1,
-        limit=limit
+    key = ("new", hashtag, since.isoformat(), limit, db.info["read_from"], etag)
+    return _json_response(await feed_cache.get_or_load(key, load), etag, modified)
+
+# Stream feed changes (replaces polling /posts/new)
+@router.get("/posts/stream")
+async def stream_posts(
+    request: Request,
+    hashtag: Optional[str] = Query(None, description="Only events for this hashtag"),
+    last_event_id: Optional[int] = Query(None, description="Resume after this event id"),
+    last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Server-Sent Events stream of post_created, post_updated, post_deleted and
+    post_reacted events, globally or for one hashtag.
+    Browsers resend Last-Event-ID on reconnect, and missed events are replayed.
+    A `reset` event means the gap was too large and the client should refetch.
+    """
+    resume_from = last_event_id_header if last_event_id_header is not None else last_event_id
+    return StreamingResponse(
+        live_feed.stream(request, hashtag=hashtag, last_event_id=resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 # Get presigned URL for S3 upload
-@router.post("/upload/presigned-url", response_model=PresignedUrlResponse)
-@limiter.limit("50/hour")
+@router.post("/upload/presigned-url", response_model=PresignedUrlResponse, dependencies=[Depends(rate_limiter.limit(PRESIGN_LIMIT, bucket=PRESIGN_BUCKET))])
 async def get_presigned_url(request: Request, presigned_request: PresignedUrlRequest):
     """Generate a presigned URL for direct S3 upload"""
     try:
-        s3_client = get_s3_client()
-        bucket_name = os.getenv('S3_BUCKET_NAME')
-        
-        # Generate unique filename
-        file_extension = os.path.splitext(presigned_request.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        s3_key = f"images/{unique_filename}"
-        
-        # Generate presigned URL for PUT operation
-        presigned_url = s3_client.generate_presigned_url(
-            'put_object',
-            Params={
-                'Bucket': bucket_name,
-                'Key': s3_key,
-                'ContentType': presigned_request.content_type
-            },
-            ExpiresIn=3600  # 1 hour
-        )
-        
-        # Generate the public URL for the uploaded file
-        image_url = f"https://{bucket_name}.s3.{os.getenv('AWS_REGION')}.amazonaws.com/{s3_key}"
-        
-        return PresignedUrlResponse(
-            upload_url=presigned_url,
-            image_url=image_url
-        )
-        
+        return _presign_upload(os.getenv('S3_BUCKET_NAME'), presigned_request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate presigned URL: {str(e)}")
 
+# Get presigned URLs for several S3 uploads at once (multi-image posts)
+@router.post("/upload/presigned-urls", response_model=BatchPresignedUrlResponse)
+async def get_presigned_urls(request: Request, batch_request: BatchPresignedUrlRequest):
+    """Generate presigned URLs for up to MAX_BATCH_UPLOADS direct S3 uploads"""
+    if not batch_request.files:
+        raise HTTPException(status_code=400, detail="No files to presign")
+    if len(batch_request.files) > MAX_BATCH_UPLOADS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_UPLOADS} files per request")
+    # One URL is one upload, whichever route hands it out
+    await rate_limiter.charge(request, PRESIGN_LIMIT, cost=len(batch_request.files), bucket=PRESIGN_BUCKET)
+    
+    try:
+        bucket_name = os.getenv('S3_BUCKET_NAME')
+        return BatchPresignedUrlResponse(
+            uploads=[_presign_upload(bucket_name, file) for file in batch_request.files]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to generate presigned URLs: {str(e)}")
@@ -1,17 +1,54 @@
-from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import String, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.models.models import ScanTracker, WildThought
+from app.core.replicas import get_read_db
+from app.core.counters import SCANS_COUNTER, SCAN_COUNT_STMT, increment_counter, read_counter, seed_counter
+from app.core.etag import make_etag, not_modified, set_validators
+from app.core.search import search_documents, wild_thought_index
+from app.core.ingest import INGEST_BATCHED, IngestQueueFull, scan_ingestor, wild_thought_ingestor
+from app.models.models import Counter, ScanTracker, WildThought
 from pydantic import BaseModel
 from typing import Optional
 
 router = APIRouter()
 
+def _track_scan_stmt(ip_address: Optional[str], user_agent: str):
+    """
+    WITH counter AS (UPDATE counters ... RETURNING value)
+    INSERT INTO scan_tracker ... SELECT ... FROM counter RETURNING the new value
+    The row lock on the counter makes every position unique.
+    """
+    counter = (
+        update(Counter)
+        .where(Counter.name == SCANS_COUNTER)
+        .values(value=Counter.value + 1)
+        .returning(Counter.value)
+        .cte("counter")
+    )
+    return (
+        insert(ScanTracker)
+        .from_select(
+            ["ip_address", "user_agent"],
+            select(literal(ip_address, String), literal(user_agent, String)).select_from(counter)
+        )
+        .add_cte(counter)
+        .returning(select(counter.c.value).scalar_subquery())
+    )
+
+def _queue_full() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Too many requests right now, please try again",
+        headers={"Retry-After": "1"}
+    )
+
 class WildThoughtRequest(BaseModel):
     content: str
 
 @router.post("/track")
-async def track_scan(request: Request, db: Session = Depends(get_db)):
+async def track_scan(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Track a QR code scan and return the current count.
     Returns the position of this scan (e.g., 127th student).
@@ -20,17 +57,29 @@ async def track_scan(request: Request, db: Session = Depends(get_db)):
     ip_address = request.client.host if request.client else None
     user_agent = request.headers.get("user-agent", "")
     
-    # Create scan record
-    scan = ScanTracker(
-        ip_address=ip_address,
-        user_agent=user_agent
-    )
-    db.add(scan)
-    db.commit()
-    db.refresh(scan)
-    
-    # Get total count
-    total_scans = db.query(ScanTracker).count()
+    if INGEST_BATCHED:
+        # Hand out the position now; the row and counter are written by the next flush
+        total_scans = await scan_ingestor.next_position(db)
+        try:
+            await scan_ingestor.put({"ip_address": ip_address, "user_agent": user_agent})
+        except IngestQueueFull:
+            # The position is skipped, never handed out again
+            raise _queue_full()
+    elif db.bind.dialect.name == "postgresql":
+        # Bump the counter and insert the scan in one statement
+        total_scans = await db.scalar(_track_scan_stmt(ip_address, user_agent))
+        if total_scans is None:
+            # Counter not created yet - seed it from the existing rows and retry
+            await seed_counter(db, SCANS_COUNTER, SCAN_COUNT_STMT)
+            total_scans = await db.scalar(_track_scan_stmt(ip_address, user_agent))
+    else:
+        # Other backends: two statements in one transaction
+        total_scans = await increment_counter(db, SCANS_COUNTER, SCAN_COUNT_STMT)
+        db.add(ScanTracker(
+            ip_address=ip_address,
+            user_agent=user_agent
+        ))
+    await db.commit()
     
     # Format ordinal number
     def get_ordinal(n):
@@ -47,20 +96,30 @@ async def track_scan(request: Request, db: Session = Depends(get_db)):
     }
 
 @router.get("/count")
-async def get_scan_count(db: Session = Depends(get_db)):
+async def get_scan_count(request: Request, db: AsyncSession = Depends(get_read_db)):
     """
     Get the total number of scans without tracking a new one.
+    Reads the scans counter, which also serves as the version tag.
     """
-    total_scans = db.query(ScanTracker).count()
-    return {
+    if INGEST_BATCHED and scan_ingestor.position is not None:
+        # Includes scans still waiting in the ingestion queue
+        total_scans = scan_ingestor.position
+    else:
+        total_scans = await read_counter(db, SCANS_COUNTER, SCAN_COUNT_STMT)
+    etag = make_etag("scans", total_scans)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    return set_validators(JSONResponse({
         "total": total_scans
-    }
+    }), etag)
 
 @router.post("/wild-thought")
 async def submit_wild_thought(
     thought: WildThoughtRequest,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Submit a wild/crazy thought anonymously (preview feature).
@@ -74,13 +133,27 @@ async def submit_wild_thought(
     
     ip_address = request.client.host if request.client else None
     
+    if INGEST_BATCHED:
+        # Written by the next flush under an id reserved now
+        thought_id = await wild_thought_ingestor.next_id(db)
+        try:
+            await wild_thought_ingestor.put({"id": thought_id, "content": thought.content.strip(), "ip_address": ip_address})
+        except IngestQueueFull:
+            raise _queue_full()
+        return {
+            "success": True,
+            "message": "Your wild thought has been dumped! 🎉",
+            "id": thought_id
+        }
+    
     wild_thought = WildThought(
         content=thought.content.strip(),
         ip_address=ip_address
     )
     db.add(wild_thought)
-    db.commit()
-    db.refresh(wild_thought)
+    await db.commit()
+    await db.refresh(wild_thought)
+    wild_thought_index.add(wild_thought.id, wild_thought.content)
     
     return {
         "success": True,
@@ -89,20 +162,53 @@ async def submit_wild_thought(
     }
 
 @router.get("/wild-thoughts/count")
-async def get_wild_thoughts_count(db: Session = Depends(get_db)):
+async def get_wild_thoughts_count(request: Request, db: AsyncSession = Depends(get_read_db)):
     """
     Get the total number of wild thoughts submitted.
+    Wild thoughts are insert-only, so the newest id is a cheap version tag.
     """
-    count = db.query(WildThought).count()
-    return {
+    etag = make_etag("wild-thoughts", await db.scalar(select(func.max(WildThought.id))) or 0)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    count = await db.scalar(select(func.count()).select_from(WildThought))
+    return set_validators(JSONResponse({
         "total": count
+    }), etag)
+
+@router.get("/wild-thoughts/search")
+async def search_wild_thoughts(
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Search wild thoughts by content, best match first.
+    Same anonymous shape as /wild-thoughts (no IP).
+    """
+    thoughts, next_cursor = await search_documents(db, WildThought, wild_thought_index, q, limit, cursor=cursor)
+    
+    return {
+        "thoughts": [
+            {
+                "id": thought.id,
+                "content": thought.content,
+                "created_at": thought.created_at.isoformat() if thought.created_at else None
+            }
+            for thought in thoughts
+        ],
+        "query": q,
+        "limit": limit,
+        "next_cursor": next_cursor
     }
 
 @router.get("/wild-thoughts")
 async def get_wild_thoughts(
     page: int = 1,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get paginated list of wild thoughts (newest first).
@@ -111,14 +217,15 @@ async def get_wild_thoughts(
     offset = (page - 1) * limit
     
     # Get thoughts ordered by newest first
-    thoughts = db.query(WildThought)\
-        .order_by(WildThought.created_at.desc())\
-        .offset(offset)\
-        .limit(limit)\
-        .all()
+    thoughts = (await db.execute(
+        select(WildThought)
+        .order_by(WildThought.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+    )).scalars().all()
     
     # Get total count
-    total = db.query(WildThought).count()
+    total = await db.scalar(select(func.count()).select_from(WildThought))
     
     # Format response (only include content and created_at - keep anonymous)
     thoughts_data = [
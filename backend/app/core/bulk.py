@@ -0,0 +1,314 @@
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
+from typing import IO, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import JSON, DateTime, Integer, Table, delete, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.counters import SCANS_COUNTER, dialect_insert, rebuild_post_counts
+from app.core.etag import feed_versions
+from app.models.models import Counter, Post, ScanTracker, WildThought
+
+# Rows per executemany batch on backends without COPY
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "5000"))
+# Rows fetched per round trip when exporting
+BULK_FETCH_SIZE = int(os.getenv("BULK_FETCH_SIZE", "5000"))
+
+TABLES: Dict[str, Table] = {
+    "posts": Post.__table__,
+    "wild_thoughts": WildThought.__table__,
+    "scans": ScanTracker.__table__,
+}
+FORMATS = ("ndjson", "csv")
+
+
+class BulkError(ValueError):
+    pass
+
+
+def get_table(name: str) -> Table:
+    if name not in TABLES:
+        raise BulkError(f"Unknown table {name!r}; expected one of {', '.join(TABLES)}")
+    return TABLES[name]
+
+
+def guess_format(path: Optional[str], default: str = "ndjson") -> str:
+    """ndjson or csv from a file extension"""
+    if path and path.lower().endswith(".csv"):
+        return "csv"
+    return default
+
+
+def _check_format(fmt: str):
+    if fmt not in FORMATS:
+        raise BulkError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def _to_text(value) -> Optional[str]:
+    """A column value as it appears in a CSV cell (None stays NULL)"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+def _to_json(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _coerce(table: Table, row: dict) -> dict:
+    """Turn parsed NDJSON/CSV values into what the column types expect"""
+    out = {}
+    for name, value in row.items():
+        column = table.c.get(name)
+        if column is None:
+            continue
+        if value == "" and column.nullable:
+            # CSV has no NULL; an empty cell in a nullable column means NULL
+            value = None
+        elif isinstance(value, str):
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, JSON):
+                value = json.loads(value)
+            elif isinstance(column.type, Integer):
+                value = int(value)
+        out[name] = value
+    return out
+
+
+def read_rows(table: Table, fmt: str, src: IO[str]) -> Iterator[dict]:
+    """Parse an NDJSON or CSV stream one row at a time"""
+    _check_format(fmt)
+    if fmt == "csv":
+        for row in csv.DictReader(src):
+            yield _coerce(table, row)
+        return
+    for line_no, line in enumerate(src, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield _coerce(table, json.loads(line))
+        except ValueError as exc:
+            raise BulkError(f"Line {line_no}: {exc}")
+
+
+class _CsvSource:
+    """
+    Read-only file object that renders rows as CSV on demand, so psycopg2's
+    copy_expert can stream an arbitrarily large import without holding it.
+    """
+
+    def __init__(self, rows: Iterable[dict], columns: List[str]):
+        self._rows = iter(rows)
+        self._columns = columns
+        self._buffer = io.StringIO()
+        # Every string is quoted, so an empty content still loads as ''
+        self._writer = csv.writer(self._buffer, quoting=csv.QUOTE_NONNUMERIC)
+        self._pending = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow([_to_text(row.get(column)) for column in self._columns])
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        if size < 0:
+            size = len(self._pending)
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+def _first_and_rest(rows: Iterator[dict]):
+    first = next(rows, None)
+    if first is None:
+        return None, iter(())
+    return first, rows
+
+
+def _after_import(conn, table: Table, rows: int):
+    """Keep sequences and maintained counters in line with the new rows"""
+    if conn.dialect.name == "postgresql":
+        # Explicit ids do not advance the serial sequence
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"GREATEST((SELECT max(id) FROM {table.name}), 1))"
+        ))
+    if table is ScanTracker.__table__:
+        # Unseeded counters pick the new rows up from COUNT(*) on first use
+        conn.execute(update(Counter).where(Counter.name == SCANS_COUNTER).values(value=Counter.value + rows))
+    if table is Post.__table__ and rows:
+        # Imported posts can land in any feed
+        feed_versions.bump_all_sync(conn)
+
+
+def _copy_in(conn, table: Table, columns: List[str], rows: Iterable[dict], into: Optional[str] = None) -> int:
+    """Stream rows into table (or a copy of it named into) with COPY ... FROM STDIN; returns the row count"""
+    source = _CsvSource(rows, columns)
+    # Same rule as the executemany path: empty in a nullable column is NULL
+    nullable = [column for column in columns if table.c[column].nullable]
+    options = f", FORCE_NULL ({', '.join(nullable)})" if nullable else ""
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {into or table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv{options})",
+            source,
+            size=64 * 1024,
+        )
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def _copy_new_ids(conn, table: Table, columns: List[str], rows: Iterable[dict]):
+    """
+    COPY rows with explicit ids into a staging table, then move across only
+    the ids the table doesn't have yet. The partitioned tables can't enforce a
+    unique id (alembic 0005/0008), so ON CONFLICT alone would not catch them.
+    Returns (rows read, rows inserted).
+    """
+    # One import per table at a time, so two can't both find an id free
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"import:{table.name}"})
+    staging = f"{table.name}_import"
+    conn.execute(text(f"CREATE TEMP TABLE {staging} (LIKE {table.name}) ON COMMIT DROP"))
+    read = _copy_in(conn, table, columns, rows, into=staging)
+    names = ", ".join(columns)
+    inserted = conn.execute(text(
+        f"INSERT INTO {table.name} ({names}) "
+        f"SELECT DISTINCT ON (id) {names} FROM {staging} s "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {table.name} t WHERE t.id = s.id) "
+        f"ORDER BY id ON CONFLICT DO NOTHING"
+    )).rowcount
+    return read, inserted
+
+
+def import_rows(engine: Engine, table_name: str, fmt: str, src: IO[str],
+                batch_size: int = BULK_BATCH_SIZE) -> dict:
+    """
+    Load an NDJSON/CSV stream into a table in one transaction.
+    Postgres gets a single COPY ... FROM STDIN fed straight from the parser;
+    other backends get executemany INSERTs of batch_size rows. Memory use is
+    one batch either way. Columns are taken from the first row; ids are kept
+    when given, and rows whose id is already in the table are skipped, so
+    loading the same file twice adds nothing.
+    Returns {"rows", "skipped", "seconds", "rows_per_sec"}.
+    """
+    table = get_table(table_name)
+    started = time.perf_counter()
+    first, rest = _first_and_rest(read_rows(table, fmt, src))
+    read = count = 0
+
+    if first is not None:
+        columns = list(first)
+
+        def rows():
+            yield first
+            yield from rest
+
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                if "id" in columns:
+                    read, count = _copy_new_ids(conn, table, columns, rows())
+                else:
+                    read = count = _copy_in(conn, table, columns, rows())
+            else:
+                insert = dialect_insert(conn)
+                stmt = table.insert()
+                if insert is not None and "id" in columns:
+                    stmt = insert(table).on_conflict_do_nothing(index_elements=["id"])
+                batch = []
+                for row in rows():
+                    batch.append({column: row.get(column) for column in columns})
+                    if len(batch) >= batch_size:
+                        count += conn.execute(stmt, batch).rowcount
+                        read += len(batch)
+                        batch = []
+                if batch:
+                    count += conn.execute(stmt, batch).rowcount
+                    read += len(batch)
+            _after_import(conn, table, count)
+
+    result = dict(_result(count, started), skipped=read - count)
+    if table is Post.__table__ and count:
+        # Per-hashtag/user totals are far cheaper to rebuild once than to bump per row
+        with Session(engine) as db:
+            result["counters_repaired"] = len(rebuild_post_counts(db))
+    return result
+
+
+def export_rows(engine: Engine, table_name: str, fmt: str, out: IO[str],
+                fetch_size: int = BULK_FETCH_SIZE) -> dict:
+    """
+    Write a whole table to out as NDJSON or CSV (with a header), in id order.
+    Postgres CSV is a server-side COPY ... TO STDOUT; everything else streams
+    a server-side cursor fetch_size rows at a time.
+    """
+    _check_format(fmt)
+    table = get_table(table_name)
+    columns = [column.name for column in table.columns]
+    started = time.perf_counter()
+    count = 0
+
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql" and fmt == "csv":
+            cursor = conn.connection.dbapi_connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY (SELECT {', '.join(columns)} FROM {table.name} ORDER BY id) "
+                    f"TO STDOUT WITH (FORMAT csv, HEADER true)",
+                    out,
+                    size=64 * 1024,
+                )
+                count = cursor.rowcount
+            finally:
+                cursor.close()
+        else:
+            result = conn.execution_options(stream_results=True, yield_per=fetch_size).execute(
+                select(table).order_by(table.c.id)
+            )
+            if fmt == "csv":
+                writer = csv.writer(out, quoting=csv.QUOTE_NONNUMERIC)
+                writer.writerow(columns)
+                for row in result:
+                    writer.writerow([_to_text(value) for value in row])
+                    count += 1
+            else:
+                for row in result:
+                    out.write(json.dumps({name: _to_json(value) for name, value in zip(columns, row)}))
+                    out.write("\n")
+                    count += 1
+
+    return _result(count, started)
+
+
+def truncate_table(engine: Engine, table_name: str):
+    """Delete every row (for reloading load-test data)"""
+    table = get_table(table_name)
+    with engine.begin() as conn:
+        conn.execute(delete(table))
+        if table is ScanTracker.__table__:
+            conn.execute(delete(Counter).where(Counter.name == SCANS_COUNTER))
+    if table is Post.__table__:
+        with Session(engine) as db:
+            rebuild_post_counts(db)
+
+
+def _result(rows: int, started: float) -> dict:
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds) if seconds > 0 else rows,
+    }
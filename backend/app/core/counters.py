@@ -0,0 +1,225 @@
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Select, String, func, literal, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.models import Counter, Post, PostCount, ScanDaily, ScanTracker
+
+GLOBAL_KEY = "global"
+SCANS_COUNTER = "scans"
+# Exact count, only used once to seed the scans counter; includes the scans the
+# retention job compacted into scan_daily
+SCAN_COUNT_STMT = select(
+    select(func.count()).select_from(ScanTracker).scalar_subquery()
+    + select(func.coalesce(func.sum(ScanDaily.scans), 0)).scalar_subquery()
+)
+
+# How long an approximate total may be served from memory before re-reading it
+APPROX_COUNT_TTL = float(os.getenv("APPROX_COUNT_TTL", "30"))
+
+_approx_cache: Dict[str, Tuple[float, int]] = {}
+_approx_lock = threading.Lock()
+
+
+def count_key(hashtag: Optional[str] = None, user_token: Optional[str] = None) -> str:
+    """Counter key for a feed: global, one hashtag or one user's posts"""
+    if user_token:
+        return f"user:{user_token}"
+    if hashtag:
+        return f"hashtag:{hashtag}"
+    return GLOBAL_KEY
+
+
+def _count_stmt(hashtag: Optional[str] = None, user_token: Optional[str] = None) -> Select:
+    """Exact count of the posts behind one counter key"""
+    stmt = select(func.count()).select_from(Post)
+    if user_token:
+        return stmt.where(Post.user_token == user_token)
+    if hashtag:
+        return stmt.where(Post.hashtag == hashtag)
+    return stmt
+
+
+async def _bump(db: AsyncSession, key: str, delta: int, count_stmt: Select):
+    """
+    Add delta to one counter row (no commit). A key without a row yet is
+    seeded from count_stmt instead, counted after flushing the caller's
+    changes, so the seed already includes this write.
+    """
+    stmt = update(PostCount).where(PostCount.key == key).values(count=PostCount.count + delta)
+    if (await db.execute(stmt)).rowcount:
+        return
+
+    await db.flush()
+    insert = dialect_insert(db)
+    if insert is not None:
+        seed = insert(PostCount).from_select(
+            ["key", "count"],
+            select(literal(key, String), count_stmt.scalar_subquery()),
+        )
+        seeded = await db.scalar(
+            seed.on_conflict_do_nothing(index_elements=[PostCount.key]).returning(PostCount.key)
+        )
+        if seeded is None:
+            # Another transaction seeded it first, without this write
+            await db.execute(stmt)
+        return
+
+    db.add(PostCount(key=key, count=await db.scalar(count_stmt)))
+    await db.flush()
+
+
+async def _seed_post_count(db: AsyncSession, key: str, count_stmt: Select):
+    """
+    Create a missing counter row from count_stmt and commit it. A write that
+    seeds or bumps the same key concurrently wins the conflict or adds on top.
+    """
+    insert = dialect_insert(db)
+    seed = insert(PostCount).from_select(["key", "count"], select(literal(key, String), count_stmt.scalar_subquery()))
+    await db.execute(seed.on_conflict_do_nothing(index_elements=[PostCount.key]))
+    await db.commit()
+
+
+async def adjust_post_counts(db: AsyncSession, hashtag: str, user_token: str, delta: int):
+    """
+    Move the global, hashtag and user counters by delta.
+    Runs inside the caller's transaction, after the post was added or
+    deleted, so the counts commit (or roll back) together with the post itself.
+    """
+    await _bump(db, GLOBAL_KEY, delta, _count_stmt())
+    await _bump(db, count_key(hashtag=hashtag), delta, _count_stmt(hashtag=hashtag))
+    await _bump(db, count_key(user_token=user_token), delta, _count_stmt(user_token=user_token))
+
+
+async def move_hashtag_count(db: AsyncSession, old_hashtag: str, new_hashtag: str):
+    """Shift one post from one hashtag counter to another, after the post was changed (no commit)"""
+    if old_hashtag == new_hashtag:
+        return
+    await _bump(db, count_key(hashtag=old_hashtag), -1, _count_stmt(hashtag=old_hashtag))
+    await _bump(db, count_key(hashtag=new_hashtag), 1, _count_stmt(hashtag=new_hashtag))
+
+
+async def get_post_count(db: AsyncSession, stmt: Select, hashtag: Optional[str] = None,
+                         user_token: Optional[str] = None, approximate: bool = False) -> int:
+    """
+    Total number of posts for a feed.
+    Reads the maintained counter row; a key without one is seeded from an exact
+    count on first read (read replicas just count stmt's rows and leave seeding to
+    the primary). With approximate=True the value may be served from a per-process
+    cache up to APPROX_COUNT_TTL seconds old.
+    """
+    key = count_key(hashtag=hashtag, user_token=user_token)
+
+    if approximate:
+        with _approx_lock:
+            cached = _approx_cache.get(key)
+        if cached and time.monotonic() - cached[0] < APPROX_COUNT_TTL:
+            return cached[1]
+
+    total = await db.scalar(select(PostCount.count).where(PostCount.key == key))
+    if total is None and db.info.get("read_from", "primary") == "primary" and dialect_insert(db) is not None:
+        await _seed_post_count(db, key, _count_stmt(hashtag=hashtag, user_token=user_token))
+        total = await db.scalar(select(PostCount.count).where(PostCount.key == key))
+    if total is None:
+        total = await db.scalar(select(func.count()).select_from(stmt.subquery()))
+    total = max(total, 0)
+
+    if approximate:
+        with _approx_lock:
+            _approx_cache[key] = (time.monotonic(), total)
+
+    return total
+
+
+def dialect_insert(db):
+    """Dialect insert() with ON CONFLICT support, or None (db: a session or connection)"""
+    dialect = (db.dialect if isinstance(db, Connection) else db.bind.dialect).name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+async def seed_counter(db: AsyncSession, name: str, count_stmt: Select):
+    """Create a named counter from an exact count if it does not exist yet (no commit)"""
+    insert = dialect_insert(db)
+    if insert is not None:
+        stmt = insert(Counter).from_select(
+            ["name", "value"],
+            select(literal(name, String), count_stmt.scalar_subquery()),
+        )
+        await db.execute(stmt.on_conflict_do_nothing(index_elements=[Counter.name]))
+        return
+
+    if await db.get(Counter, name) is None:
+        db.add(Counter(name=name, value=await db.scalar(count_stmt)))
+        await db.flush()
+
+
+async def increment_counter(db: AsyncSession, name: str, count_stmt: Select) -> int:
+    """Atomically add one to a named counter and return the new value (no commit)"""
+    stmt = update(Counter).where(Counter.name == name).values(value=Counter.value + 1).returning(Counter.value)
+    value = await db.scalar(stmt)
+    if value is None:
+        # First use: start from the rows that already exist
+        await seed_counter(db, name, count_stmt)
+        value = await db.scalar(stmt)
+    return value
+
+
+async def read_counter(db: AsyncSession, name: str, count_stmt: Select) -> int:
+    """Current value of a named counter, seeding it on first read"""
+    value = await db.scalar(select(Counter.value).where(Counter.name == name))
+    if value is None and db.info.get("read_from", "primary") != "primary":
+        # Read replica session (get_read_db): count, and leave seeding to the primary
+        return await db.scalar(count_stmt)
+    if value is None:
+        await seed_counter(db, name, count_stmt)
+        await db.commit()
+        value = await db.scalar(select(Counter.value).where(Counter.name == name))
+    return value
+
+
+def rebuild_post_counts(db: Session, dry_run: bool = False) -> Dict[str, Tuple[int, int]]:
+    """
+    Recompute every counter from the posts table and repair any drift.
+    Returns {key: (stored, actual)} for every key that was wrong.
+    """
+    if not dry_run and db.bind.dialect.name == "postgresql":
+        # Writers bump counters after changing posts, in the same transaction. Holding
+        # their bumps off until this commits means every concurrent post is either in
+        # the counts below or bumped on top of them, never lost.
+        db.execute(text("LOCK TABLE post_counts IN EXCLUSIVE MODE"))
+    actual: Dict[str, int] = {GLOBAL_KEY: db.query(func.count(Post.id)).scalar() or 0}
+    for hashtag, n in db.query(Post.hashtag, func.count(Post.id)).group_by(Post.hashtag):
+        actual[count_key(hashtag=hashtag)] = n
+    for user_token, n in db.query(Post.user_token, func.count(Post.id)).group_by(Post.user_token):
+        actual[count_key(user_token=user_token)] = n
+
+    stored = {row.key: row.count for row in db.query(PostCount)}
+
+    drift = {}
+    for key in set(actual) | set(stored):
+        if actual.get(key, 0) != stored.get(key):
+            drift[key] = (stored.get(key, 0), actual.get(key, 0))
+
+    if not dry_run and drift:
+        for key, (_, n) in drift.items():
+            row = db.get(PostCount, key)
+            if row is None:
+                db.add(PostCount(key=key, count=n))
+            else:
+                row.count = n
+        db.commit()
+        with _approx_lock:
+            _approx_cache.clear()
+
+    return drift
@@ -0,0 +1,117 @@
+import time
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.counters import dialect_insert
+from app.models.models import FeedVersion
+
+# Changes on every restart; tags that include in-process state carry it
+BOOT_ID = uuid.uuid4().hex[:8]
+
+GLOBAL_FEED = "global"
+# Bumped by bulk changes (imports, retention) that can touch any feed
+ALL_FEEDS = "all"
+
+
+def feed_key(hashtag: Optional[str] = None) -> str:
+    return f"hashtag:{hashtag}" if hashtag else GLOBAL_FEED
+
+
+class FeedVersions:
+    """
+    Per-feed write counters in the feed_versions table, for version tags every
+    worker agrees on. Writers bump them in the same transaction as the change;
+    None is the global feed, which every write bumps. A feed's version is its
+    own row plus the "all" row.
+    """
+
+    def bump_sync(self, conn: Connection, hashtags: Iterable[Optional[str]]):
+        """Bump the given feeds and the global one (no commit)"""
+        self._bump_keys(conn, sorted({feed_key(hashtag) for hashtag in hashtags} | {GLOBAL_FEED}))
+
+    def bump_all_sync(self, conn: Connection):
+        """Bump every feed at once, for changes whose hashtags aren't known (no commit)"""
+        self._bump_keys(conn, [ALL_FEEDS])
+
+    async def bump(self, db: AsyncSession, hashtags: Iterable[Optional[str]]):
+        hashtags = list(hashtags)
+        await db.run_sync(lambda session: self.bump_sync(session.connection(), hashtags))
+
+    def _bump_keys(self, conn: Connection, keys: List[str]):
+        # Sorted keys, so concurrent writers always lock rows in the same order
+        now = time.time()
+        insert = dialect_insert(conn)
+        for key in keys:
+            if insert is not None:
+                stmt = insert(FeedVersion).values(key=key, version=1, modified=now)
+                conn.execute(stmt.on_conflict_do_update(
+                    index_elements=[FeedVersion.key],
+                    set_={"version": FeedVersion.version + 1, "modified": now},
+                ))
+                continue
+            result = conn.execute(
+                update(FeedVersion).where(FeedVersion.key == key).values(version=FeedVersion.version + 1, modified=now)
+            )
+            if result.rowcount == 0:
+                conn.execute(FeedVersion.__table__.insert().values(key=key, version=1, modified=now))
+
+    async def get(self, db: AsyncSession, hashtag: Optional[str] = None) -> Tuple[int, Optional[float]]:
+        """(write counter, last write time) for a feed; (0, None) before its first write"""
+        rows = (await db.execute(
+            select(FeedVersion.version, FeedVersion.modified).where(FeedVersion.key.in_((feed_key(hashtag), ALL_FEEDS)))
+        )).all()
+        if not rows:
+            return 0, None
+        return sum(row.version for row in rows), max(row.modified for row in rows)
+
+
+feed_versions = FeedVersions()
+
+
+def make_etag(*parts) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def _http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[float] = None) -> Optional[Response]:
+    """
+    Return a 304 response if the client's copy is still current, otherwise None.
+    If-None-Match wins over If-Modified-Since, as in RFC 9110.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: W/"x" matches "x"
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        fresh = "*" in tags or etag.removeprefix("W/") in tags
+    elif last_modified is not None and request.headers.get("if-modified-since"):
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"]).timestamp()
+        except (TypeError, ValueError):
+            return None
+        fresh = int(last_modified) <= since
+    else:
+        return None
+
+    if not fresh:
+        return None
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[float] = None) -> Response:
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = _http_date(last_modified)
+    # Let browsers keep the body but always revalidate it
+    response.headers["Cache-Control"] = "no-cache"
+    return response
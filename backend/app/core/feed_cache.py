@@ -0,0 +1,77 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+FEED_CACHE_TTL = float(os.getenv("FEED_CACHE_TTL", "5"))
+FEED_CACHE_SIZE = int(os.getenv("FEED_CACHE_SIZE", "512"))
+
+
+class FeedCache:
+    """
+    Bounded TTL + LRU cache of serialized feed pages.
+    Callers put the feed's version (from feed_versions) in every key, so a
+    write anywhere - another worker, an import, retention - moves readers on
+    to new keys without any invalidation; superseded pages just age out.
+    Concurrent misses on one key share a single load.
+    """
+
+    def __init__(self, ttl: float = FEED_CACHE_TTL, maxsize: int = FEED_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[float, bytes]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    def _store(self, key: Hashable, value: bytes):
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Return the cached page for key, or run loader once for all concurrent callers"""
+        value = self.get(key)
+        if value is not None:
+            self._stats["hits"] += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        self._stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            self._store(key, value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return dict(self._stats, size=len(self._entries), maxsize=self.maxsize, ttl=self.ttl)
+
+
+feed_cache = FeedCache()
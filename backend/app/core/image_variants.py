@@ -0,0 +1,133 @@
+"""
+Image variant rendering. Runs inside ProcessPoolExecutor workers, so this module
+only imports Pillow and app.core.s3 and must not touch the database.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+
+from app.core.s3 import get_s3_client, public_url
+
+MANIFEST_NAME = "manifest.json"
+
+
+def available_formats(requested: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Drop formats this Pillow build cannot encode (AVIF needs Pillow 11.3+ with libavif)"""
+    return tuple(fmt for fmt in requested if features.check(fmt))
+
+
+def render_variants(data: bytes, widths: Tuple[int, ...], formats: Tuple[str, ...], quality: int) -> List[dict]:
+    """
+    Resize one image to each width (never upscaling) in each format.
+    Returns [{"name", "width", "height", "format", "data"}], smallest first.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        # Let the JPEG decoder downscale while decoding; much cheaper for big photos
+        source.draft("RGB", (max(widths), max(widths)))
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+    variants = []
+    seen_widths = set()
+    for width in sorted(widths):
+        # Widths past the original collapse into one full-size variant
+        width = min(width, image.width)
+        if width in seen_widths:
+            continue
+        seen_widths.add(width)
+        resized = image if width == image.width else image.resize(
+            (width, max(1, round(image.height * width / image.width))), Image.LANCZOS
+        )
+        for fmt in formats:
+            out = io.BytesIO()
+            resized.save(out, format=fmt.upper(), quality=quality)
+            variants.append({
+                "name": f"{width}.{fmt}",
+                "width": resized.width,
+                "height": resized.height,
+                "format": fmt,
+                "data": out.getvalue(),
+            })
+    return variants
+
+
+def _manifest(variants: List[dict], url_prefix: str) -> List[dict]:
+    return [
+        {
+            "url": f"{url_prefix}/{variant['name']}",
+            "width": variant["width"],
+            "height": variant["height"],
+            "format": variant["format"],
+            "bytes": len(variant["data"]),
+        }
+        for variant in variants
+    ]
+
+
+def _write_atomic(path: str, data: bytes):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".variant-")
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(data)
+    os.replace(temp_path, path)
+
+
+def process_local_image(path: str, variants_dir: str, url_prefix: str, widths: Tuple[int, ...],
+                        formats: Tuple[str, ...], quality: int) -> dict:
+    """
+    Build variants for a file in uploads/. Output lives under variants_dir/<sha256>/,
+    so an image uploaded twice is only processed once.
+    """
+    with open(path, "rb") as handle:
+        data = handle.read()
+    digest = hashlib.sha256(data).hexdigest()
+    target = os.path.join(variants_dir, digest)
+    manifest_path = os.path.join(target, MANIFEST_NAME)
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as handle:
+            return {"digest": digest, "variants": json.load(handle), "reused": True}
+
+    os.makedirs(target, exist_ok=True)
+    variants = render_variants(data, widths, formats, quality)
+    for variant in variants:
+        _write_atomic(os.path.join(target, variant["name"]), variant["data"])
+    manifest = _manifest(variants, f"{url_prefix}/{digest}")
+    # Written last: its presence means every variant is in place
+    _write_atomic(manifest_path, json.dumps(manifest).encode())
+    return {"digest": digest, "variants": manifest, "reused": False}
+
+
+def process_s3_image(bucket: str, key: str, region: Optional[str], variants_prefix: str,
+                     widths: Tuple[int, ...], formats: Tuple[str, ...], quality: int) -> dict:
+    """Same as process_local_image for an object uploaded straight to S3 with a presigned URL"""
+    # One client per worker process, reused across jobs
+    s3 = get_s3_client()
+    data = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+    digest = hashlib.sha256(data).hexdigest()
+    prefix = f"{variants_prefix}/{digest}"
+    url_prefix = public_url(bucket, prefix, region)
+
+    try:
+        existing = s3.get_object(Bucket=bucket, Key=f"{prefix}/{MANIFEST_NAME}")["Body"].read()
+        return {"digest": digest, "variants": json.loads(existing), "reused": True}
+    except s3.exceptions.NoSuchKey:
+        pass
+
+    variants = render_variants(data, widths, formats, quality)
+    for variant in variants:
+        s3.put_object(
+            Bucket=bucket,
+            Key=f"{prefix}/{variant['name']}",
+            Body=variant["data"],
+            ContentType=f"image/{variant['format']}",
+            CacheControl="public, max-age=31536000, immutable",
+        )
+    manifest = _manifest(variants, url_prefix)
+    s3.put_object(Bucket=bucket, Key=f"{prefix}/{MANIFEST_NAME}", Body=json.dumps(manifest).encode(),
+                  ContentType="application/json")
+    return {"digest": digest, "variants": manifest, "reused": False}
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Set
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.core.etag import feed_versions
+from app.core.image_variants import available_formats, process_local_image, process_s3_image
+from app.core.uploads import UPLOAD_DIR
+from app.models.models import ImageAsset, Post
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PIPELINE = os.getenv("IMAGE_PIPELINE", "1").lower() in ("1", "true", "yes")
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_VARIANT_WIDTHS = tuple(int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1080").split(","))
+# AVIF is skipped automatically when Pillow can't encode it
+IMAGE_FORMATS = tuple(os.getenv("IMAGE_FORMATS", "avif,webp").split(","))
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "70"))
+
+VARIANTS_DIR = os.path.join(UPLOAD_DIR, "variants")
+VARIANTS_URL = "/uploads/variants"
+S3_VARIANTS_PREFIX = "variants"
+
+_S3_URL = re.compile(r"^https://(?P<bucket>[^./]+)\.s3\.(?P<region>[^./]+)\.amazonaws\.com/(?P<key>.+)$")
+
+
+class ImagePipeline:
+    """
+    Builds resized WebP/AVIF variants of uploaded images on a process pool.
+    Jobs are keyed by image_url so each image is only queued once per process;
+    variants themselves are stored by content hash, so identical images are
+    rendered once even under different URLs.
+    """
+
+    def __init__(self, workers: int = IMAGE_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._formats = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {"processed": 0, "reused": 0, "failed": 0, "total_ms": 0.0}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the API process has threads and an event loop running
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            self._formats = available_formats(IMAGE_FORMATS)
+        return self._executor
+
+    def _job(self, image_url: str):
+        """(function, args) that renders variants for image_url, or None if it isn't ours"""
+        if image_url.startswith("/uploads/") and not image_url.startswith(VARIANTS_URL + "/"):
+            path = os.path.join(UPLOAD_DIR, os.path.basename(image_url))
+            return process_local_image, (path, VARIANTS_DIR, VARIANTS_URL,
+                                         IMAGE_VARIANT_WIDTHS, self._formats, IMAGE_QUALITY)
+        match = _S3_URL.match(image_url)
+        if match and match["bucket"] == os.getenv("S3_BUCKET_NAME") and not match["key"].startswith(S3_VARIANTS_PREFIX + "/"):
+            return process_s3_image, (match["bucket"], match["key"], match["region"], S3_VARIANTS_PREFIX,
+                                      IMAGE_VARIANT_WIDTHS, self._formats, IMAGE_QUALITY)
+        return None
+
+    def schedule(self, image_url: Optional[str]):
+        """Queue variant generation for an image; no-op if it is already queued or not ours"""
+        if not IMAGE_PIPELINE or not image_url or image_url in self._inflight:
+            return
+        self._pool()
+        job = self._job(image_url)
+        if job is None:
+            return
+        task = asyncio.get_running_loop().create_task(self._process(image_url, *job))
+        self._inflight[image_url] = task
+        task.add_done_callback(lambda _: self._inflight.pop(image_url, None))
+
+    async def _process(self, image_url: str, fn, args):
+        start = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+            async with AsyncSessionLocal() as db:
+                await db.merge(ImageAsset(source_url=image_url, digest=result["digest"], variants=result["variants"]))
+                hashtags: Set[str] = set((await db.scalars(
+                    select(Post.hashtag).where(Post.image_url == image_url).distinct()
+                )).all())
+                if hashtags:
+                    # Posts already showing this image now have variants to return
+                    await feed_versions.bump(db, hashtags)
+                await db.commit()
+        except Exception:
+            self._stats["failed"] += 1
+            logger.exception("Building image variants for %s failed", image_url)
+            return
+
+        self._stats["reused" if result["reused"] else "processed"] += 1
+        self._stats["total_ms"] += (time.perf_counter() - start) * 1000
+
+    def shutdown(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        total_ms = stats.pop("total_ms")
+        done = stats["processed"] + stats["reused"]
+        stats["avg_ms"] = total_ms / done if done else 0.0
+        stats["pending"] = len(self._inflight)
+        stats["formats"] = list(self._formats or ())
+        stats["enabled"] = IMAGE_PIPELINE
+        return stats
+
+
+image_pipeline = ImagePipeline()
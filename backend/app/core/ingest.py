@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import case, func, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.counters import SCANS_COUNTER, SCAN_COUNT_STMT, read_counter, seed_counter
+from app.core.database import AsyncSessionLocal
+from app.models.models import Counter, ScanTracker, WildThought
+
+logger = logging.getLogger(__name__)
+
+# Batched ingestion is opt-in: INGEST_BATCHED=1
+INGEST_BATCHED = os.getenv("INGEST_BATCHED", "0").lower() in ("1", "true", "yes")
+INGEST_MAX_BATCH = int(os.getenv("INGEST_MAX_BATCH", "500"))
+INGEST_FLUSH_INTERVAL_MS = int(os.getenv("INGEST_FLUSH_INTERVAL_MS", "200"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "10000"))
+# How long a request waits for queue space before it is turned away
+INGEST_PUT_TIMEOUT = float(os.getenv("INGEST_PUT_TIMEOUT", "2"))
+# Counter row holding the last reserved wild-thought id (non-Postgres backends)
+WILD_THOUGHT_IDS = "wild_thought_ids"
+
+
+class IngestQueueFull(Exception):
+    """The ingestion queue stayed full for longer than the put timeout"""
+
+
+class BatchIngestor:
+    """
+    Bounded write-behind queue for insert-only tables.
+    Rows are written as one multi-row INSERT once max_batch rows are queued or
+    flush_interval_ms after the first one arrived, whichever comes first.
+    A full queue makes callers wait (backpressure) and then raises IngestQueueFull.
+    """
+
+    def __init__(self, name: str, model, max_batch: int = INGEST_MAX_BATCH,
+                 flush_interval_ms: int = INGEST_FLUSH_INTERVAL_MS, queue_size: int = INGEST_QUEUE_SIZE,
+                 put_timeout: float = INGEST_PUT_TIMEOUT, session_factory=AsyncSessionLocal):
+        self.name = name
+        self.model = model
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval_ms / 1000
+        self.queue_size = queue_size
+        self.put_timeout = put_timeout
+        self.session_factory = session_factory
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Rows taken off the queue by the flusher but not yet written
+        self._batch: List[dict] = []
+        self._flushing = False
+        self._closing = False
+
+        self._stats = {
+            "flushes": 0,
+            "flush_failures": 0,
+            "rows_flushed": 0,
+            "rows_rejected": 0,
+            "rows_dropped": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+        }
+
+    @property
+    def pending(self) -> int:
+        return len(self._batch) + (self._queue.qsize() if self._queue else 0)
+
+    async def put(self, row: dict):
+        """Queue one row; waits up to put_timeout for space"""
+        if self._queue is None:
+            raise RuntimeError(f"{self.name} ingestor is not running")
+        # Stamp the row now - it may reach the database a flush interval later
+        row.setdefault("created_at", datetime.now(timezone.utc))
+        try:
+            await asyncio.wait_for(self._queue.put(row), self.put_timeout)
+        except asyncio.TimeoutError:
+            self._stats["rows_rejected"] += 1
+            raise IngestQueueFull(f"{self.name} ingestion queue is full")
+        if self.pending >= self.max_batch:
+            self._wake.set()
+
+    async def _collect(self):
+        """Block for the first row, then collect more until the batch is full or the interval ends"""
+        self._batch.append(await self._queue.get())
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            while len(self._batch) < self.max_batch and not self._queue.empty():
+                self._batch.append(self._queue.get_nowait())
+            remaining = deadline - time.monotonic()
+            if len(self._batch) >= self.max_batch or remaining <= 0:
+                return
+            # Waiting on an event rather than queue.get() so a timeout never loses a row
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _before_commit(self, db: AsyncSession, rows: List[dict]):
+        """Hook for work that must commit atomically with the inserted rows"""
+
+    async def _write(self, rows: List[dict]) -> bool:
+        start = time.perf_counter()
+        async with self.session_factory() as db:
+            try:
+                # insert().values(list) renders a single INSERT ... VALUES (...), (...)
+                await db.execute(insert(self.model).values(rows))
+                await self._before_commit(db, rows)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                self._stats["flush_failures"] += 1
+                logger.exception("%s ingest flush of %d rows failed", self.name, len(rows))
+                return False
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._stats["flushes"] += 1
+        self._stats["rows_flushed"] += len(rows)
+        self._stats["last_flush_ms"] = elapsed_ms
+        self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+        self._stats["total_flush_ms"] += elapsed_ms
+        self._stats["last_batch_size"] = len(rows)
+        self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(rows))
+        return True
+
+    async def _flush(self, rows: List[dict]):
+        # One retry, then give up on the batch rather than wedge the queue behind it
+        if not await self._write(rows) and not await self._write(rows):
+            self._stats["rows_dropped"] += len(rows)
+            logger.error("Dropping %d %s rows after repeated flush failures", len(rows), self.name)
+
+    async def _run(self):
+        while not self._closing:
+            await self._collect()
+            rows, self._batch = self._batch, []
+            self._flushing = True
+            try:
+                await self._flush(rows)
+            finally:
+                self._flushing = False
+
+    def start(self):
+        """Start the flusher on the running event loop"""
+        if self._task and not self._task.done():
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._wake = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.get_running_loop().create_task(self._run(), name=f"{self.name}-ingest")
+
+    async def stop(self):
+        """Stop the flusher and drain everything still queued"""
+        self._closing = True
+        if self._task:
+            # Only interrupt the flusher while it waits for rows, never mid-write
+            if not self._flushing:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is None:
+            return
+        rows, self._batch = self._batch, []
+        while not self._queue.empty():
+            rows.append(self._queue.get_nowait())
+        for i in range(0, len(rows), self.max_batch):
+            await self._flush(rows[i:i + self.max_batch])
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        total_flush_ms = stats.pop("total_flush_ms")
+        stats["avg_flush_ms"] = total_flush_ms / stats["flushes"] if stats["flushes"] else 0.0
+        # Everything still queued is what a crash right now would lose
+        stats["pending_rows"] = self.pending
+        stats["queue_size"] = self.queue_size
+        stats["enabled"] = INGEST_BATCHED
+        return stats
+
+
+class ScanIngestor(BatchIngestor):
+    """
+    Batched scan inserts that still hand out scan positions straight away.
+    Positions come from the last known scans counter plus the scans queued
+    since; each flush adds its row count to the counter in the same transaction
+    as the insert. A position whose scan is turned away or dropped is skipped,
+    never reused: positions stay unique but may skip numbers, so the latest
+    position can run ahead of the row count. Positions are exact with a single
+    API process.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__("scans", ScanTracker, **kwargs)
+        self._position: Optional[int] = None
+        self._position_lock = asyncio.Lock()
+
+    @property
+    def position(self) -> Optional[int]:
+        """Latest position handed out, queued scans included (None until the first read)"""
+        return self._position
+
+    async def next_position(self, db: AsyncSession) -> int:
+        async with self._position_lock:
+            if self._position is None:
+                self._position = await read_counter(db, SCANS_COUNTER, SCAN_COUNT_STMT)
+            self._position += 1
+            return self._position
+
+    async def _before_commit(self, db: AsyncSession, rows: List[dict]):
+        value = await db.scalar(
+            update(Counter)
+            .where(Counter.name == SCANS_COUNTER)
+            .values(value=Counter.value + len(rows))
+            .returning(Counter.value)
+        )
+        if value is not None and self._position is not None:
+            # Another writer may have moved the counter; never hand out a position twice
+            self._position = max(self._position, value + self.pending)
+
+
+class WildThoughtIngestor(BatchIngestor):
+    """
+    Batched wild-thought inserts with ids reserved up front, so the API can
+    still return each thought's id: from the table's sequence on Postgres
+    (no lock, no commit), otherwise from a counter row kept above max(id).
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__("wild_thoughts", WildThought, **kwargs)
+
+    async def next_id(self, db: AsyncSession) -> int:
+        if db.bind.dialect.name == "postgresql":
+            return await db.scalar(text("SELECT nextval(pg_get_serial_sequence('wild_thoughts', 'id'))"))
+        max_id = select(func.coalesce(func.max(WildThought.id), 0)).scalar_subquery()
+        # Never below max(id), in case rows were inserted while batching was off
+        stmt = (
+            update(Counter)
+            .where(Counter.name == WILD_THOUGHT_IDS)
+            .values(value=case((Counter.value > max_id, Counter.value), else_=max_id) + 1)
+            .returning(Counter.value)
+        )
+        value = await db.scalar(stmt)
+        if value is None:
+            await seed_counter(db, WILD_THOUGHT_IDS, select(func.coalesce(func.max(WildThought.id), 0)))
+            value = await db.scalar(stmt)
+        await db.commit()
+        return value
+
+
+scan_ingestor = ScanIngestor()
+wild_thought_ingestor = WildThoughtIngestor()
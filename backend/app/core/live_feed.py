@@ -0,0 +1,258 @@
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# How many recent events are kept for clients resuming with Last-Event-ID
+LIVE_FEED_HISTORY = int(os.getenv("LIVE_FEED_HISTORY", "1000"))
+# Events a slow client may fall behind by before it is disconnected (it can resume)
+LIVE_FEED_QUEUE_SIZE = int(os.getenv("LIVE_FEED_QUEUE_SIZE", "256"))
+LIVE_FEED_HEARTBEAT_SECONDS = 15
+# Share events between API workers through Postgres LISTEN/NOTIFY (ignored on other databases)
+LIVE_FEED_RELAY = os.getenv("LIVE_FEED_RELAY", "1").lower() in ("1", "true", "yes")
+LIVE_FEED_CHANNEL = "live_feed"
+# NOTIFY payloads must stay under 8000 bytes; bigger events go through the live_feed_events table
+_NOTIFY_BYTES = 7900
+
+
+class _Subscriber:
+    def __init__(self, hashtag: Optional[str]):
+        self.hashtag = hashtag
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=LIVE_FEED_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class LiveFeedHub:
+    """
+    Fan-out for feed changes.
+    Write endpoints publish post_created / post_updated / post_deleted / post_reacted
+    events once; every open stream (global or one hashtag) gets them from its own
+    queue. Recent events are kept so a reconnecting client can resume from its
+    Last-Event-ID.
+
+    On Postgres, start() relays events through LISTEN/NOTIFY on one dedicated
+    connection per worker: published events are NOTIFYed with an id from the
+    live_feed_events sequence, and every worker (the publisher included)
+    delivers what it hears, so all workers stream the same events under the
+    same ids. Events too big for a NOTIFY payload are stored in live_feed_events
+    and only their id is sent. After (re)connecting a worker starts its history
+    over, so clients resuming across the gap get a reset instead of missing
+    events. Without the relay, events stay in the publishing process.
+    """
+
+    def __init__(self, history: int = LIVE_FEED_HISTORY):
+        self._last_id = 0
+        self._history: deque = deque(maxlen=history)
+        self._subscribers: Set[_Subscriber] = set()
+        self._dsn: Optional[str] = None
+        # Events waiting to be NOTIFYed; None while not relaying
+        self._outbox: Optional[asyncio.Queue] = None
+        self._conn = None
+        self._conn_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._fetches: Set[asyncio.Task] = set()
+        self._stats = {"published": 0, "relayed": 0, "relay_dropped": 0, "relay_errors": 0, "connects": 0}
+
+    @property
+    def last_event_id(self) -> int:
+        return self._last_id
+
+    def publish(self, event: str, data: Dict[str, Any], hashtags: Iterable[str]):
+        """Send an event to every subscriber of the global feed or one of hashtags"""
+        message = {"event": event, "hashtags": sorted(h for h in hashtags if h), "data": json.dumps(data, default=str)}
+        self._stats["published"] += 1
+        if self._outbox is not None:
+            # Delivered here too once it comes back from the channel
+            try:
+                self._outbox.put_nowait(message)
+            except asyncio.QueueFull:
+                self._stats["relay_dropped"] += 1
+            return
+        self._deliver(self._last_id + 1, message)
+
+    def _deliver(self, event_id: int, message: dict):
+        entry = {
+            "id": event_id,
+            "event": message["event"],
+            "hashtags": frozenset(message["hashtags"]),
+            "data": message["data"],
+        }
+        self._last_id = max(self._last_id, event_id)
+        self._history.append(entry)
+
+        for subscriber in list(self._subscribers):
+            if not self._matches(subscriber.hashtag, entry):
+                continue
+            try:
+                subscriber.queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                # Cut the slow client loose; it will reconnect and replay from history
+                subscriber.overflowed = True
+                self._subscribers.discard(subscriber)
+
+    @staticmethod
+    def _matches(hashtag: Optional[str], entry: dict) -> bool:
+        return hashtag is None or hashtag in entry["hashtags"]
+
+    @staticmethod
+    def _format(entry: dict) -> str:
+        return f"id: {entry['id']}\nevent: {entry['event']}\ndata: {entry['data']}\n\n"
+
+    def _replay(self, hashtag: Optional[str], last_event_id: int):
+        if last_event_id == self.last_event_id:
+            return []
+        oldest = self._history[0]["id"] if self._history else self._last_id + 1
+        if last_event_id < oldest - 1 or last_event_id > self.last_event_id:
+            # Too far behind, or ids from before a restart: the client must refetch
+            return None
+        return [e for e in self._history if e["id"] > last_event_id and self._matches(hashtag, e)]
+
+    async def stream(self, request, hashtag: Optional[str] = None,
+                     last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+        """Server-Sent Events stream for one client"""
+        subscriber = _Subscriber(hashtag)
+        self._subscribers.add(subscriber)
+        try:
+            yield "retry: 3000\n\n"
+
+            seen = 0
+            if last_event_id is not None:
+                missed = self._replay(hashtag, last_event_id)
+                if missed is None:
+                    yield f"id: {self.last_event_id}\nevent: reset\ndata: {{}}\n\n"
+                else:
+                    for entry in missed:
+                        yield self._format(entry)
+                    seen = missed[-1]["id"] if missed else last_event_id
+
+            while not subscriber.overflowed:
+                try:
+                    entry = await asyncio.wait_for(subscriber.queue.get(), LIVE_FEED_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                # Already sent as part of the replay
+                if entry["id"] <= seen:
+                    continue
+                yield self._format(entry)
+        finally:
+            self._subscribers.discard(subscriber)
+
+    async def _connect(self):
+        import asyncpg
+
+        conn = await asyncpg.connect(self._dsn)
+        try:
+            # Whatever was sent while this worker wasn't listening is missing from its history
+            self._history.clear()
+            await conn.add_listener(LIVE_FEED_CHANNEL, self._on_notify)
+            last = await conn.fetchval(
+                "SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM live_feed_events_id_seq"
+            )
+        except BaseException:
+            conn.terminate()
+            raise
+        self._last_id = max(self._last_id, last)
+        self._stats["connects"] += 1
+        return conn
+
+    def _on_notify(self, conn, pid: int, channel: str, payload: str):
+        event_id, _, body = payload.partition(" ")
+        if body:
+            self._deliver(int(event_id), json.loads(body))
+            return
+        task = asyncio.get_running_loop().create_task(self._fetch(int(event_id)))
+        self._fetches.add(task)
+        task.add_done_callback(self._fetches.discard)
+
+    async def _fetch(self, event_id: int):
+        """Deliver an event that was too big to NOTIFY"""
+        try:
+            async with self._conn_lock:
+                body = await self._conn.fetchval("SELECT payload FROM live_feed_events WHERE id = $1", event_id)
+        except Exception:
+            logger.exception("Reading live feed event %d failed", event_id)
+            return
+        if body:
+            self._deliver(event_id, json.loads(body))
+
+    async def _send(self, message: dict):
+        body = json.dumps(message, separators=(",", ":"))
+        async with self._conn_lock:
+            if len(body.encode()) <= _NOTIFY_BYTES:
+                await self._conn.execute(
+                    "SELECT pg_notify($1, nextval('live_feed_events_id_seq')::text || ' ' || $2)",
+                    LIVE_FEED_CHANNEL, body,
+                )
+            else:
+                async with self._conn.transaction():
+                    event_id = await self._conn.fetchval(
+                        "INSERT INTO live_feed_events (payload) VALUES ($1) RETURNING id", body
+                    )
+                    await self._conn.execute("DELETE FROM live_feed_events WHERE created_at < now() - interval '1 hour'")
+                    # Sent on commit, so listeners can already read the row
+                    await self._conn.execute("SELECT pg_notify($1, $2)", LIVE_FEED_CHANNEL, str(event_id))
+        self._stats["relayed"] += 1
+
+    async def _run(self):
+        message = None
+        while True:
+            try:
+                if self._conn is None or self._conn.is_closed():
+                    self._conn = await self._connect()
+                if message is None:
+                    try:
+                        message = await asyncio.wait_for(self._outbox.get(), LIVE_FEED_HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        # Notice a dropped connection even while this worker has nothing to send
+                        async with self._conn_lock:
+                            await self._conn.execute("SELECT 1")
+                        continue
+                await self._send(message)
+                message = None
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._stats["relay_errors"] += 1
+                logger.exception("Live feed relay failed; reconnecting")
+                if self._conn is not None:
+                    self._conn.terminate()
+                    self._conn = None
+                await asyncio.sleep(1)
+
+    def start(self, url):
+        """Relay events through the Postgres database at url (a SQLAlchemy URL)"""
+        self._dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._outbox = asyncio.Queue(maxsize=LIVE_FEED_HISTORY)
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="live-feed-relay")
+
+    async def stop(self):
+        self._outbox = None
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    def stats(self) -> dict:
+        return dict(
+            self._stats,
+            relay=self._task is not None,
+            subscribers=len(self._subscribers),
+            last_event_id=self.last_event_id,
+            history=len(self._history),
+        )
+
+
+live_feed = LiveFeedHub()
@@ -0,0 +1,209 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds in milliseconds; the last bucket catches everything slower
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+
+class Histogram:
+    """Fixed-bucket histogram, cheap enough to update on every request"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (self.max,), self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            # Cumulative, Prometheus style: le_<x> counts every observation <= x
+            buckets = {}
+            seen = 0
+            for bound, n in zip(self.buckets, self.counts):
+                seen += n
+                buckets[f"le_{bound}"] = seen
+            buckets["le_inf"] = self.count
+            return {
+                "count": self.count,
+                "sum": round(self.sum, 3),
+                "avg": round(self.sum / self.count, 3) if self.count else 0.0,
+                "max": round(self.max, 3),
+                "p50": round(self.quantile(0.5), 3),
+                "p95": round(self.quantile(0.95), 3),
+                "p99": round(self.quantile(0.99), 3),
+                "buckets": buckets,
+            }
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_ms", "pool_wait_ms")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.pool_wait_ms = 0.0
+
+
+# Set by MetricsMiddleware for the lifetime of one request
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class Metrics:
+    def __init__(self):
+        self.route_latency: Dict[str, Histogram] = defaultdict(Histogram)
+        self.route_queries: Dict[str, Histogram] = defaultdict(lambda: Histogram(COUNT_BUCKETS))
+        self.route_db_time: Dict[str, Histogram] = defaultdict(Histogram)
+        self.route_pool_wait: Dict[str, Histogram] = defaultdict(Histogram)
+        self.query_latency = Histogram()
+        self.pool_wait = Histogram()
+
+    def snapshot(self) -> dict:
+        return {
+            "routes": {
+                route: {
+                    "latency_ms": self.route_latency[route].snapshot(),
+                    "queries_per_request": self.route_queries[route].snapshot(),
+                    "db_time_ms": self.route_db_time[route].snapshot(),
+                    "pool_wait_ms": self.route_pool_wait[route].snapshot(),
+                }
+                for route in sorted(self.route_latency)
+            },
+            "query_latency_ms": self.query_latency.snapshot(),
+            "pool_checkout_wait_ms": self.pool_wait.snapshot(),
+        }
+
+
+metrics = Metrics()
+
+
+def _record_pool_wait(elapsed_ms: float):
+    metrics.pool_wait.observe(elapsed_ms)
+    stats = _current_request.get()
+    if stats is not None:
+        stats.pool_wait_ms += elapsed_ms
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _record_pool_wait((time.perf_counter() - start) * 1000)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _record_pool_wait((time.perf_counter() - start) * 1000)
+
+
+def instrument_engine(sync_engine):
+    """Time every statement run on an engine (pass async_engine.sync_engine for async)"""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        metrics.query_latency.observe(elapsed_ms)
+        stats = _current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_ms += elapsed_ms
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        # Keep the start-time stack balanced when a statement fails
+        starts = context.connection.info.get("query_start") if context.connection else None
+        if starts:
+            starts.pop()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, query count and DB time per route.
+    Streaming (text/event-stream) responses are left out of the latency numbers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        start = time.perf_counter()
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal streaming
+            if message["type"] == "http.response.start":
+                for name, value in message.get("headers", ()):
+                    if name == b"content-type" and value.startswith(b"text/event-stream"):
+                        streaming = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            route = scope.get("route")
+            if route is not None and not streaming:
+                key = f"{scope['method']} {route.path}"
+                metrics.route_latency[key].observe((time.perf_counter() - start) * 1000)
+                metrics.route_queries[key].observe(stats.queries)
+                metrics.route_db_time[key].observe(stats.db_ms)
+                metrics.route_pool_wait[key].observe(stats.pool_wait_ms)
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    return status
@@ -0,0 +1,78 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, func, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Post
+
+SQLITE_SEEK_FORMAT = "%Y-%m-%d %H:%M:%f"
+
+
+def encode_cursor(created_at: datetime, post_id: int) -> str:
+    """Build an opaque cursor from the (created_at, id) of the last post on a page"""
+    raw = json.dumps([created_at.isoformat(), post_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Turn an opaque cursor back into (created_at, id), or raise a 400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, post_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_statement(stmt: Select, dialect: str, limit: int, page: int = 1,
+                   cursor: Optional[str] = None) -> Select:
+    """
+    Add the newest-first ordering, keyset seek (or OFFSET) and limit + 1 to a
+    select over posts. Ordered by (created_at DESC, id DESC) to match the feed indexes.
+    """
+    if cursor:
+        created_at, post_id = decode_cursor(cursor)
+        if dialect == "sqlite":
+            # SQLite stores server-default timestamps without microseconds, so compare
+            # both sides in one normalized text format instead of the raw strings
+            column = func.strftime(SQLITE_SEEK_FORMAT, Post.created_at)
+            value = created_at.strftime("%Y-%m-%d %H:%M:%S.") + f"{created_at.microsecond // 1000:03d}"
+            stmt = stmt.where(
+                or_(
+                    column < value,
+                    and_(column == value, Post.id < post_id),
+                )
+            )
+        else:
+            # Row comparison, so the planner can start the index scan at the cursor
+            stmt = stmt.where(tuple_(Post.created_at, Post.id) < tuple_(created_at, post_id))
+
+    stmt = stmt.order_by(Post.created_at.desc(), Post.id.desc())
+    if not cursor:
+        stmt = stmt.offset((page - 1) * limit)
+
+    # One extra row so we know whether there is a next page
+    return stmt.limit(limit + 1)
+
+
+async def paginate_rows(db: AsyncSession, stmt: Select, limit: int, page: int = 1,
+                        cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+    """
+    Fetch one newest-first page of rows for a select over posts (e.g. feed_select()).
+    With a cursor this is a keyset seek on (created_at, id), so every page costs
+    the same no matter how deep it is. Without one it falls back to OFFSET paging.
+    Returns the rows and the cursor for the next page (None on the last page).
+    """
+    stmt = page_statement(stmt, db.bind.dialect.name, limit, page, cursor)
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return rows, next_cursor
@@ -0,0 +1,107 @@
+import os
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+# Tables range-partitioned by month on created_at (Postgres only, see alembic 0005)
+PARTITIONED_TABLES = ("posts", "scan_tracker")
+# Monthly partitions kept ready past the current month
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+_PARTITION_NAME = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def month_start(value: datetime) -> datetime:
+    """First instant of value's month, in UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, n: int) -> datetime:
+    years, index = divmod(month.month - 1 + n, 12)
+    return month.replace(year=month.year + years, month=index + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def default_partition(table: str) -> str:
+    return f"{table}_default"
+
+
+def _bound(month: datetime) -> str:
+    return f"'{month:%Y-%m-%d} 00:00:00+00'"
+
+
+def is_partitioned(conn, table: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.scalar(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": table},
+    ))
+
+
+def list_partitions(conn, table: str) -> Dict[datetime, str]:
+    """Monthly partitions of table by the month they hold (the default one excluded)"""
+    names = conn.scalars(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table)"
+        ),
+        {"table": table},
+    )
+    partitions = {}
+    for name in names:
+        match = _PARTITION_NAME.search(name)
+        if match:
+            partitions[datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)] = name
+    return partitions
+
+
+def create_partition(conn, table: str, month: datetime) -> str:
+    """
+    Add the partition for one month. Rows that already landed in the default
+    partition for that month are moved into it first, since ATTACH refuses to
+    leave overlapping rows behind in the default.
+    """
+    name = partition_name(table, month)
+    upper = add_months(month, 1)
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {default_partition(table)} "
+            f"WHERE created_at >= :lower AND created_at < :upper RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"lower": month, "upper": upper},
+    )
+    conn.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ({_bound(month)}) TO ({_bound(upper)})"
+    ))
+    return name
+
+
+def ensure_partitions(conn, table: str, first: Optional[datetime] = None,
+                      months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """Create any missing monthly partitions from first (default: this month) to months_ahead out"""
+    current = month_start(datetime.now(timezone.utc))
+    month = month_start(first) if first else current
+    existing = list_partitions(conn, table)
+    created = []
+    while month <= add_months(current, months_ahead):
+        if month not in existing:
+            created.append(create_partition(conn, table, month))
+        month = add_months(month, 1)
+    return created
+
+
+def drop_partition(conn, table: str, name: str):
+    """Detach and drop one partition: frees its heap and indexes without a DELETE"""
+    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+    conn.execute(text(f"DROP TABLE {name}"))
@@ -0,0 +1,344 @@
+import hashlib
+import logging
+import math
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+logger = logging.getLogger(__name__)
+
+# Only switched off for load tests (benchmarks/load_test.py)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1").lower() in ("1", "true", "yes")
+# shm or sqlite (shared by every worker on the host), redis (shared by hosts), memory (per process)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "shm").lower()
+# tmpfs when available: buckets survive API restarts but never touch the disk
+_STATE_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+RATE_LIMIT_SHM_PATH = os.getenv("RATE_LIMIT_SHM_PATH") or os.path.join(_STATE_DIR, "dumps-rate-limit.buckets")
+# Buckets the shm table holds (40 bytes each); only matters with that many distinct clients
+RATE_LIMIT_SHM_SLOTS = int(os.getenv("RATE_LIMIT_SHM_SLOTS", "262144"))
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH") or os.path.join(_STATE_DIR, "dumps-rate-limit.db")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_LIMIT = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+
+def parse_limit(limit: str) -> Tuple[int, float]:
+    """'20/hour', '5 per 15 minutes' -> (bucket capacity, tokens refilled per second)"""
+    match = _LIMIT.match(limit.lower())
+    if not match:
+        raise ValueError(f"Invalid rate limit {limit!r}")
+    count, multiplier, period = match.groups()
+    seconds = int(multiplier or 1) * _PERIODS[period]
+    return int(count), int(count) / seconds
+
+
+class MemoryBackend:
+    """Buckets in this process only; limits multiply with the worker count"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> [tokens, updated_at, capacity, rate]
+        self._buckets: Dict[str, List[float]] = {}
+        self._calls = 0
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> Tuple[bool, float]:
+        now = time.time()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            tokens = capacity if bucket is None else min(capacity, bucket[0] + max(0.0, now - bucket[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = [tokens, now, capacity, rate]
+            self._calls += 1
+            if self._calls % 10000 == 0:
+                # Drop buckets that have refilled completely; they equal a missing one
+                self._buckets = {
+                    k: b for k, b in self._buckets.items() if b[0] + (now - b[1]) * b[3] < b[2]
+                }
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def close(self):
+        pass
+
+
+class SharedMemoryBackend:
+    """
+    Open-addressing hash table of buckets in an mmap'd file (on /dev/shm by
+    default) shared by every worker process on the host. An flock around each
+    read-modify-write makes checks atomic across processes; a check is two
+    syscalls and a few struct reads. If a key's probe run is full, the bucket
+    nearest to refilled is recycled, which forgives at most that bucket's debt.
+    """
+
+    name = "shm"
+
+    # key hash, tokens, updated_at, capacity, rate
+    SLOT = struct.Struct("<Qdddd")
+    PROBES = 8
+
+    def __init__(self, path: str = RATE_LIMIT_SHM_PATH, slots: int = RATE_LIMIT_SHM_SLOTS):
+        import fcntl
+        self._flock = fcntl.flock
+        self._lock_ex, self._lock_un = fcntl.LOCK_EX, fcntl.LOCK_UN
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = slots * self.SLOT.size
+        self._flock(self._fd, self._lock_ex)
+        try:
+            # Every worker maps the same size, whichever of them created the file
+            size = max(size, os.fstat(self._fd).st_size)
+            os.ftruncate(self._fd, size)
+        finally:
+            self._flock(self._fd, self._lock_un)
+        self.slots = size // self.SLOT.size
+        self._map = mmap.mmap(self._fd, size)
+        # flock does not exclude threads sharing this descriptor
+        self._lock = threading.Lock()
+
+    def _slot(self, key_hash: int, now: float) -> Tuple[int, bool]:
+        """(offset, found) for key_hash; an empty or recycled slot if not present"""
+        unpack_from, size = self.SLOT.unpack_from, self.SLOT.size
+        victim, victim_surplus = None, -math.inf
+        for probe in range(self.PROBES):
+            offset = (key_hash + probe) % self.slots * size
+            stored_hash, tokens, updated_at, capacity, rate = unpack_from(self._map, offset)
+            if stored_hash == key_hash:
+                return offset, True
+            if stored_hash == 0:
+                return offset, False
+            surplus = tokens + (now - updated_at) * rate - capacity
+            if surplus > victim_surplus:
+                victim, victim_surplus = offset, surplus
+        return victim, False
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> Tuple[bool, float]:
+        # Stable across processes, unlike hash(); 0 marks an empty slot
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        now = time.time()
+        with self._lock:
+            self._flock(self._fd, self._lock_ex)
+            try:
+                offset, found = self._slot(key_hash, now)
+                if found:
+                    _, tokens, updated_at, _, _ = self.SLOT.unpack_from(self._map, offset)
+                    tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+                else:
+                    tokens = capacity
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                self.SLOT.pack_into(self._map, offset, key_hash, tokens, now, capacity, rate)
+            finally:
+                self._flock(self._fd, self._lock_un)
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+class SQLiteBackend:
+    """
+    Buckets in one SQLite file shared by every worker process on the host.
+    Each check is a single UPSERT ... RETURNING, which SQLite runs atomically
+    under its write lock, so concurrent workers can never both spend the last
+    token. Slower than shm (a write transaction per check) but easy to inspect.
+    """
+
+    name = "sqlite"
+
+    TAKE = """
+        INSERT INTO buckets (key, tokens, updated_at, allowed, capacity, rate)
+        VALUES (:key, :capacity - :cost, :now, 1, :capacity, :rate)
+        ON CONFLICT(key) DO UPDATE SET
+            tokens = min(:capacity, tokens + max(0, :now - updated_at) * :rate)
+                     - (CASE WHEN min(:capacity, tokens + max(0, :now - updated_at) * :rate) >= :cost
+                        THEN :cost ELSE 0 END),
+            allowed = min(:capacity, tokens + max(0, :now - updated_at) * :rate) >= :cost,
+            updated_at = :now,
+            capacity = :capacity,
+            rate = :rate
+        RETURNING tokens, allowed
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_SQLITE_PATH):
+        if sqlite3.sqlite_version_info < (3, 35):
+            raise RuntimeError(f"SQLite {sqlite3.sqlite_version} has no RETURNING (3.35+ needed)")
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+            "allowed INTEGER NOT NULL, capacity REAL NOT NULL, rate REAL NOT NULL) WITHOUT ROWID"
+        )
+        self._calls = 0
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> Tuple[bool, float]:
+        params = {"key": key, "capacity": capacity, "rate": rate, "cost": cost, "now": time.time()}
+        with self._lock:
+            tokens, allowed = self._conn.execute(self.TAKE, params).fetchone()
+            self._calls += 1
+            if self._calls % 10000 == 0:
+                # Full buckets behave exactly like missing ones, so they can go
+                self._conn.execute(
+                    "DELETE FROM buckets WHERE tokens + (:now - updated_at) * rate >= capacity",
+                    {"now": params["now"]},
+                )
+        return bool(allowed), 0.0 if allowed else (cost - tokens) / rate
+
+    def close(self):
+        self._conn.close()
+
+
+class RedisBackend:
+    """
+    Buckets in Redis (or anything speaking its protocol), shared across hosts.
+    The refill-and-spend step is one Lua script, so it is atomic on the server
+    and uses the server clock. Each check costs a network round trip.
+    """
+
+    name = "redis"
+
+    SCRIPT = """
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local cost = tonumber(ARGV[3])
+        local clock = redis.call('TIME')
+        local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+        local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+        local tokens = tonumber(bucket[1]) or capacity
+        local updated_at = tonumber(bucket[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+        local allowed = 0
+        if tokens >= cost then
+            tokens = tokens - cost
+            allowed = 1
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+        redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+        return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL, client=None, prefix: str = "ratelimit:"):
+        if client is None:
+            # Optional dependency, only needed with RATE_LIMIT_BACKEND=redis
+            import redis.asyncio
+            client = redis.asyncio.from_url(url)
+        self._client = client
+        self._script = client.register_script(self.SCRIPT)
+        self.prefix = prefix
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> Tuple[bool, float]:
+        allowed, tokens = await self._script(keys=[self.prefix + key], args=[capacity, rate, cost])
+        tokens = float(tokens)
+        return bool(int(allowed)), 0.0 if int(allowed) else (cost - tokens) / rate
+
+    def close(self):
+        pass
+
+
+BACKENDS = {"shm": SharedMemoryBackend, "sqlite": SQLiteBackend, "redis": RedisBackend, "memory": MemoryBackend}
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by route and client address. The backend is built on
+    first use; if it fails, requests are let through (and counted) rather than
+    rejected, so a broken limiter store never takes the API down.
+    """
+
+    def __init__(self, backend: Optional[str] = None, enabled: bool = RATE_LIMIT_ENABLED):
+        self.backend_name = backend or RATE_LIMIT_BACKEND
+        self.enabled = enabled
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        self._stats = {"checks": 0, "limited": 0, "backend_errors": 0, "total_check_us": 0.0}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    if self.backend_name not in BACKENDS:
+                        raise ValueError(f"Unknown RATE_LIMIT_BACKEND {self.backend_name!r}")
+                    self._backend = BACKENDS[self.backend_name]()
+        return self._backend
+
+    def use(self, backend):
+        """Swap in a backend instance (benchmarks, or a Redis stand-in)"""
+        self._backend = backend
+        self.backend_name = backend.name
+
+    async def hit(self, key: str, capacity: int, rate: float, cost: int = 1) -> Tuple[bool, float]:
+        """(allowed, seconds until allowed) for one request against a bucket"""
+        try:
+            backend = self.backend
+            started = time.perf_counter()
+            allowed, retry_after = await backend.take(key, capacity, rate, cost)
+        except Exception:
+            logger.exception("Rate limit backend %s failed; allowing request", self.backend_name)
+            self._stats["backend_errors"] += 1
+            return True, 0.0
+        self._stats["checks"] += 1
+        self._stats["total_check_us"] += (time.perf_counter() - started) * 1e6
+        if not allowed:
+            self._stats["limited"] += 1
+        return allowed, retry_after
+
+    async def charge(self, request: Request, limit: str, cost: int = 1, bucket: Optional[str] = None,
+                     parsed: Optional[Tuple[int, float]] = None):
+        """
+        Spend cost tokens of limit for the request's client, raising 429 when
+        the bucket can't cover them. The bucket is the route's path unless
+        named, so routes can share one.
+        """
+        if not self.enabled:
+            return
+        capacity, rate = parsed or parse_limit(limit)
+        if bucket is None:
+            route = request.scope.get("route")
+            bucket = route.path if route else request.url.path
+        client = request.client.host if request.client else "127.0.0.1"
+        allowed, retry_after = await self.hit(f"{bucket}:{client}", capacity, rate, cost)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded: {limit}",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    def limit(self, limit: str, bucket: Optional[str] = None):
+        """
+        Route dependency enforcing limit (e.g. "20/hour") per client address:
+            @router.post("/create", dependencies=[Depends(rate_limiter.limit("20/hour"))])
+        """
+        parsed = parse_limit(limit)
+
+        async def check(request: Request):
+            await self.charge(request, limit, bucket=bucket, parsed=parsed)
+
+        return check
+
+    def stats(self) -> dict:
+        stats = dict(self._stats, backend=self.backend_name, enabled=self.enabled)
+        total = stats.pop("total_check_us")
+        stats["avg_check_us"] = round(total / stats["checks"], 1) if stats["checks"] else 0.0
+        return stats
+
+
+rate_limiter = RateLimiter()
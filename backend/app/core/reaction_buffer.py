@@ -0,0 +1,191 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.database import SessionLocal
+from app.core.reactions import DEFAULT_REACTIONS, apply_reaction_deltas
+
+logger = logging.getLogger(__name__)
+
+# Write-behind mode is opt-in: REACTION_WRITE_BEHIND=1
+REACTION_WRITE_BEHIND = os.getenv("REACTION_WRITE_BEHIND", "0").lower() in ("1", "true", "yes")
+REACTION_FLUSH_INTERVAL_MS = int(os.getenv("REACTION_FLUSH_INTERVAL_MS", "500"))
+REACTION_FLUSH_MAX_EVENTS = int(os.getenv("REACTION_FLUSH_MAX_EVENTS", "1000"))
+
+
+class ReactionBuffer:
+    """
+    In-process write-behind buffer for reaction counts.
+    Reactions are summed per (post_id, reaction) and flushed as one batched UPDATE
+    every flush_interval_ms or once max_events reactions are pending, whichever
+    comes first. Unflushed deltas are overlaid onto reads so counts look live.
+    """
+
+    def __init__(self, flush_interval_ms: int = REACTION_FLUSH_INTERVAL_MS,
+                 max_events: int = REACTION_FLUSH_MAX_EVENTS, session_factory=SessionLocal):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_events = max_events
+        self.session_factory = session_factory
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[Tuple[int, str], int] = defaultdict(int)
+        self._pending_events = 0
+        # Deltas taken out of _pending but not yet committed - still overlaid on reads
+        self._inflight: Dict[Tuple[int, str], int] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        # Counts every add(), so feed ETags change with this process's overlay
+        self.generation = 0
+
+        self._stats = {
+            "flushes": 0,
+            "flush_failures": 0,
+            "events_flushed": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "dropped_events": 0,
+        }
+
+    def add(self, post_id: int, reaction: str, delta: int = 1):
+        """Record a reaction; it will be written on the next flush"""
+        with self._lock:
+            self._pending[(post_id, reaction)] += delta
+            self._pending_events += 1
+            self.generation += 1
+            full = self._pending_events >= self.max_events
+        if full:
+            self._wake.set()
+
+    def pending_deltas(self, post_id: int) -> Dict[str, int]:
+        """Unflushed deltas for one post, including a flush that is in progress"""
+        deltas: Dict[str, int] = {}
+        with self._lock:
+            for source in (self._inflight, self._pending):
+                for (pid, reaction), delta in source.items():
+                    if pid == post_id:
+                        deltas[reaction] = deltas.get(reaction, 0) + delta
+        return deltas
+
+    def deltas(self) -> Dict[int, Dict[str, int]]:
+        """Unflushed reaction deltas per post id (empty when nothing is pending)"""
+        with self._lock:
+            if not self._pending and not self._inflight:
+                return {}
+            by_post: Dict[int, Dict[str, int]] = defaultdict(dict)
+            for source in (self._inflight, self._pending):
+                for (pid, reaction), delta in source.items():
+                    by_post[pid][reaction] = by_post[pid].get(reaction, 0) + delta
+        return by_post
+
+    def overlay(self, posts: Iterable):
+        """Add unflushed deltas to the reactions of already loaded Post objects"""
+        by_post = self.deltas()
+        if not by_post:
+            return
+
+        for post in posts:
+            deltas = by_post.get(post.id)
+            if not deltas:
+                continue
+            reactions = dict(post.reactions or DEFAULT_REACTIONS)
+            for reaction, delta in deltas.items():
+                reactions[reaction] = reactions.get(reaction, 0) + delta
+            # Not a change to persist - keep the session from seeing it as dirty
+            set_committed_value(post, "reactions", reactions)
+
+    def flush(self) -> int:
+        """Write all pending deltas in one batch. Returns the number of events flushed."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = dict(self._pending)
+                events = self._pending_events
+                self._inflight = batch
+                self._pending = defaultdict(int)
+                self._pending_events = 0
+
+            deltas: Dict[int, Dict[str, int]] = defaultdict(dict)
+            for (post_id, reaction), delta in batch.items():
+                deltas[post_id][reaction] = delta
+
+            start = time.perf_counter()
+            db = self.session_factory()
+            try:
+                apply_reaction_deltas(db, deltas)
+            except Exception:
+                db.rollback()
+                logger.exception("Reaction flush failed; keeping %d events for retry", events)
+                with self._lock:
+                    for key, delta in batch.items():
+                        self._pending[key] += delta
+                    self._pending_events += events
+                    self._inflight = {}
+                    self._stats["flush_failures"] += 1
+                return 0
+            finally:
+                db.close()
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._inflight = {}
+                self._stats["flushes"] += 1
+                self._stats["events_flushed"] += events
+                self._stats["last_flush_ms"] = elapsed_ms
+                self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+                self._stats["total_flush_ms"] += elapsed_ms
+                self._stats["last_batch_size"] = len(batch)
+                self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+            return events
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reaction-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and drain everything still buffered"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._lock:
+            if self._pending_events:
+                logger.error("Dropping %d unflushed reaction events on shutdown", self._pending_events)
+                self._stats["dropped_events"] += self._pending_events
+                self._pending = defaultdict(int)
+                self._pending_events = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            # Everything still buffered is what a crash right now would lose
+            stats["pending_events"] = self._pending_events
+            stats["pending_keys"] = len(self._pending)
+        total_flush_ms = stats.pop("total_flush_ms")
+        stats["avg_flush_ms"] = total_flush_ms / stats["flushes"] if stats["flushes"] else 0.0
+        stats["enabled"] = REACTION_WRITE_BEHIND
+        return stats
+
+
+reaction_buffer = ReactionBuffer()
@@ -0,0 +1,414 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+import time
+from array import array
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+
+from app.core.counters import dialect_insert
+from app.core.database import AsyncSessionLocal
+from app.core.reactions import apply_reaction_deltas
+from app.models.models import Post, ReactionDedup
+
+logger = logging.getLogger(__name__)
+
+# One reaction per (post, reaction type, user_token); a second tap takes it back
+REACTION_DEDUP = os.getenv("REACTION_DEDUP", "0").lower() in ("1", "true", "yes")
+# Largest fingerprint table one post may grow to (4 bytes a slot, at most 3/4 full)
+REACTION_DEDUP_POST_BYTES = int(os.getenv("REACTION_DEDUP_POST_BYTES", str(1 << 20)))
+# All tables held in memory; least recently used posts are dropped (and reloaded on demand) past it
+REACTION_DEDUP_MEMORY_BYTES = int(os.getenv("REACTION_DEDUP_MEMORY_BYTES", str(256 << 20)))
+REACTION_DEDUP_PERSIST_INTERVAL = float(os.getenv("REACTION_DEDUP_PERSIST_INTERVAL", "5"))
+# A post's set is re-read on its next tap once it is this old, to pick up other workers' taps
+REACTION_DEDUP_REFRESH_SECONDS = float(os.getenv("REACTION_DEDUP_REFRESH_SECONDS", "30"))
+
+EMPTY, DELETED = 0, 1
+MIN_SLOTS = 8
+
+
+def fingerprint(post_id: int, reaction: str, user_token: str) -> int:
+    """
+    32-bit hash of one reaction. Salted with the post id, so two tokens that
+    collide on one post are unrelated on every other. 0 and 1 mark free slots.
+    """
+    value = int.from_bytes(
+        hashlib.blake2b(f"{post_id}:{reaction}:{user_token}".encode(), digest_size=4).digest(), "little"
+    )
+    return value if value > DELETED else value + 2
+
+
+def _slots(n: int) -> int:
+    """Smallest power-of-two table that holds n fingerprints at most 3/4 full"""
+    size = MIN_SLOTS
+    while size * 3 < n * 4:
+        size *= 2
+    return size
+
+
+class FingerprintSet:
+    """
+    Open-addressing hash set of 32-bit fingerprints in one array('I'): 4 bytes
+    a slot, no per-entry objects. Linear probing from the fingerprint's low
+    bits; removals leave a tombstone until the next resize. A lookup answers
+    "present" for a fingerprint some other token shares, so the false
+    positive rate is about len(set) / 2**32.
+    """
+
+    __slots__ = ("table", "mask", "used", "filled")
+
+    def __init__(self, size: int = MIN_SLOTS):
+        self.table = array("I", bytes(4 * size))
+        self.mask = size - 1
+        # used: live fingerprints; filled: live + tombstones
+        self.used = 0
+        self.filled = 0
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FingerprintSet":
+        values = array("I")
+        values.frombytes(data)
+        if sys.byteorder == "big":
+            values.byteswap()
+        fps = cls(_slots(len(values)))
+        for value in values:
+            fps._insert(value)
+        return fps
+
+    def to_bytes(self) -> bytes:
+        """Live fingerprints, sorted and packed little-endian (the stored form)"""
+        values = array("I", sorted(value for value in self.table if value > DELETED))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values.tobytes()
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.itemsize * len(self.table)
+
+    def __len__(self) -> int:
+        return self.used
+
+    def _find(self, fp: int) -> int:
+        """Slot holding fp, or -1"""
+        table, mask = self.table, self.mask
+        i = fp & mask
+        while True:
+            value = table[i]
+            if value == fp:
+                return i
+            if value == EMPTY:
+                return -1
+            i = (i + 1) & mask
+
+    def _insert(self, fp: int):
+        """Put fp in the first free slot (fp must not be present, and there must be room)"""
+        table, mask = self.table, self.mask
+        i = fp & mask
+        while table[i] > DELETED:
+            i = (i + 1) & mask
+        if table[i] == EMPTY:
+            self.filled += 1
+        table[i] = fp
+        self.used += 1
+
+    def _resize(self, size: int):
+        old = self.table
+        self.table = array("I", bytes(4 * size))
+        self.mask = size - 1
+        self.used = self.filled = 0
+        for value in old:
+            if value > DELETED:
+                self._insert(value)
+
+    def __contains__(self, fp: int) -> bool:
+        return self._find(fp) >= 0
+
+    def add(self, fp: int, max_slots: int) -> bool:
+        """Insert fp. False when the table would have to outgrow max_slots."""
+        if self._find(fp) >= 0:
+            return True
+        if (self.filled + 1) * 4 > len(self.table) * 3:
+            size = _slots(self.used + 1)
+            if size > max_slots:
+                return False
+            # Same size just clears tombstones; otherwise grow
+            self._resize(max(size, len(self.table)))
+        self._insert(fp)
+        return True
+
+    def discard(self, fp: int) -> bool:
+        i = self._find(fp)
+        if i < 0:
+            return False
+        self.table[i] = DELETED
+        self.used -= 1
+        return True
+
+
+class ReactionDedupIndex:
+    """
+    Who reacted to what, per post, as FingerprintSets held in memory and
+    persisted in batches. toggle() is one hash and a few array probes once a
+    post's set is loaded; the first touch of a post reads its row, and so does
+    the first touch after REACTION_DEDUP_REFRESH_SECONDS. Changes are written
+    every REACTION_DEDUP_PERSIST_INTERVAL seconds by merging them into the
+    stored row under a row lock, so workers don't overwrite each other.
+
+    A worker can toggle against a set that misses another worker's taps. The
+    merge then corrects the reaction counts in the same transaction: every
+    change remembers whether the fingerprint was present when it was first
+    made, and where the stored row disagrees the difference is written back,
+    so counts always end up matching the stored sets.
+
+    Memory is bounded twice: a post's table stops growing at
+    REACTION_DEDUP_POST_BYTES (further new reactions are still counted, just
+    not remembered, so they can't be taken back or refused as repeats), and
+    past REACTION_DEDUP_MEMORY_BYTES the least recently used posts with
+    nothing unsaved are dropped from memory.
+    """
+
+    def __init__(self, post_bytes: int = REACTION_DEDUP_POST_BYTES,
+                 memory_bytes: int = REACTION_DEDUP_MEMORY_BYTES):
+        self.max_slots = max(MIN_SLOTS, 1 << ((post_bytes // 4).bit_length() - 1))
+        self.memory_bytes = memory_bytes
+        self._sets: "OrderedDict[int, FingerprintSet]" = OrderedDict()
+        # post_id -> monotonic time its set was read or merged
+        self._loaded: Dict[int, float] = {}
+        self._bytes = 0
+        # post_id -> fingerprint -> (reaction, present before the first change, present now), not yet persisted
+        self._changes: Dict[int, Dict[int, Tuple[str, bool, bool]]] = {}
+        # post_id -> [lock, holders and waiters]; taps on one post run one at a time
+        self._locks: Dict[int, List] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._persisting = False
+        self._closing = False
+        self._stats = {"toggles": 0, "added": 0, "removed": 0, "loads": 0, "evictions": 0,
+                       "refreshes": 0, "overflows": 0, "persists": 0, "persist_failures": 0, "posts_persisted": 0,
+                       "reconciled": 0}
+
+    def _track(self, post_id: int, fps: FingerprintSet, before: int):
+        self._bytes += fps.nbytes - before
+        while self._bytes > self.memory_bytes and len(self._sets) > 1:
+            victim = next((pid for pid in self._sets if pid not in self._changes and pid != post_id), None)
+            if victim is None:
+                break
+            self._drop(victim)
+            self._stats["evictions"] += 1
+
+    def _drop(self, post_id: int):
+        fps = self._sets.pop(post_id, None)
+        if fps is not None:
+            self._bytes -= fps.nbytes
+        self._loaded.pop(post_id, None)
+
+    async def _load(self, db, post_id: int) -> Optional[FingerprintSet]:
+        """The post's set, read from reaction_dedup on first use; None if the post doesn't exist"""
+        fps = self._sets.get(post_id)
+        if fps is not None:
+            if post_id in self._changes or time.monotonic() - self._loaded[post_id] < REACTION_DEDUP_REFRESH_SECONDS:
+                self._sets.move_to_end(post_id)
+                return fps
+            # Nothing unsaved here; re-read it for other workers' taps
+            self._drop(post_id)
+            self._stats["refreshes"] += 1
+        row = (await db.execute(
+            select(Post.id, ReactionDedup.fingerprints)
+            .outerjoin(ReactionDedup, ReactionDedup.post_id == Post.id)
+            .where(Post.id == post_id)
+        )).first()
+        if row is None:
+            return None
+        self._stats["loads"] += 1
+        # Another request may have loaded it while this one waited
+        fps = self._sets.get(post_id)
+        if fps is None:
+            fps = FingerprintSet.from_bytes(row.fingerprints) if row.fingerprints else FingerprintSet()
+            for fp, (_, _, present) in self._changes.get(post_id, {}).items():
+                self._apply(fps, fp, present)
+            self._sets[post_id] = fps
+            self._loaded[post_id] = time.monotonic()
+            self._track(post_id, fps, 0)
+        return fps
+
+    def _apply(self, fps: FingerprintSet, fp: int, present: bool) -> bool:
+        if present:
+            return fps.add(fp, self.max_slots)
+        fps.discard(fp)
+        return True
+
+    @asynccontextmanager
+    async def _post_lock(self, post_id: int) -> AsyncIterator[None]:
+        entry = self._locks.get(post_id)
+        if entry is None:
+            entry = self._locks[post_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[post_id]
+
+    @asynccontextmanager
+    async def toggle(self, db, post_id: int, reaction: str, user_token: str) -> AsyncIterator[Optional[bool]]:
+        """
+        Flip user_token's reaction on a post. Yields True if it is being added
+        (count +1), False if taken back (count -1), None if the post doesn't
+        exist. The flip is only remembered once the block exits cleanly, so
+        write the count inside it: if that raises, nothing changes. Other taps
+        on the same post wait for the block.
+        """
+        async with self._post_lock(post_id):
+            fps = await self._load(db, post_id)
+            if fps is None:
+                yield None
+                return
+            fp = fingerprint(post_id, reaction, user_token)
+            added = fp not in fps
+            yield added
+            self._record(post_id, fp, reaction, added)
+
+    def _record(self, post_id: int, fp: int, reaction: str, added: bool):
+        """Remember a counted flip (the post's set may have been swapped or dropped since it was read)"""
+        self._stats["toggles"] += 1
+        self._stats["added" if added else "removed"] += 1
+        fps = self._sets.get(post_id)
+        if fps is not None:
+            before = fps.nbytes
+            if not self._apply(fps, fp, added):
+                # Counted but not remembered: the post is at its size cap
+                self._stats["overflows"] += 1
+                return
+            self._track(post_id, fps, before)
+        post_changes = self._changes.setdefault(post_id, {})
+        first = post_changes.get(fp)
+        post_changes[fp] = (reaction, first[1] if first else not added, added)
+
+    def forget(self, post_ids: Iterable[int]):
+        """Drop deleted posts from memory (their rows go with delete_rows)"""
+        for post_id in post_ids:
+            self._drop(post_id)
+            self._changes.pop(post_id, None)
+
+    async def persist(self):
+        """
+        Merge every post's unsaved changes into its reaction_dedup row and
+        correct the reaction counts of changes made against a stale set, one
+        transaction.
+        """
+        changes, self._changes = self._changes, {}
+        if not changes:
+            return
+
+        post_ids = sorted(changes)
+        async with AsyncSessionLocal() as db:
+            try:
+                stmt = select(ReactionDedup.post_id, ReactionDedup.fingerprints).where(ReactionDedup.post_id.in_(post_ids))
+                if db.bind.dialect.name == "postgresql":
+                    # Lock in id order so concurrent persists from other workers can't deadlock
+                    stmt = stmt.order_by(ReactionDedup.post_id).with_for_update()
+                stored = {row.post_id: row.fingerprints for row in await db.execute(stmt)}
+                merged = {}
+                corrections: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+                for post_id in post_ids:
+                    fps = FingerprintSet.from_bytes(stored[post_id]) if post_id in stored else FingerprintSet()
+                    for fp, (reaction, initial, present) in changes[post_id].items():
+                        was = fp in fps
+                        self._apply(fps, fp, present)
+                        # The count moved by present - initial; the stored set moves by now - was
+                        correction = ((fp in fps) - was) - (present - initial)
+                        if correction:
+                            corrections[post_id][reaction] += correction
+                    merged[post_id] = fps
+                rows = [{"post_id": post_id, "fingerprints": fps.to_bytes()} for post_id, fps in merged.items()]
+                insert = dialect_insert(db)
+                if insert is not None:
+                    stmt = insert(ReactionDedup).values(rows)
+                    await db.execute(stmt.on_conflict_do_update(
+                        index_elements=[ReactionDedup.post_id], set_={"fingerprints": stmt.excluded.fingerprints}
+                    ))
+                else:
+                    for row in rows:
+                        await db.merge(ReactionDedup(**row))
+                if corrections:
+                    # Commits everything above with the corrected counts
+                    await db.run_sync(apply_reaction_deltas, {post_id: dict(deltas) for post_id, deltas in corrections.items()})
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                logger.exception("Persisting reaction dedup failed; keeping %d posts for retry", len(changes))
+                for post_id, post_changes in changes.items():
+                    # Newer taps win over the ones being retried, which hold the state before both
+                    newer = self._changes.get(post_id, {})
+                    self._changes[post_id] = {
+                        fp: (reaction, initial, newer[fp][2] if fp in newer else present)
+                        for fp, (reaction, initial, present) in post_changes.items()
+                    }
+                    self._changes[post_id].update((fp, change) for fp, change in newer.items() if fp not in post_changes)
+                self._stats["persist_failures"] += 1
+                return
+
+        # Swap in the merged sets, which include other workers' taps, plus anything tapped meanwhile
+        for post_id, fps in merged.items():
+            current = self._sets.get(post_id)
+            if current is None:
+                continue
+            for fp, (_, _, present) in self._changes.get(post_id, {}).items():
+                self._apply(fps, fp, present)
+            self._sets[post_id] = fps
+            self._loaded[post_id] = time.monotonic()
+            self._track(post_id, fps, current.nbytes)
+        self._stats["persists"] += 1
+        self._stats["reconciled"] += sum(len(deltas) for deltas in corrections.values())
+        self._stats["posts_persisted"] += len(rows)
+
+    async def _run(self):
+        while not self._closing:
+            await asyncio.sleep(REACTION_DEDUP_PERSIST_INTERVAL)
+            self._persisting = True
+            try:
+                await self.persist()
+            finally:
+                self._persisting = False
+
+    def start(self):
+        self._closing = False
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="reaction-dedup-persist")
+
+    async def stop(self):
+        """Stop the persist loop and save whatever is left"""
+        self._closing = True
+        if self._task:
+            # Only interrupt the loop while it sleeps, never mid-write
+            if not self._persisting:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.persist()
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["enabled"] = REACTION_DEDUP
+        stats["posts_in_memory"] = len(self._sets)
+        stats["fingerprints_in_memory"] = sum(len(fps) for fps in self._sets.values())
+        stats["memory_bytes"] = self._bytes
+        stats["unsaved_posts"] = len(self._changes)
+        return stats
+
+
+async def delete_rows(db, post_ids: Iterable[int]):
+    """Remove deleted posts' fingerprints (no commit)"""
+    await db.execute(delete(ReactionDedup).where(ReactionDedup.post_id.in_(list(post_ids))))
+
+
+reaction_dedup = ReactionDedupIndex()
@@ -0,0 +1,125 @@
+import json
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Integer, String, bindparam, cast, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.types import JSON
+
+from app.core.etag import feed_versions
+from app.models.models import Post
+
+REACTION_TYPES = ("thumbs_up", "heart", "laugh", "angry")
+DEFAULT_REACTIONS = {reaction: 0 for reaction in REACTION_TYPES}
+
+
+def _increment_expression(dialect: str, deltas: Dict[str, Any]):
+    """
+    SQL expression that adds deltas[reaction] to each key of posts.reactions in place.
+    Delta values may be plain ints or bind parameters (for executemany batches).
+    """
+    default = literal(json.dumps(DEFAULT_REACTIONS), String)
+
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import JSONB, array
+        current = func.coalesce(cast(Post.reactions, JSONB), cast(default, JSONB))
+        new_value = current
+        for reaction, delta in deltas.items():
+            new_value = func.jsonb_set(
+                new_value,
+                array([literal(reaction, String)]),
+                func.to_jsonb(func.coalesce(current[reaction].astext.cast(Integer), 0) + delta),
+            )
+        return cast(new_value, JSON)
+
+    if dialect == "sqlite":
+        current = func.coalesce(Post.reactions, default)
+        args = []
+        for reaction, delta in deltas.items():
+            path = literal(f'$."{reaction}"', String)
+            args += [path, func.coalesce(func.json_extract(current, path), 0) + delta]
+        return func.json_set(current, *args)
+
+    return None
+
+
+async def increment_reaction(db: AsyncSession, post_id: int, reaction: str, delta: int = 1) -> Optional[Dict[str, Any]]:
+    """
+    Atomically add delta to a post's reaction count and return the fresh post row.
+    On Postgres and SQLite this is a single UPDATE ... RETURNING, so concurrent
+    reactions never overwrite each other. Returns None if the post does not exist.
+    Bumps the post's feed versions and commits the transaction.
+    """
+    expression = _increment_expression(db.bind.dialect.name, {reaction: delta})
+
+    if expression is None:
+        # No in-place JSON update on this backend: serialize on the row lock instead
+        db_post = await db.scalar(select(Post).where(Post.id == post_id).with_for_update())
+        if not db_post:
+            return None
+        reactions = dict(db_post.reactions or DEFAULT_REACTIONS)
+        reactions[reaction] = reactions.get(reaction, 0) + delta
+        db_post.reactions = reactions
+        await feed_versions.bump(db, [db_post.hashtag])
+        await db.commit()
+        return {column.name: getattr(db_post, column.name) for column in Post.__table__.columns}
+
+    stmt = (
+        update(Post)
+        .where(Post.id == post_id)
+        .values(reactions=expression)
+        .returning(*Post.__table__.columns)
+        .execution_options(synchronize_session=False)
+    )
+    row = (await db.execute(stmt)).mappings().first()
+    if row:
+        await feed_versions.bump(db, [row["hashtag"]])
+    await db.commit()
+    return dict(row) if row else None
+
+
+def _bump_versions(db: Session, deltas: Dict[int, Dict[str, int]]):
+    hashtags = db.scalars(select(Post.hashtag).where(Post.id.in_(list(deltas))).distinct()).all()
+    feed_versions.bump_sync(db.connection(), hashtags)
+
+
+def apply_reaction_deltas(db: Session, deltas: Dict[int, Dict[str, int]]):
+    """
+    Add many posts' reaction deltas in one batched UPDATE (executemany), bump
+    their feeds' versions and commit.
+    deltas maps post_id -> {reaction: delta}. Takes a sync Session because it runs
+    on the write-behind flusher thread, off the event loop.
+    """
+    if not deltas:
+        return
+
+    expression = _increment_expression(
+        db.bind.dialect.name,
+        {reaction: bindparam(f"d_{reaction}", type_=Integer) for reaction in REACTION_TYPES},
+    )
+
+    if expression is None:
+        for post_id, post_deltas in sorted(deltas.items()):
+            db_post = db.query(Post).filter(Post.id == post_id).with_for_update().first()
+            if db_post:
+                reactions = dict(db_post.reactions or DEFAULT_REACTIONS)
+                for reaction, delta in post_deltas.items():
+                    reactions[reaction] = reactions.get(reaction, 0) + delta
+                db_post.reactions = reactions
+        _bump_versions(db, deltas)
+        db.commit()
+        return
+
+    stmt = (
+        update(Post.__table__)
+        .where(Post.__table__.c.id == bindparam("post_id"))
+        .values(reactions=expression)
+    )
+    # Sorted by id so concurrent flushers always lock rows in the same order
+    params = [
+        {"post_id": post_id, **{f"d_{reaction}": post_deltas.get(reaction, 0) for reaction in REACTION_TYPES}}
+        for post_id, post_deltas in sorted(deltas.items())
+    ]
+    db.connection().execute(stmt, params)
+    _bump_versions(db, deltas)
+    db.commit()
@@ -0,0 +1,243 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import AsyncSessionLocal, engine_options, to_async_url
+from app.core.metrics import instrument_engine, pool_status
+from app.core.snapshots import FEED_SNAPSHOTS
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated read replica URLs; none means every read goes to the primary
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "2"))
+REPLICA_HEALTH_TIMEOUT = float(os.getenv("REPLICA_HEALTH_TIMEOUT", "1"))
+# Replicas further behind than this get no reads until they catch up
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+# After a write, that user's reads go to the primary for this long; keep it above
+# REPLICA_MAX_LAG_SECONDS + REPLICA_HEALTH_INTERVAL (and FEED_SNAPSHOT_MAX_DELAY)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+# Set on write responses so the browser's next reads find the primary on any worker or host
+READ_YOUR_WRITES_COOKIE = "dumps_wrote"
+# Write marks kept per process; the oldest are dropped past this
+READ_YOUR_WRITES_MAX_TOKENS = 100000
+
+# Seconds of replay lag on a standby. 0 when all received WAL is replayed, since
+# an idle primary would otherwise look like ever-growing lag; 0 off a standby too.
+PG_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    """One read replica: its own engine and pool, plus the last health check"""
+
+    def __init__(self, url: str):
+        async_url = to_async_url(url)
+        self.name = make_url(async_url).render_as_string(hide_password=True)
+        self.engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+        instrument_engine(self.engine.sync_engine)
+        self.sessionmaker = async_sessionmaker(bind=self.engine, autoflush=False, expire_on_commit=False)
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.checked_at = 0.0
+        self.last_error: Optional[str] = None
+        self.reads = 0
+        self.failures = 0
+
+    @property
+    def usable(self) -> bool:
+        """Up, caught up, and checked recently enough for that to still hold"""
+        return (
+            self.healthy
+            and self.lag is not None
+            and self.lag <= REPLICA_MAX_LAG_SECONDS
+            and time.monotonic() - self.checked_at <= REPLICA_HEALTH_INTERVAL * 3
+        )
+
+    async def _probe(self) -> float:
+        async with self.engine.connect() as conn:
+            if self.engine.dialect.name == "postgresql":
+                return float(await conn.scalar(PG_LAG_SQL))
+            await conn.execute(text("SELECT 1"))
+            return 0.0
+
+    async def check(self):
+        try:
+            self.lag = await asyncio.wait_for(self._probe(), REPLICA_HEALTH_TIMEOUT)
+        except Exception as e:
+            self.mark_down(e)
+            return
+        if not self.healthy:
+            logger.info("Read replica %s is up (lag %.1fs)", self.name, self.lag)
+        self.healthy = True
+        self.checked_at = time.monotonic()
+
+    def mark_down(self, error: BaseException):
+        """Take the replica out of rotation until a health check passes again"""
+        if self.healthy:
+            logger.warning("Read replica %s is down: %r", self.name, error)
+        self.healthy = False
+        self.failures += 1
+        self.last_error = repr(error)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "usable": self.usable,
+            "lag_seconds": None if self.lag is None else round(self.lag, 3),
+            "reads": self.reads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "pool": pool_status(self.engine.sync_engine),
+        }
+
+
+class ReadRouter:
+    """
+    Hands read-only routes a session on a replica, round-robin over the ones
+    that are healthy and within REPLICA_MAX_LAG_SECONDS, falling back to the
+    primary when none is. A background task re-checks health and lag every
+    REPLICA_HEALTH_INTERVAL seconds; a replica that refuses a connection is
+    dropped at once and the next one tried.
+
+    Read-your-writes: write routes call note_write(), which pins that
+    user_token to the primary for READ_YOUR_WRITES_SECONDS. The pin is kept in
+    this process (for reads that carry the token) and in a short-lived cookie
+    (for the browser's next reads, whichever worker or host serves them).
+    With feed snapshots on, the cookie is set even without replicas: nginx
+    sends requests carrying it to the API instead of a snapshot that may not
+    have the write yet.
+    """
+
+    def __init__(self, urls: List[str] = DATABASE_REPLICA_URLS):
+        self.replicas = [Replica(url) for url in urls]
+        self._next = itertools.count()
+        # user_token -> monotonic time its pin ends, oldest first
+        self._writes: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"primary_reads": 0, "replica_reads": 0, "pinned_reads": 0, "fallbacks": 0,
+                       "checks": 0, "total_check_ms": 0.0}
+
+    def note_write(self, response: Response, user_token: Optional[str]):
+        """Send user_token's reads to the primary until replicas (and snapshots) have its write"""
+        if not user_token or not (self.replicas or FEED_SNAPSHOTS):
+            return
+        if self.replicas:
+            now = time.monotonic()
+            self._writes.pop(user_token, None)
+            self._writes[user_token] = now + READ_YOUR_WRITES_SECONDS
+            while self._writes and (len(self._writes) > READ_YOUR_WRITES_MAX_TOKENS or next(iter(self._writes.values())) < now):
+                del self._writes[next(iter(self._writes))]
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE, str(int(time.time() + READ_YOUR_WRITES_SECONDS)),
+            max_age=int(READ_YOUR_WRITES_SECONDS), path="/api", httponly=True, samesite="lax"
+        )
+
+    def pinned(self, request: Request) -> bool:
+        """Whether this request's user wrote recently enough that replicas may miss it"""
+        token = request.headers.get("x-user-token") or request.query_params.get("token")
+        until = self._writes.get(token) if token else None
+        if until is not None and until >= time.monotonic():
+            return True
+        try:
+            return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) >= time.time()
+        except ValueError:
+            return False
+
+    async def session(self, request: Request) -> AsyncSession:
+        if self.replicas:
+            if self.pinned(request):
+                self._stats["pinned_reads"] += 1
+            else:
+                start = next(self._next)
+                for i in range(len(self.replicas)):
+                    replica = self.replicas[(start + i) % len(self.replicas)]
+                    if not replica.usable:
+                        continue
+                    db = replica.sessionmaker()
+                    try:
+                        # Connect now, so a dead replica costs a retry rather than a 500
+                        await db.connection()
+                    except Exception as e:
+                        await db.close()
+                        replica.mark_down(e)
+                        continue
+                    db.info["read_from"] = replica.name
+                    replica.reads += 1
+                    self._stats["replica_reads"] += 1
+                    return db
+                self._stats["fallbacks"] += 1
+        db = AsyncSessionLocal()
+        db.info["read_from"] = "primary"
+        self._stats["primary_reads"] += 1
+        return db
+
+    async def check(self):
+        start = time.perf_counter()
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+        self._stats["checks"] += 1
+        self._stats["total_check_ms"] += (time.perf_counter() - start) * 1000
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(REPLICA_HEALTH_INTERVAL)
+            await self.check()
+
+    async def start(self):
+        """Check every replica once, then keep checking in the background"""
+        if not self.replicas:
+            return
+        await self.check()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="replica-health")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        total_ms = stats.pop("total_check_ms")
+        stats["avg_check_ms"] = round(total_ms / stats["checks"], 3) if stats["checks"] else 0.0
+        stats["pinned_tokens"] = len(self._writes)
+        stats["replicas"] = [replica.stats() for replica in self.replicas]
+        return stats
+
+
+read_router = ReadRouter()
+
+
+async def get_read_db(request: Request):
+    """
+    Session for read-only routes: a healthy, caught-up replica when one is
+    configured, otherwise (or right after this user wrote) the primary.
+    Never write through it.
+    """
+    db = await read_router.session(request)
+    try:
+        yield db
+    except DBAPIError as e:
+        replica = next((r for r in read_router.replicas if r.name == db.info["read_from"]), None)
+        if replica and e.connection_invalidated:
+            replica.mark_down(e)
+        raise
+    finally:
+        await db.close()
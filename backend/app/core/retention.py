@@ -0,0 +1,219 @@
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.bulk import _to_json
+from app.core.counters import dialect_insert, rebuild_post_counts
+from app.core.etag import feed_versions
+from app.core.partitions import (
+    PARTITIONED_TABLES, add_months, drop_partition, ensure_partitions, is_partitioned,
+    list_partitions, month_start,
+)
+from app.models.models import Post, ReactionDedup, ScanDaily, ScanTracker
+
+# Whole months kept in the live tables, counting the current one
+POST_RETENTION_MONTHS = int(os.getenv("POST_RETENTION_MONTHS", "12"))
+SCAN_RETENTION_MONTHS = int(os.getenv("SCAN_RETENTION_MONTHS", "3"))
+# Where archived posts go, one gzipped NDJSON file per month
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR") or os.path.join(os.path.dirname(__file__), "..", "..", "archive")
+
+
+class RetentionError(RuntimeError):
+    pass
+
+
+def cutoff(months: int, now: Optional[datetime] = None) -> datetime:
+    """Start of the oldest month that stays live"""
+    return add_months(month_start(now or datetime.now(timezone.utc)), -(months - 1))
+
+
+def _old_months(db: Session, model, before: datetime) -> List[datetime]:
+    """Every month before `before` that still has rows or a partition"""
+    months = set()
+    oldest = db.scalar(select(func.min(model.created_at)).where(model.created_at < before))
+    if oldest is not None:
+        month = month_start(oldest)
+        while month < before:
+            months.add(month)
+            month = add_months(month, 1)
+    conn = db.connection()
+    if is_partitioned(conn, model.__tablename__):
+        months.update(month for month in list_partitions(conn, model.__tablename__) if month < before)
+    return sorted(months)
+
+
+def _in_month(model, month: datetime):
+    return model.created_at >= month, model.created_at < add_months(month, 1)
+
+
+def _remove_month(db: Session, model, month: datetime, expected: int):
+    """
+    Drop the month's partition when it has one (and nothing else can have
+    landed in it), otherwise delete the rows. Either way exactly `expected`
+    rows must go, or the transaction is rolled back by the caller.
+    """
+    conn = db.connection()
+    table = model.__tablename__
+    partition = list_partitions(conn, table).get(month) if is_partitioned(conn, table) else None
+    if partition:
+        drop_partition(conn, table, partition)
+        removed = expected
+    else:
+        removed = db.execute(model.__table__.delete().where(*_in_month(model, month))).rowcount
+    if removed != expected:
+        raise RetentionError(f"{table} {month:%Y-%m}: expected to remove {expected} rows, found {removed}")
+
+
+def _lock_month(db: Session, model, month: datetime):
+    """Keep writers out of a month while it is being compacted (partitioned Postgres only)"""
+    conn = db.connection()
+    table = model.__tablename__
+    if is_partitioned(conn, table):
+        partition = list_partitions(conn, table).get(month)
+        if partition:
+            conn.execute(text(f"LOCK TABLE {partition} IN SHARE MODE"))
+
+
+def _day(db: Session):
+    """created_at's UTC calendar day as a SQL expression"""
+    if db.bind.dialect.name == "postgresql":
+        return func.date(func.timezone("UTC", ScanTracker.created_at))
+    return func.date(ScanTracker.created_at)
+
+
+def _add_daily(db: Session, counts: Dict[date, int]):
+    rows = [{"day": day, "scans": n} for day, n in sorted(counts.items())]
+    insert = dialect_insert(db)
+    if insert is not None:
+        stmt = insert(ScanDaily).values(rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[ScanDaily.day], set_={"scans": ScanDaily.scans + stmt.excluded.scans}
+        ))
+        return
+    for row in rows:
+        result = db.execute(update(ScanDaily).where(ScanDaily.day == row["day"]).values(scans=ScanDaily.scans + row["scans"]))
+        if result.rowcount == 0:
+            db.add(ScanDaily(**row))
+    db.flush()
+
+
+def compact_scans(engine: Engine, months: int = SCAN_RETENTION_MONTHS, dry_run: bool = False) -> dict:
+    """
+    Roll scan_tracker rows older than the last `months` months into per-day
+    counts in scan_daily, then drop (or delete) them. One transaction per
+    month, so the counts and the removal land together. The scans counter
+    and SCAN_COUNT_STMT already include scan_daily, so totals don't move.
+    """
+    before = cutoff(months)
+    summary = {"before": before.isoformat(), "months": [], "rows": 0}
+    with Session(engine) as db:
+        old_months = _old_months(db, ScanTracker, before)
+        db.commit()
+        for month in old_months:
+            with db.begin():
+                _lock_month(db, ScanTracker, month)
+                day = _day(db)
+                counts = {
+                    (date.fromisoformat(value) if isinstance(value, str) else value): n
+                    for value, n in db.execute(
+                        select(day, func.count()).where(*_in_month(ScanTracker, month)).group_by(day)
+                    )
+                }
+                total = sum(counts.values())
+                if not dry_run:
+                    if counts:
+                        _add_daily(db, counts)
+                    _remove_month(db, ScanTracker, month, total)
+            summary["months"].append({"month": f"{month:%Y-%m}", "rows": total, "days": len(counts)})
+            summary["rows"] += total
+    return summary
+
+
+def _archive_path(archive_dir: str, month: datetime) -> str:
+    base = os.path.join(archive_dir, f"posts-{month:%Y-%m}")
+    if not os.path.exists(base + ".ndjson.gz"):
+        return base + ".ndjson.gz"
+    # A month archived before (e.g. rows imported later) gets another file, never an overwrite
+    return f"{base}.{time.strftime('%Y%m%dT%H%M%S')}.ndjson.gz"
+
+
+def archive_posts(engine: Engine, months: int = POST_RETENTION_MONTHS, archive_dir: str = ARCHIVE_DIR,
+                  dry_run: bool = False) -> dict:
+    """
+    Move posts older than the last `months` months out of the live table into
+    gzipped NDJSON (the bulk_data.py format, so `bulk_data.py import` can load
+    a file back). Each month is written and fsynced before its rows are
+    dropped, inside one transaction that keeps writers out of that month.
+    Post counters are rebuilt afterwards.
+    """
+    before = cutoff(months)
+    summary = {"before": before.isoformat(), "months": [], "rows": 0}
+    columns = [column.name for column in Post.__table__.columns]
+    os.makedirs(archive_dir, exist_ok=True)
+    with Session(engine) as db:
+        old_months = _old_months(db, Post, before)
+        db.commit()
+        for month in old_months:
+            with db.begin():
+                _lock_month(db, Post, month)
+                stmt = select(Post.__table__).where(*_in_month(Post, month)).order_by(Post.id)
+                if dry_run:
+                    count = db.scalar(select(func.count()).select_from(stmt.subquery()))
+                    summary["months"].append({"month": f"{month:%Y-%m}", "rows": count, "file": None})
+                    summary["rows"] += count
+                    continue
+
+                path = _archive_path(archive_dir, month)
+                partial = path + ".partial"
+                count = 0
+                try:
+                    with gzip.open(partial, "wt", encoding="utf-8") as out:
+                        for row in db.execute(stmt.execution_options(yield_per=5000)):
+                            out.write(json.dumps({name: _to_json(value) for name, value in zip(columns, row)}))
+                            out.write("\n")
+                            count += 1
+                    with open(partial, "rb") as written:
+                        os.fsync(written.fileno())
+                    _remove_month(db, Post, month, count)
+                    if count:
+                        feed_versions.bump_all_sync(db.connection())
+                except BaseException:
+                    os.remove(partial)
+                    raise
+                if count:
+                    os.replace(partial, path)
+                else:
+                    os.remove(partial)
+                    path = None
+            summary["months"].append({"month": f"{month:%Y-%m}", "rows": count, "file": path})
+            summary["rows"] += count
+        if summary["rows"] and not dry_run:
+            summary["counters_repaired"] = len(rebuild_post_counts(db))
+            # Reaction fingerprints of archived posts
+            db.execute(delete(ReactionDedup).where(ReactionDedup.post_id.not_in(select(Post.id))))
+            db.commit()
+    return summary
+
+
+def run_retention(engine: Engine, post_months: int = POST_RETENTION_MONTHS,
+                  scan_months: int = SCAN_RETENTION_MONTHS, archive_dir: str = ARCHIVE_DIR,
+                  dry_run: bool = False) -> dict:
+    """The daily job: create upcoming partitions, compact scans, archive posts"""
+    started = time.perf_counter()
+    result = {"partitions_created": []}
+    if not dry_run:
+        with engine.begin() as conn:
+            for table in PARTITIONED_TABLES:
+                if is_partitioned(conn, table):
+                    result["partitions_created"] += ensure_partitions(conn, table)
+    result["scans"] = compact_scans(engine, scan_months, dry_run=dry_run)
+    result["posts"] = archive_posts(engine, post_months, archive_dir, dry_run=dry_run)
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
@@ -0,0 +1,46 @@
+"""
+Process-wide S3 client. boto3 clients are thread-safe once built, but building
+one costs tens of milliseconds, so it is created on first use and then shared.
+Also imported by image pipeline workers, so keep this free of app imports.
+"""
+import os
+import threading
+
+# Presigned PUT URLs stay valid for this long
+PRESIGN_EXPIRES_IN = int(os.getenv("PRESIGN_EXPIRES_IN", "3600"))
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Imported here so API startup doesn't pay for loading boto3
+                import boto3
+                _client = boto3.client(
+                    's3',
+                    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+                    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                    region_name=os.getenv('AWS_REGION')
+                )
+    return _client
+
+
+def public_url(bucket: str, key: str, region=None) -> str:
+    return f"https://{bucket}.s3.{region or os.getenv('AWS_REGION')}.amazonaws.com/{key}"
+
+
+def presign_put(bucket: str, key: str, content_type: str, expires_in: int = PRESIGN_EXPIRES_IN) -> str:
+    """Presigned URL for a direct browser PUT; signed locally, no request to S3"""
+    return get_s3_client().generate_presigned_url(
+        'put_object',
+        Params={
+            'Bucket': bucket,
+            'Key': key,
+            'ContentType': content_type
+        },
+        ExpiresIn=expires_in
+    )
@@ -0,0 +1,192 @@
+import asyncio
+import base64
+import json
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Text search configuration; must match the expression in the GIN index migration
+TS_CONFIG = literal_column("'english'")
+
+# BM25 parameters for the in-process fallback
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if len(token) > 1 or token.isdigit()]
+
+
+def encode_search_cursor(rank: float, doc_id: int) -> str:
+    raw = json.dumps([rank, doc_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(rank), int(doc_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def ts_vector(column):
+    return func.to_tsvector(TS_CONFIG, column)
+
+
+class InvertedIndex:
+    """
+    In-memory term -> {doc_id: term frequency} index with BM25 ranking, used when
+    the database has no full-text engine (SQLite in dev). Loaded from the table
+    once, then kept current by add()/remove() calls and by catching up on rows
+    with ids above the highest one indexed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        # doc_id -> (distinct terms, token count, tag)
+        self._docs: Dict[int, Tuple[Tuple[str, ...], int, Optional[str]]] = {}
+        self._total_tokens = 0
+        self.max_id = 0
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+
+    def add(self, doc_id: int, text: str, tag: Optional[str] = None):
+        """Index a document, replacing any earlier version of it"""
+        if not self.loaded:
+            # The initial load will pick it up
+            return
+        tokens = tokenize(text or "")
+        counts = Counter(tokens)
+        with self._lock:
+            self._remove_locked(doc_id)
+            for term, tf in counts.items():
+                self._postings[term][doc_id] = tf
+            self._docs[doc_id] = (tuple(counts), len(tokens), tag)
+            self._total_tokens += len(tokens)
+            self.max_id = max(self.max_id, doc_id)
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: int):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        terms, length, _ = doc
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_tokens -= length
+
+    def search(self, query: str, tag: Optional[str] = None) -> List[Tuple[float, int]]:
+        """(score, doc_id) for documents containing every query term, best first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms]
+            if not all(postings):
+                return []
+            n_docs = len(self._docs)
+            avg_len = self._total_tokens / n_docs if n_docs else 0.0
+            # Walk the rarest term's postings and check the rest
+            postings.sort(key=len)
+            results = []
+            for doc_id in postings[0]:
+                if any(doc_id not in other for other in postings[1:]):
+                    continue
+                _, length, doc_tag = self._docs[doc_id]
+                if tag is not None and doc_tag != tag:
+                    continue
+                score = 0.0
+                for term_postings in postings:
+                    tf = term_postings[doc_id]
+                    idf = math.log(1 + (n_docs - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len) if avg_len else BM25_K1
+                    score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+                results.append((round(score, 6), doc_id))
+        results.sort(reverse=True)
+        return results
+
+    async def sync(self, db: AsyncSession, model, tag_column=None):
+        """Load the table on first use, then index rows added since (e.g. by other processes)"""
+        async with self._load_lock:
+            columns = [model.id, model.content] + ([tag_column] if tag_column is not None else [])
+            stmt = select(*columns).where(model.id > self.max_id).order_by(model.id)
+            was_loaded, self.loaded = self.loaded, True
+            try:
+                result = await db.stream(stmt)
+                async for row in result:
+                    self.add(row[0], row[1], row[2] if tag_column is not None else None)
+            except Exception:
+                self.loaded = was_loaded
+                raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"loaded": self.loaded, "documents": len(self._docs), "terms": len(self._postings)}
+
+
+def _page_from_ranked(ranked: List[Tuple[float, int]], limit: int, cursor: Optional[str]):
+    """Slice one page (plus a peek row) out of a best-first (score, id) list"""
+    if cursor:
+        after = decode_search_cursor(cursor)
+        ranked = [item for item in ranked if item < after]
+    return ranked[:limit + 1]
+
+
+async def search_documents(db: AsyncSession, model, index: InvertedIndex, query: str, limit: int,
+                           cursor: Optional[str] = None, tag_column=None, tag: Optional[str] = None):
+    """
+    Ranked full-text search over model.content. Returns (rows, next_cursor) where
+    rows are model instances, best match first. Paging is a keyset on (rank, id).
+    Postgres uses to_tsvector/websearch_to_tsquery backed by the GIN index;
+    other databases use the in-process InvertedIndex.
+    """
+    if db.bind.dialect.name == "postgresql":
+        vector = ts_vector(model.content)
+        ts_query = func.websearch_to_tsquery(TS_CONFIG, query)
+        rank = func.ts_rank_cd(vector, ts_query)
+        stmt = select(model, rank.label("rank")).where(vector.op("@@")(ts_query))
+        if tag is not None:
+            stmt = stmt.where(tag_column == tag)
+        if cursor:
+            after_rank, after_id = decode_search_cursor(cursor)
+            stmt = stmt.where(or_(rank < after_rank, and_(rank == after_rank, model.id < after_id)))
+        rows = (await db.execute(stmt.order_by(rank.desc(), model.id.desc()).limit(limit + 1))).all()
+        ranked = [(row.rank, row[0]) for row in rows]
+    else:
+        await index.sync(db, model, tag_column)
+        page = _page_from_ranked(index.search(query, tag), limit, cursor)
+        by_id = {}
+        if page:
+            by_id = {doc.id: doc for doc in (await db.scalars(
+                select(model).where(model.id.in_([doc_id for _, doc_id in page]))
+            )).all()}
+        # Rows deleted by another process since they were indexed are skipped
+        ranked = [(score, by_id[doc_id]) for score, doc_id in page if doc_id in by_id]
+
+    next_cursor = None
+    if len(ranked) > limit:
+        ranked = ranked[:limit]
+        next_cursor = encode_search_cursor(ranked[-1][0], ranked[-1][1].id)
+    return [doc for _, doc in ranked], next_cursor
+
+
+post_index = InvertedIndex()
+wild_thought_index = InvertedIndex()
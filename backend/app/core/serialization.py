@@ -0,0 +1,62 @@
+from typing import Iterable, List, Optional
+
+import orjson
+from sqlalchemy import Select, select
+
+from app.core.reaction_buffer import reaction_buffer
+from app.core.reactions import DEFAULT_REACTIONS
+from app.models.models import ImageAsset, Post
+
+# PostResponse's fields in declaration order, so the bytes match its model_dump_json()
+POST_FIELDS = (
+    "id", "content", "image_url", "hashtag", "created_at",
+    "user_token", "fictional_name", "reactions", "image_variants",
+)
+# Pydantic writes UTC offsets as "Z"
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def feed_select(*where) -> Select:
+    """
+    The columns a PostResponse needs, image variants included, as plain Core
+    rows: no ORM objects, identity map or selectin round trip. Works with
+    page_statement() like select(Post) does.
+    """
+    return (
+        select(
+            Post.id, Post.content, Post.image_url, Post.hashtag, Post.created_at,
+            Post.user_token, Post.fictional_name, Post.reactions, ImageAsset.variants,
+        )
+        .outerjoin(ImageAsset, ImageAsset.source_url == Post.image_url)
+        .where(*where)
+    )
+
+
+def rows_to_posts(rows: Iterable) -> List[dict]:
+    """feed_select() rows as PostResponse-shaped dicts, with unflushed reactions added"""
+    deltas = reaction_buffer.deltas()
+    posts = []
+    for row in rows:
+        post = dict(zip(POST_FIELDS, row))
+        if post["reactions"] is None:
+            post["reactions"] = dict(DEFAULT_REACTIONS)
+        if post["fictional_name"] is None:
+            # Nullable column, but the schema promises a string
+            post["fictional_name"] = "Anonymous"
+        pending = deltas.get(post["id"]) if deltas else None
+        if pending:
+            reactions = dict(post["reactions"])
+            for reaction, delta in pending.items():
+                reactions[reaction] = reactions.get(reaction, 0) + delta
+            post["reactions"] = reactions
+        posts.append(post)
+    return posts
+
+
+def encode_post_list(posts: List[dict], total: int, page: int, limit: int,
+                     next_cursor: Optional[str] = None) -> bytes:
+    """A PostListResponse body, encoded straight to bytes with orjson"""
+    return orjson.dumps(
+        {"posts": posts, "total": total, "page": page, "limit": limit, "next_cursor": next_cursor},
+        option=ORJSON_OPTIONS,
+    )
@@ -0,0 +1,256 @@
+import asyncio
+import fcntl
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.counters import get_post_count
+from app.core.database import AsyncSessionLocal
+from app.core.pagination import paginate_rows
+from app.core.serialization import encode_post_list, feed_select, rows_to_posts
+from app.core.trending import TRENDING_HALF_LIFE_MINUTES, TRENDING_WINDOW_MINUTES, trending
+from app.models.models import Post
+
+logger = logging.getLogger(__name__)
+
+# Pre-rendered feed pages on disk for nginx to serve (see nginx.conf); off by default
+FEED_SNAPSHOTS = os.getenv("FEED_SNAPSHOTS", "0") == "1"
+# nginx's root is <dir>/current, a symlink to the newest complete version
+FEED_SNAPSHOT_DIR = os.getenv("FEED_SNAPSHOT_DIR") or os.path.join(os.path.dirname(__file__), "..", "..", "snapshots")
+# Pages of the global feed, and of each top hashtag, written per version
+FEED_SNAPSHOT_PAGES = int(os.getenv("FEED_SNAPSHOT_PAGES", "3"))
+FEED_SNAPSHOT_HASHTAG_PAGES = int(os.getenv("FEED_SNAPSHOT_HASHTAG_PAGES", "1"))
+# Top trending hashtags that get their own pages
+FEED_SNAPSHOT_HASHTAGS = int(os.getenv("FEED_SNAPSHOT_HASHTAGS", "10"))
+# Page size and trending limit the frontend asks for; nginx.conf only maps these
+FEED_SNAPSHOT_LIMIT = 20
+FEED_SNAPSHOT_TRENDING_LIMIT = 10
+# Re-render once writes pause this long, but never later than MAX_DELAY after the first;
+# keep MAX_DELAY below READ_YOUR_WRITES_SECONDS so writers never see their post missing
+FEED_SNAPSHOT_DEBOUNCE = float(os.getenv("FEED_SNAPSHOT_DEBOUNCE", "1"))
+FEED_SNAPSHOT_MAX_DELAY = float(os.getenv("FEED_SNAPSHOT_MAX_DELAY", "5"))
+# Re-render this often without writes too (trending decays, other hosts write)
+FEED_SNAPSHOT_REFRESH = float(os.getenv("FEED_SNAPSHOT_REFRESH", "60"))
+# Old versions left on disk for requests still reading them
+FEED_SNAPSHOT_KEEP = 3
+# Renders failing for longer than this take the snapshots down, so nginx goes back to the API
+FEED_SNAPSHOT_MAX_AGE = float(os.getenv("FEED_SNAPSHOT_MAX_AGE", "300"))
+
+# Hashtags that are safe as a path segment and in nginx.conf's regexes; others always hit the API
+SNAPSHOT_HASHTAG = re.compile(r"^[A-Za-z0-9_-]{1,50}$")
+_VERSION = re.compile(r"^v\d+$")
+
+_brotli = None
+
+
+def _brotli_module():
+    """The brotli module, or None when it isn't installed (pip install brotli)"""
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+            _brotli = brotli
+        except ImportError:
+            _brotli = False
+    return _brotli or None
+
+
+def page_path(hashtag: Optional[str], page: int) -> str:
+    if hashtag:
+        return f"hashtag/{hashtag}/page-{page}.json"
+    return f"posts/page-{page}.json"
+
+
+class FeedSnapshots:
+    """
+    Writes the hottest feed reads to static files: the first pages of the
+    global feed, the first pages of the top trending hashtags and the trending
+    list, rendered by the same functions as the API so the bytes match. Each
+    render goes to a new versioned directory with .gz (and .br, if brotli is
+    installed) next to every file, then the `current` symlink is swapped in
+    one rename, so nginx never sees a half-written version.
+
+    Writes call schedule(); renders are debounced. Every worker runs its own
+    writer, serialized by a lock file, so the last render wins.
+
+    Stale files would hide every newer post, so `current` is removed when a
+    worker shuts down, when the API starts with FEED_SNAPSHOTS off, and when
+    renders have failed for FEED_SNAPSHOT_MAX_AGE; nginx then serves from the
+    API until the next successful render.
+    """
+
+    def __init__(self, directory: str = FEED_SNAPSHOT_DIR):
+        self.directory = directory
+        self._dirty = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._rendering = False
+        self.version: Optional[str] = None
+        self._stats = {"renders": 0, "failures": 0, "coalesced": 0, "files": 0, "bytes": 0, "total_render_ms": 0.0}
+
+    def schedule(self):
+        """Mark the feed changed; the writer re-renders once writes pause"""
+        if self._task is None:
+            return
+        if self._dirty.is_set():
+            self._stats["coalesced"] += 1
+        self._dirty.set()
+
+    async def _page(self, db: AsyncSession, hashtag: Optional[str], page: int) -> Tuple[bytes, int]:
+        # Same queries and encoder as get_posts / get_hashtag_posts
+        filters = [Post.hashtag == hashtag] if hashtag else []
+        total = await get_post_count(db, select(Post).where(*filters), hashtag=hashtag)
+        rows, next_cursor = await paginate_rows(db, feed_select(*filters), FEED_SNAPSHOT_LIMIT, page=page)
+        return encode_post_list(rows_to_posts(rows), total, page, FEED_SNAPSHOT_LIMIT, next_cursor), total
+
+    async def _collect(self) -> Dict[str, bytes]:
+        files = {}
+        top = trending.top(FEED_SNAPSHOT_TRENDING_LIMIT)
+        hashtags = [None] + [item["hashtag"] for item in top[:FEED_SNAPSHOT_HASHTAGS] if SNAPSHOT_HASHTAG.match(item["hashtag"])]
+        async with AsyncSessionLocal() as db:
+            for hashtag in hashtags:
+                for page in range(1, (FEED_SNAPSHOT_HASHTAG_PAGES if hashtag else FEED_SNAPSHOT_PAGES) + 1):
+                    body, total = await self._page(db, hashtag, page)
+                    files[page_path(hashtag, page)] = body
+                    if page * FEED_SNAPSHOT_LIMIT >= total:
+                        break
+        # Byte for byte what FastAPI's JSONResponse makes of get_trending_hashtags
+        files[f"trending/limit-{FEED_SNAPSHOT_TRENDING_LIMIT}.json"] = json.dumps(
+            {"hashtags": top, "window_minutes": TRENDING_WINDOW_MINUTES, "half_life_minutes": TRENDING_HALF_LIFE_MINUTES},
+            ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+        ).encode("utf-8")
+        return files
+
+    def _write(self, files: Dict[str, bytes]) -> str:
+        """Write a complete version, point `current` at it, prune old ones (runs in a thread)"""
+        brotli = _brotli_module()
+        version = f"v{time.time_ns()}"
+        root = os.path.join(self.directory, version)
+        written = 0
+        for name, body in files.items():
+            path = os.path.join(root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            variants = [("", body), (".gz", gzip.compress(body, compresslevel=9, mtime=0))]
+            if brotli:
+                variants.append((".br", brotli.compress(body, quality=11)))
+            for suffix, data in variants:
+                with open(path + suffix, "wb") as out:
+                    out.write(data)
+                written += len(data)
+
+        current = os.path.join(self.directory, "current")
+        staged = current + ".new"
+        if os.path.lexists(staged):
+            os.remove(staged)
+        os.symlink(version, staged)
+        os.replace(staged, current)
+
+        versions = sorted((name for name in os.listdir(self.directory) if _VERSION.match(name)), key=lambda name: int(name[1:]))
+        for old in versions[:-FEED_SNAPSHOT_KEEP]:
+            shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
+        self._stats["files"] = len(files)
+        self._stats["bytes"] = written
+        return version
+
+    def _lock(self) -> int:
+        os.makedirs(self.directory, exist_ok=True)
+        fd = os.open(os.path.join(self.directory, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    async def render(self) -> str:
+        """Render and publish one version now; returns its name"""
+        started = time.perf_counter()
+        fd = await asyncio.to_thread(self._lock)
+        try:
+            files = await self._collect()
+            self.version = await asyncio.to_thread(self._write, files)
+        finally:
+            os.close(fd)
+        self._stats["renders"] += 1
+        self._stats["total_render_ms"] += (time.perf_counter() - started) * 1000
+        return self.version
+
+    async def _debounce(self):
+        """Return once writes have paused for DEBOUNCE, or MAX_DELAY after the first"""
+        deadline = time.monotonic() + FEED_SNAPSHOT_MAX_DELAY
+        while self._dirty.is_set():
+            self._dirty.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._dirty.wait(), min(FEED_SNAPSHOT_DEBOUNCE, remaining))
+            except asyncio.TimeoutError:
+                return
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), FEED_SNAPSHOT_REFRESH)
+            except asyncio.TimeoutError:
+                pass
+            await self._debounce()
+            self._rendering = True
+            try:
+                await self.render()
+            except Exception:
+                self._stats["failures"] += 1
+                logger.exception("Rendering feed snapshots failed")
+                if self.age() > FEED_SNAPSHOT_MAX_AGE:
+                    logger.error("Feed snapshots are %.0fs old; unpublishing them", self.age())
+                    self.unpublish()
+            finally:
+                self._rendering = False
+
+    def age(self) -> float:
+        """Seconds since the published version was swapped in (0 when none is)"""
+        try:
+            return time.time() - os.lstat(os.path.join(self.directory, "current")).st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    def unpublish(self):
+        """Remove the `current` link, so nginx falls back to the API"""
+        try:
+            os.remove(os.path.join(self.directory, "current"))
+        except FileNotFoundError:
+            pass
+        self.version = None
+
+    def start(self):
+        self._dirty = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="feed-snapshots")
+        # First version right away, so nginx has files soon after boot
+        self._dirty.set()
+
+    async def stop(self):
+        if self._task:
+            # Let a render in progress finish swapping `current`
+            while self._rendering:
+                await asyncio.sleep(0.05)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Nothing keeps the files fresh any more; other workers re-publish on their next render
+        self.unpublish()
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        renders = stats.pop("total_render_ms")
+        stats["avg_render_ms"] = round(renders / stats["renders"], 2) if stats["renders"] else 0.0
+        return dict(stats, enabled=self._task is not None, version=self.version, age_seconds=round(self.age(), 1),
+                    brotli=bool(_brotli_module()))
+
+
+feed_snapshots = FeedSnapshots()
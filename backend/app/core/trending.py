@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+
+from app.core.counters import dialect_insert
+from app.core.database import AsyncSessionLocal
+from app.models.models import HashtagActivity
+
+logger = logging.getLogger(__name__)
+
+TRENDING_WINDOW_MINUTES = int(os.getenv("TRENDING_WINDOW_MINUTES", "60"))
+# Activity loses half its weight every this many minutes
+TRENDING_HALF_LIFE_MINUTES = float(os.getenv("TRENDING_HALF_LIFE_MINUTES", "15"))
+# A post counts 1, a reaction this much
+TRENDING_REACTION_WEIGHT = float(os.getenv("TRENDING_REACTION_WEIGHT", "0.25"))
+TRENDING_PERSIST_INTERVAL = float(os.getenv("TRENDING_PERSIST_INTERVAL", "30"))
+TRENDING_RETENTION_DAYS = int(os.getenv("TRENDING_RETENTION_DAYS", "7"))
+# The ranking is recomputed at most this often; reads in between are a list slice
+TRENDING_REFRESH_SECONDS = 1.0
+TRENDING_MAX_RESULTS = 50
+
+POSTS, REACTIONS = 0, 1
+
+
+def _minute(timestamp: Optional[float] = None) -> int:
+    return int((timestamp if timestamp is not None else time.time()) // 60)
+
+
+class TrendingHashtags:
+    """
+    Per-hashtag, per-minute post and reaction counters over a sliding window.
+    Writes are a dict increment; the decayed ranking is recomputed at most once
+    per TRENDING_REFRESH_SECONDS. Unsaved increments are added to the
+    hashtag_activity table every TRENDING_PERSIST_INTERVAL seconds, and the
+    window is reloaded from it on startup, so a restart keeps what is trending.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # hashtag -> minute -> [posts, reactions]
+        self._buckets: Dict[str, Dict[int, List[int]]] = defaultdict(dict)
+        # (hashtag, minute) -> [posts, reactions] not yet written to the database
+        self._unsaved: Dict[Tuple[str, int], List[int]] = defaultdict(lambda: [0, 0])
+        self._ranking: List[dict] = []
+        self._ranked_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._persisting = False
+        self._closing = False
+        self._stats = {"persists": 0, "persist_failures": 0, "rows_persisted": 0}
+
+    def _record(self, hashtag: str, kind: int, n: int = 1):
+        minute = _minute()
+        with self._lock:
+            bucket = self._buckets[hashtag].setdefault(minute, [0, 0])
+            bucket[kind] += n
+            self._unsaved[(hashtag, minute)][kind] += n
+
+    def record_post(self, hashtag: str):
+        self._record(hashtag, POSTS)
+
+    def record_reaction(self, hashtag: str):
+        self._record(hashtag, REACTIONS)
+
+    def _expire(self, oldest: int):
+        """Slide the window: drop minutes before oldest (hold the lock)"""
+        for hashtag in list(self._buckets):
+            buckets = self._buckets[hashtag]
+            for minute in [m for m in buckets if m < oldest]:
+                del buckets[minute]
+            if not buckets:
+                del self._buckets[hashtag]
+
+    def _rank(self) -> List[dict]:
+        now = time.time() / 60
+        ranking = []
+        with self._lock:
+            self._expire(int(now) - TRENDING_WINDOW_MINUTES)
+            for hashtag, buckets in self._buckets.items():
+                score = posts = reactions = 0
+                for minute, (n_posts, n_reactions) in buckets.items():
+                    decay = 0.5 ** (max(0.0, now - minute - 1) / TRENDING_HALF_LIFE_MINUTES)
+                    score += (n_posts + TRENDING_REACTION_WEIGHT * n_reactions) * decay
+                    posts += n_posts
+                    reactions += n_reactions
+                ranking.append({"hashtag": hashtag, "score": round(score, 3), "posts": posts, "reactions": reactions})
+        ranking.sort(key=lambda item: (-item["score"], item["hashtag"]))
+        return ranking[:TRENDING_MAX_RESULTS]
+
+    def top(self, limit: int = 10) -> List[dict]:
+        """Highest scoring hashtags in the window, best first"""
+        now = time.monotonic()
+        if now - self._ranked_at >= TRENDING_REFRESH_SECONDS:
+            self._ranking = self._rank()
+            self._ranked_at = now
+        return self._ranking[:limit]
+
+    async def load(self):
+        """Fill the window from hashtag_activity (call once on startup)"""
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(HashtagActivity).where(HashtagActivity.minute >= _minute() - TRENDING_WINDOW_MINUTES)
+            )).scalars().all()
+        with self._lock:
+            # Rebuild from the table plus whatever has not been written yet
+            self._buckets = defaultdict(dict)
+            saved = [((row.hashtag, row.minute), (row.posts, row.reactions)) for row in rows]
+            for (hashtag, minute), (n_posts, n_reactions) in saved + list(self._unsaved.items()):
+                bucket = self._buckets[hashtag].setdefault(minute, [0, 0])
+                bucket[POSTS] += n_posts
+                bucket[REACTIONS] += n_reactions
+        self._ranked_at = 0.0
+
+    async def persist(self):
+        """Add unsaved increments to hashtag_activity and prune rows past retention"""
+        with self._lock:
+            # Also here, so the window stays bounded when nobody asks for the ranking
+            self._expire(_minute() - TRENDING_WINDOW_MINUTES)
+            unsaved, self._unsaved = self._unsaved, defaultdict(lambda: [0, 0])
+        if not unsaved:
+            return
+
+        rows = [
+            {"hashtag": hashtag, "minute": minute, "posts": n_posts, "reactions": n_reactions}
+            for (hashtag, minute), (n_posts, n_reactions) in sorted(unsaved.items())
+        ]
+        async with AsyncSessionLocal() as db:
+            try:
+                insert = dialect_insert(db)
+                if insert is not None:
+                    stmt = insert(HashtagActivity).values(rows)
+                    await db.execute(stmt.on_conflict_do_update(
+                        index_elements=[HashtagActivity.hashtag, HashtagActivity.minute],
+                        set_={
+                            "posts": HashtagActivity.posts + stmt.excluded.posts,
+                            "reactions": HashtagActivity.reactions + stmt.excluded.reactions,
+                        },
+                    ))
+                else:
+                    for row in rows:
+                        result = await db.execute(
+                            update(HashtagActivity)
+                            .where(HashtagActivity.hashtag == row["hashtag"], HashtagActivity.minute == row["minute"])
+                            .values(posts=HashtagActivity.posts + row["posts"],
+                                    reactions=HashtagActivity.reactions + row["reactions"])
+                        )
+                        if result.rowcount == 0:
+                            db.add(HashtagActivity(**row))
+                await db.execute(
+                    delete(HashtagActivity).where(HashtagActivity.minute < _minute() - TRENDING_RETENTION_DAYS * 1440)
+                )
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                logger.exception("Persisting trending counters failed; keeping %d rows for retry", len(rows))
+                with self._lock:
+                    for key, (n_posts, n_reactions) in unsaved.items():
+                        self._unsaved[key][POSTS] += n_posts
+                        self._unsaved[key][REACTIONS] += n_reactions
+                self._stats["persist_failures"] += 1
+                return
+        self._stats["persists"] += 1
+        self._stats["rows_persisted"] += len(rows)
+
+    async def _run(self):
+        while not self._closing:
+            await asyncio.sleep(TRENDING_PERSIST_INTERVAL)
+            self._persisting = True
+            try:
+                await self.persist()
+            finally:
+                self._persisting = False
+
+    async def start(self):
+        try:
+            await self.load()
+        except Exception:
+            # Trending starts empty rather than keeping the API from booting
+            logger.exception("Loading trending counters failed")
+        self._closing = False
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="trending-persist")
+
+    async def stop(self):
+        """Stop the persist loop and save whatever is left"""
+        self._closing = True
+        if self._task:
+            # Only interrupt the loop while it sleeps, never mid-write
+            if not self._persisting:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.persist()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["hashtags"] = len(self._buckets)
+            stats["unsaved_buckets"] = len(self._unsaved)
+        return stats
+
+
+trending = TrendingHashtags()
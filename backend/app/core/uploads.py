@@ -0,0 +1,164 @@
+import asyncio
+import os
+import tempfile
+import uuid
+from typing import List, Optional
+
+from fastapi import HTTPException, Request
+from multipart.multipart import MultipartParser, parse_options_header
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(5 * 1024 * 1024)))
+# Bytes buffered in memory before they are handed to the writer thread
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+# Room for multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File size must be less than {UPLOAD_MAX_BYTES // (1024 * 1024)}MB"
+    )
+
+
+class _ImagePartReader:
+    """
+    Collects parser callbacks for one multipart body. The callbacks are sync,
+    so they only record what happened; file I/O is done by the async caller.
+    """
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name
+        self.header_name = b""
+        self.header_value = b""
+        self.headers = {}
+        # The part currently being read is the image
+        self.in_file = False
+        self.file_seen = False
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.size = 0
+        self.data: List[bytes] = []
+        self.buffered = 0
+
+    def on_part_begin(self):
+        self.headers = {}
+        self.in_file = False
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.headers[self.header_name.lower()] = self.header_value
+        self.header_name = b""
+        self.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+        if options.get(b"name", b"").decode("latin-1") != self.field_name or b"filename" not in options:
+            return
+        if self.file_seen:
+            raise HTTPException(status_code=400, detail="Only one file may be uploaded")
+        self.in_file = self.file_seen = True
+        self.filename = options[b"filename"].decode("utf-8", "replace")
+        self.content_type = self.headers.get(b"content-type", b"").decode("latin-1")
+        # Checked here, before a single byte of the file is written
+        if not self.content_type.startswith("image/"):
+            raise HTTPException(status_code=400, detail="File must be an image")
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if not self.in_file:
+            return
+        self.size += end - start
+        if self.size > UPLOAD_MAX_BYTES:
+            raise _too_large()
+        self.data.append(data[start:end])
+        self.buffered += end - start
+
+    def on_part_end(self):
+        self.in_file = False
+
+    def take(self) -> bytes:
+        chunk = b"".join(self.data)
+        self.data = []
+        self.buffered = 0
+        return chunk
+
+
+def _open_temp(directory: str):
+    os.makedirs(directory, exist_ok=True)
+    # Same directory as the final file, so the rename below stays atomic
+    fd, path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    return os.fdopen(fd, "wb"), path
+
+
+def _finish(handle, temp_path: str, final_path: str):
+    handle.flush()
+    os.fsync(handle.fileno())
+    handle.close()
+    os.replace(temp_path, final_path)
+
+
+def _discard(handle, temp_path: str):
+    handle.close()
+    try:
+        os.unlink(temp_path)
+    except FileNotFoundError:
+        pass
+
+
+async def save_image_upload(request: Request, field_name: str = "file", upload_dir: str = UPLOAD_DIR) -> str:
+    """
+    Stream a multipart image upload to upload_dir and return the stored filename.
+    The size cap is enforced while reading (and up front from Content-Length),
+    so at most one chunk of the file is held in memory. Bytes go to a temp file
+    on a worker thread and are renamed into place only once complete.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD:
+        raise _too_large()
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    reader = _ImagePartReader(field_name)
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": reader.on_part_begin,
+        "on_part_data": reader.on_part_data,
+        "on_part_end": reader.on_part_end,
+        "on_header_field": reader.on_header_field,
+        "on_header_value": reader.on_header_value,
+        "on_header_end": reader.on_header_end,
+        "on_headers_finished": reader.on_headers_finished,
+    })
+
+    handle, temp_path = await asyncio.to_thread(_open_temp, upload_dir)
+    try:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD:
+                # Non-file fields count too; don't let them grow without bound
+                raise _too_large()
+            parser.write(chunk)
+            if reader.buffered >= UPLOAD_CHUNK_SIZE:
+                await asyncio.to_thread(handle.write, reader.take())
+        parser.finalize()
+
+        if not reader.file_seen:
+            raise HTTPException(status_code=400, detail="No image file in the upload")
+        if reader.buffered:
+            await asyncio.to_thread(handle.write, reader.take())
+
+        file_extension = os.path.splitext(reader.filename)[1] if reader.filename else ".jpg"
+        unique_filename = f"{uuid.uuid4()}{file_extension or '.jpg'}"
+        await asyncio.to_thread(_finish, handle, temp_path, os.path.join(upload_dir, unique_filename))
+        return unique_filename
+    except BaseException:
+        await asyncio.to_thread(_discard, handle, temp_path)
+        raise
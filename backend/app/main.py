@@ -1,23 +1,22 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 from app.api.routes import posts
-from app.core.database import engine
-from app.models.models import Base
+from app.core.database import async_engine
+from app.core.replicas import read_router
+from app.core.reaction_buffer import REACTION_WRITE_BEHIND, reaction_buffer
+from app.core.reaction_dedup import REACTION_DEDUP, reaction_dedup
+from app.core.live_feed import LIVE_FEED_RELAY, live_feed
+from app.core.rate_limit import rate_limiter
+from app.core.feed_cache import feed_cache
+from app.core.images import image_pipeline
+from app.core.trending import trending
+from app.core.snapshots import FEED_SNAPSHOTS, feed_snapshots
+from app.core.ingest import INGEST_BATCHED, scan_ingestor, wild_thought_ingestor
+from app.core.metrics import MetricsMiddleware, metrics, pool_status
 import os
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-# Import and run the indexes script
-try:
-    from add_indexes import add_indexes
-    add_indexes()
-except Exception as e:
-    print(f"Warning: Could not add indexes: {e}")
+# Schema and indexes are managed by Alembic (alembic upgrade head), not at startup
 
 app = FastAPI(
     title="Dumps API",
@@ -25,10 +24,7 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Rate limiting setup
-limiter = Limiter(key_func=get_remote_address)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Rate limits are route dependencies (app/core/rate_limit.py), shared by all workers
 
 # CORS middleware for frontend
 # CORS middleware for frontend
@@ -49,6 +45,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency, queries and DB time for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(posts.router, prefix="/api/posts", tags=["posts"])
 
@@ -60,6 +59,10 @@ app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 from app.api.routes import scans
 app.include_router(scans.router, prefix="/api/scans", tags=["scans"])
 
+# Bulk import/export (disabled unless ADMIN_TOKEN is set)
+from app.api.routes import admin
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+
 # Serve uploaded images
 uploads_path = os.path.join(os.path.dirname(__file__), "..", "uploads")
 if os.path.exists(uploads_path):
@@ -73,6 +76,65 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def get_metrics():
+    return {
+        **metrics.snapshot(),
+        "pool": pool_status(async_engine.sync_engine),
+        "read_replicas": read_router.stats(),
+        "reaction_buffer": reaction_buffer.stats(),
+        "reaction_dedup": reaction_dedup.stats(),
+        "feed_snapshots": feed_snapshots.stats(),
+        "live_feed": live_feed.stats(),
+        "feed_cache": feed_cache.stats(),
+        "image_pipeline": image_pipeline.stats(),
+        "trending": trending.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "ingest": {
+            "scans": scan_ingestor.stats(),
+            "wild_thoughts": wild_thought_ingestor.stats()
+        }
+    }
+
+@app.on_event("startup")
+async def start_background_workers():
+    await read_router.start()
+    await trending.start()
+    if REACTION_WRITE_BEHIND:
+        reaction_buffer.start()
+    if REACTION_DEDUP:
+        reaction_dedup.start()
+    if INGEST_BATCHED:
+        scan_ingestor.start()
+        wild_thought_ingestor.start()
+    if LIVE_FEED_RELAY and async_engine.dialect.name == "postgresql":
+        # Every worker streams every worker's events
+        live_feed.start(async_engine.url)
+    if FEED_SNAPSHOTS:
+        feed_snapshots.start()
+    else:
+        # Files left from when snapshots were on would be served forever
+        feed_snapshots.unpublish()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    # Drain buffered reactions so a clean restart loses nothing
+    if REACTION_WRITE_BEHIND:
+        reaction_buffer.stop()
+    # Same for queued scans and wild thoughts; needs the engine, so before dispose()
+    if INGEST_BATCHED:
+        await scan_ingestor.stop()
+        await wild_thought_ingestor.stop()
+    image_pipeline.shutdown()
+    if FEED_SNAPSHOTS:
+        await feed_snapshots.stop()
+    await trending.stop()
+    await live_feed.stop()
+    if REACTION_DEDUP:
+        await reaction_dedup.stop()
+    await read_router.stop()
+    await async_engine.dispose()
+
 # Handle OPTIONS requests for CORS
 @app.options("/{full_path:path}")
 async def options_handler(full_path: str):
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from sqlalchemy import Column, Date, Float, Index, Integer, LargeBinary, String, Text, DateTime, JSON, inspect
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -18,6 +19,31 @@ class Post(Base):
         "laugh": 0,
         "angry": 0
     })
+    
+    # Resized/WebP copies of image_url, once the image pipeline has built them
+    image_asset = relationship(
+        "ImageAsset",
+        primaryjoin="foreign(Post.image_url) == ImageAsset.source_url",
+        uselist=False,
+        viewonly=True,
+        lazy="selectin",
+    )
+    
+    # Feed access paths - created by alembic/versions/0002_feed_indexes.py
+    # On Postgres the table is partitioned by month on created_at (0005), so
+    # the real primary key there is (id, created_at)
+    __table_args__ = (
+        Index("ix_posts_hashtag_created_id", "hashtag", created_at.desc(), id.desc()),
+        Index("ix_posts_user_token_created_id", "user_token", created_at.desc(), id.desc()),
+        Index("ix_posts_created_id", created_at.desc(), id.desc()),
+    )
+    
+    @property
+    def image_variants(self):
+        # Never trigger a lazy load here - it would need an await on async sessions
+        if "image_asset" in inspect(self).unloaded or self.image_asset is None:
+            return None
+        return self.image_asset.variants
 
 class ScanTracker(Base):
     __tablename__ = "scan_tracker"
@@ -27,6 +53,13 @@ class ScanTracker(Base):
     user_agent = Column(String(255), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class ScanDaily(Base):
+    __tablename__ = "scan_daily"
+    
+    # Scans per UTC day for rows the retention job compacted out of scan_tracker
+    day = Column(Date, primary_key=True)
+    scans = Column(Integer, nullable=False, default=0)
+
 class WildThought(Base):
     __tablename__ = "wild_thoughts"
     
@@ -34,3 +67,66 @@ class WildThought(Base):
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     ip_address = Column(String(45), nullable=True)
+    
+    __table_args__ = (
+        Index("ix_wild_thoughts_created_id", created_at.desc(), id.desc()),
+    )
+
+class PostCount(Base):
+    __tablename__ = "post_counts"
+    
+    # "global", "hashtag:<name>" or "user:<token>"
+    key = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class FeedVersion(Base):
+    __tablename__ = "feed_versions"
+    
+    # "global", "hashtag:<name>" or "all" - bumped in the same transaction as every
+    # feed write, so feed ETags agree across workers (see app/core/etag.py)
+    key = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    # Unix time of the last bump, for Last-Modified
+    modified = Column(Float, nullable=False)
+
+class Counter(Base):
+    __tablename__ = "counters"
+    
+    # Named running totals, e.g. "scans" - read in O(1) instead of COUNT(*)
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class ImageAsset(Base):
+    __tablename__ = "image_assets"
+    
+    # The image_url posts refer to (/uploads/... or an S3 URL)
+    source_url = Column(String(500), primary_key=True)
+    # sha256 of the original bytes; identical uploads share one set of variants
+    digest = Column(String(64), nullable=False, index=True)
+    # [{"url", "width", "height", "format", "bytes"}, ...] smallest first
+    variants = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class HashtagActivity(Base):
+    __tablename__ = "hashtag_activity"
+    
+    # Per-minute activity behind /hashtags/trending; minute = unix time // 60
+    hashtag = Column(String(50), primary_key=True)
+    minute = Column(Integer, primary_key=True)
+    posts = Column(Integer, nullable=False, default=0)
+    reactions = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        # Loading the recent window on startup and pruning old rows
+        Index("ix_hashtag_activity_minute", "minute"),
+    )
+
+class ReactionDedup(Base):
+    __tablename__ = "reaction_dedup"
+    
+    # Who has reacted to a post, as sorted 32-bit fingerprints of (post, reaction, user_token)
+    # packed little-endian - see app/core/reaction_dedup.py
+    post_id = Column(Integer, primary_key=True)
+    fingerprints = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -17,6 +17,14 @@ class PostUpdate(BaseModel):
     hashtag: Optional[str] = None
     fictional_name: Optional[str] = None
 
+# One resized/re-encoded copy of a post image
+class ImageVariant(BaseModel):
+    url: str
+    width: int
+    height: int
+    format: str
+    bytes: int
+
 # Schema for post response
 class PostResponse(BaseModel):
     id: int
@@ -27,6 +35,8 @@ class PostResponse(BaseModel):
     user_token: str
     fictional_name: str
     reactions: Dict[str, int]
+    # Smallest first; None until the image pipeline has processed image_url
+    image_variants: Optional[List[ImageVariant]] = None
     
     class Config:
         from_attributes = True
@@ -36,4 +46,12 @@ class PostListResponse(BaseModel):
     posts: List[PostResponse]
     total: int
     page: int
-    limit: int
\ No newline at end of file
+    limit: int
+    next_cursor: Optional[str] = None
+
+# Schema for search results (best match first)
+class PostSearchResponse(BaseModel):
+    posts: List[PostResponse]
+    query: str
+    limit: int
+    next_cursor: Optional[str] = None
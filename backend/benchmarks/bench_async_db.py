@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: blocking sync Session vs AsyncSession inside async route handlers.
+
+Both apps run the same slow query per request. The "sync" app reproduces the old
+pattern (async def + sync Session, which blocks the event loop); the "async" app
+uses the async engine the API now runs on. Against Postgres, throughput stays
+flat for sync and scales with concurrency for async. On SQLite the query runs
+in-process and holds the GIL, so both stay flat - use Postgres for real numbers.
+
+Usage (needs httpx):
+    DATABASE_URL=postgresql://... python benchmarks/bench_async_db.py [requests] [concurrency ...]
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal, async_engine, engine, get_db
+
+if engine.dialect.name == "postgresql":
+    SLOW_QUERY = text("SELECT pg_sleep(0.02)")
+else:
+    # No sleep() in SQLite: burn a few milliseconds in a recursive CTE instead
+    SLOW_QUERY = text(
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 20000) "
+        "SELECT count(*) FROM n"
+    )
+
+sync_app = FastAPI()
+async_app = FastAPI()
+
+@sync_app.get("/query")
+async def sync_query():
+    db = SessionLocal()
+    try:
+        db.execute(SLOW_QUERY)
+    finally:
+        db.close()
+    return {"ok": True}
+
+@async_app.get("/query")
+async def async_query(db=Depends(get_db)):
+    await db.execute(SLOW_QUERY)
+    return {"ok": True}
+
+async def run(app, requests: int, concurrency: int) -> dict:
+    latencies = []
+    slots = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with slots:
+                start = time.perf_counter()
+                response = await client.get("/query")
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests_per_sec": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
+
+async def main(requests: int, levels):
+    results = {"dialect": engine.dialect.name, "requests": requests, "sync": [], "async": []}
+    for concurrency in levels:
+        results["sync"].append(await run(sync_app, requests, concurrency))
+        results["async"].append(await run(async_app, requests, concurrency))
+    await async_engine.dispose()
+    return results
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    levels = [int(n) for n in sys.argv[2:]] or [1, 4, 16, 64]
+    print(json.dumps(asyncio.run(main(requests, levels)), indent=2))
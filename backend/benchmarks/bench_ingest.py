@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one INSERT + COMMIT per row vs the batched ingestion queue.
+
+"direct" is what /wild-thought does by default (a transaction per request);
+"batched" pushes the same rows through BatchIngestor, which writes multi-row
+INSERTs. Both write wild_thoughts rows tagged with a marker that is deleted
+afterwards. Reports inserts/sec per concurrency level.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_ingest.py [rows] [concurrency ...]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+from sqlalchemy import delete
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import AsyncSessionLocal, async_engine, engine
+from app.core.ingest import BatchIngestor
+from app.models.models import WildThought
+
+MARKER = "bench_ingest"
+
+async def run_direct(rows: int, concurrency: int) -> float:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with slots:
+            async with AsyncSessionLocal() as db:
+                db.add(WildThought(content=f"{MARKER} {i}", ip_address="127.0.0.1"))
+                await db.commit()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(rows)))
+    return time.perf_counter() - start
+
+async def run_batched(rows: int, concurrency: int) -> float:
+    ingestor = BatchIngestor("bench", WildThought)
+    ingestor.start()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with slots:
+            await ingestor.put({"content": f"{MARKER} {i}", "ip_address": "127.0.0.1"})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(rows)))
+    # Count the time until every row is actually committed
+    await ingestor.stop()
+    elapsed = time.perf_counter() - start
+    assert ingestor.stats()["rows_flushed"] == rows
+    return elapsed
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(WildThought).where(WildThought.content.startswith(MARKER)))
+        await db.commit()
+
+async def main(rows: int, levels):
+    results = {"dialect": engine.dialect.name, "rows": rows, "direct": [], "batched": []}
+    for concurrency in levels:
+        for mode, runner in (("direct", run_direct), ("batched", run_batched)):
+            elapsed = await runner(rows, concurrency)
+            await cleanup()
+            results[mode].append({
+                "concurrency": concurrency,
+                "inserts_per_sec": round(rows / elapsed, 1),
+                "elapsed_s": round(elapsed, 3),
+            })
+    await async_engine.dispose()
+    return results
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    levels = [int(n) for n in sys.argv[2:]] or [1, 16, 64]
+    print(json.dumps(asyncio.run(main(rows, levels)), indent=2))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: presigned PUT URL latency, new boto3 client per call vs the shared client.
+
+Presigning is done locally (no request reaches S3), so this runs offline with
+dummy credentials. "per_call" is what /upload/presigned-url used to do;
+"shared" is app.core.s3.presign_put; "batch_10" presigns ten uploads the way
+/upload/presigned-urls does.
+
+Usage:
+    python benchmarks/bench_presign.py [iterations]
+"""
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+# Offline signing only needs some credentials and a region
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "AKIABENCHMARK")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark-secret")
+os.environ.setdefault("AWS_REGION", "ca-central-1")
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import boto3
+
+from app.core.s3 import get_s3_client, presign_put
+
+BUCKET = "bench-bucket"
+
+def per_call():
+    client = boto3.client(
+        's3',
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+        region_name=os.getenv('AWS_REGION')
+    )
+    client.generate_presigned_url(
+        'put_object',
+        Params={'Bucket': BUCKET, 'Key': f"images/{uuid.uuid4()}.jpg", 'ContentType': "image/jpeg"},
+        ExpiresIn=3600
+    )
+
+def shared():
+    presign_put(BUCKET, f"images/{uuid.uuid4()}.jpg", "image/jpeg")
+
+def batch_10():
+    for _ in range(10):
+        presign_put(BUCKET, f"images/{uuid.uuid4()}.jpg", "image/jpeg")
+
+def measure(fn, iterations: int) -> dict:
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+    }
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    start = time.perf_counter()
+    get_s3_client()
+    first_client_ms = (time.perf_counter() - start) * 1000
+
+    results = {
+        "shared_client_build_ms": round(first_client_ms, 3),
+        "per_call": measure(per_call, iterations),
+        "shared": measure(shared, iterations),
+        "batch_10": measure(batch_10, max(1, iterations // 10)),
+    }
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of one rate limit check per backend, and whether a limit holds
+across worker processes.
+
+"latency" times RateLimiter.hit() on a warm bucket. "workers" starts several
+processes that all hammer one bucket of capacity N with no refill to speak of;
+a shared backend lets exactly N requests through in total, a per-process one
+lets N through in every process. Redis is measured only when the redis
+package is installed and RATE_LIMIT_REDIS_URL answers.
+
+Usage:
+    python benchmarks/bench_rate_limit.py [checks] [workers]
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.rate_limit import RATE_LIMIT_REDIS_URL, MemoryBackend, RateLimiter, RedisBackend, SharedMemoryBackend, SQLiteBackend
+
+CAPACITY = 1000
+# One token a day: effectively no refill during the run
+RATE = 1 / 86400
+
+
+def make_backend(name: str, path: str):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "shm":
+        return SharedMemoryBackend(path + ".buckets", slots=65536)
+    if name == "sqlite":
+        return SQLiteBackend(path + ".db")
+    return RedisBackend(RATE_LIMIT_REDIS_URL)
+
+
+async def measure_latency(name: str, path: str, checks: int) -> float:
+    limiter = RateLimiter(enabled=True)
+    limiter.use(make_backend(name, path))
+    # Warm up, then time checks spread over a few keys like real routes/clients
+    for i in range(100):
+        await limiter.hit(f"bench:{i % 10}", 10 ** 9, 1000.0)
+    start = time.perf_counter()
+    for i in range(checks):
+        await limiter.hit(f"bench:{i % 10}", 10 ** 9, 1000.0)
+    return (time.perf_counter() - start) / checks * 1e6
+
+
+def worker(name: str, path: str, attempts: int, key: str, results):
+    async def run():
+        backend = make_backend(name, path)
+        allowed = 0
+        for _ in range(attempts):
+            ok, _ = await backend.take(key, CAPACITY, RATE)
+            allowed += ok
+        return allowed
+
+    results.put(asyncio.run(run()))
+
+
+def measure_workers(name: str, path: str, workers: int) -> int:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    key = f"bench-workers:{time.time()}"
+    processes = [ctx.Process(target=worker, args=(name, path, CAPACITY * 2, key, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    allowed = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return allowed
+
+
+def redis_available() -> bool:
+    try:
+        import redis
+        redis.Redis.from_url(RATE_LIMIT_REDIS_URL, socket_connect_timeout=0.5).ping()
+        return True
+    except Exception:
+        return False
+
+
+def main():
+    checks = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    backends = ["memory", "shm", "sqlite"] + (["redis"] if redis_available() else [])
+
+    results = {"checks": checks, "workers": workers, "capacity": CAPACITY, "backends": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rate-limit")
+        for name in backends:
+            allowed = measure_workers(name, path, workers)
+            results["backends"][name] = {
+                "us_per_check": round(asyncio.run(measure_latency(name, path, checks)), 2),
+                "allowed_across_workers": allowed,
+                "enforced_globally": allowed == CAPACITY,
+            }
+    if "redis" not in backends:
+        results["redis"] = f"skipped: no redis package or no server at {RATE_LIMIT_REDIS_URL}"
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the per-post reaction dedup fingerprint sets
+(app/core/reaction_dedup.py) under N reactions, no database involved.
+
+Every reaction is a distinct (post, reaction type, token), spread over the
+posts with a Zipf-like skew (a few viral posts, a long tail), so an exact
+index would answer "not reacted yet" every time; each "already reacted" on
+insert is a false positive. Afterwards the same number of never-used tokens
+is probed against random posts to measure the lookup false-positive rate,
+which is compared with the expected mean of n_post / 2**32 per probe. Memory is
+the tables' own size next to what an exact (post_id, user_token, reaction)
+row per tap would need, plus the process's peak RSS.
+
+Usage:
+    python benchmarks/bench_reaction_dedup.py [reactions] [posts] [probes]
+"""
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The module needs a database URL to import; the benchmark never connects
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.core.reaction_dedup import REACTION_DEDUP_POST_BYTES, FingerprintSet, fingerprint
+from app.core.reactions import REACTION_TYPES
+
+# A Postgres row (post_id int4, user_token varchar(36), reaction varchar(16)) plus
+# a btree entry on all three: ~24 header + ~60 data + ~70 index bytes
+EXACT_ROW_BYTES = 154
+
+
+def main(reactions: int, posts: int, probes: int):
+    rng = random.Random(42)
+    # Zipf-ish popularity: post i gets weight 1 / (i + 1)
+    weights = [1 / (i + 1) for i in range(posts)]
+    post_ids = rng.choices(range(1, posts + 1), weights=weights, k=reactions)
+    max_slots = max(8, 1 << ((REACTION_DEDUP_POST_BYTES // 4).bit_length() - 1))
+    sets = {}
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    insert_false_positives = overflows = 0
+    start = time.perf_counter()
+    for i, post_id in enumerate(post_ids):
+        fps = sets.get(post_id)
+        if fps is None:
+            fps = sets[post_id] = FingerprintSet()
+        fp = fingerprint(post_id, REACTION_TYPES[i & 3], f"user-{i:012d}")
+        if fp in fps:
+            insert_false_positives += 1
+        elif not fps.add(fp, max_slots):
+            overflows += 1
+    insert_seconds = time.perf_counter() - start
+
+    probe_posts = rng.choices(range(1, posts + 1), weights=weights, k=probes)
+    probe_false_positives = 0
+    start = time.perf_counter()
+    for i, post_id in enumerate(probe_posts):
+        fps = sets.get(post_id)
+        if fps is not None and fingerprint(post_id, REACTION_TYPES[i & 3], f"never-{i:012d}") in fps:
+            probe_false_positives += 1
+    probe_seconds = time.perf_counter() - start
+
+    stored = sum(len(fps) for fps in sets.values())
+    table_bytes = sum(fps.nbytes for fps in sets.values())
+    expected_fp = sum(len(sets[post_id]) if post_id in sets else 0 for post_id in probe_posts) / probes / 2 ** 32
+    sizes = sorted(len(fps) for fps in sets.values())
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        "reactions": reactions,
+        "posts_reacted": len(sets),
+        "largest_post": sizes[-1],
+        "median_post": sizes[len(sizes) // 2],
+        "fingerprints_stored": stored,
+        "overflows": overflows,
+        "insert": {
+            "us_per_toggle": round(insert_seconds / reactions * 1e6, 3),
+            "false_positives": insert_false_positives,
+            "false_positive_rate": insert_false_positives / reactions,
+        },
+        "lookup": {
+            "probes": probes,
+            "us_per_check": round(probe_seconds / probes * 1e6, 3),
+            "false_positives": probe_false_positives,
+            "false_positive_rate": probe_false_positives / probes,
+            "expected_rate": expected_fp,
+        },
+        "memory": {
+            "table_bytes": table_bytes,
+            "bytes_per_reaction": round(table_bytes / stored, 2),
+            "stored_bytes": stored * 4,
+            "exact_rows_estimate_bytes": stored * EXACT_ROW_BYTES,
+            "peak_rss_growth_mb": round((rss_after - rss_before) / 1024, 1),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    reactions = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    posts = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    probes = int(sys.argv[3]) if len(sys.argv) > 3 else 1_000_000
+    main(reactions, posts, probes)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one feed page through ORM objects + pydantic vs the Core rows +
+orjson fast path (app/core/serialization.py).
+
+"orm_fastapi" is a response_model route: select(Post) into the identity map,
+PostListResponse validation from attributes, then FastAPI-style dump + json.
+"orm_model_dump" is what the cached feed routes did: the same load, then
+model_dump_json(). "fast_path" is feed_select() + rows_to_posts() +
+encode_post_list(). Each is timed end to end (query included) and for the
+encoding step alone, and all three must produce the same JSON document.
+Marker posts are added if the table is too small and deleted afterwards.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_serialization.py [limit] [iterations]
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import delete, func, select
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import AsyncSessionLocal, async_engine, engine
+from app.core.pagination import page_statement
+from app.core.reaction_buffer import reaction_buffer
+from app.core.serialization import encode_post_list, feed_select, rows_to_posts
+from app.models.models import Post
+from app.schemas.schemas import PostListResponse
+
+MARKER = "bench_serialization"
+
+
+async def load_orm(limit: int):
+    async with AsyncSessionLocal() as db:
+        stmt = page_statement(select(Post), db.bind.dialect.name, limit)
+        posts = list((await db.execute(stmt)).scalars().all()[:limit])
+        reaction_buffer.overlay(posts)
+        return posts
+
+
+async def load_rows(limit: int):
+    async with AsyncSessionLocal() as db:
+        stmt = page_statement(feed_select(), db.bind.dialect.name, limit)
+        return (await db.execute(stmt)).all()[:limit]
+
+
+def encode_fastapi(posts, limit: int) -> bytes:
+    model = PostListResponse.model_validate({"posts": posts, "total": 0, "page": 1, "limit": limit})
+    content = model.model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def encode_model_dump(posts, limit: int) -> bytes:
+    return PostListResponse(posts=posts, total=0, page=1, limit=limit).model_dump_json().encode()
+
+
+def encode_fast(rows, limit: int) -> bytes:
+    return encode_post_list(rows_to_posts(rows), 0, 1, limit)
+
+
+async def timed(fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        if asyncio.iscoroutine(result):
+            result = await result
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, samples
+
+
+def summary(samples) -> dict:
+    return {"p50_ms": round(statistics.median(samples), 3), "mean_ms": round(statistics.fmean(samples), 3)}
+
+
+async def ensure_posts(limit: int) -> bool:
+    async with AsyncSessionLocal() as db:
+        existing = await db.scalar(select(func.count()).select_from(Post))
+        if existing >= limit:
+            return False
+        db.add_all([
+            Post(content=f"{MARKER} {i} " + "lorem ipsum " * 10, hashtag="bench",
+                 user_token="bench-token", fictional_name="Bench")
+            for i in range(limit - existing)
+        ])
+        await db.commit()
+        return True
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Post).where(Post.content.startswith(MARKER)))
+        await db.commit()
+
+
+async def main(limit: int, iterations: int):
+    added = await ensure_posts(limit)
+    try:
+        # Warm caches and connections
+        await load_orm(limit)
+        await load_rows(limit)
+
+        paths = {
+            "orm_fastapi": (load_orm, encode_fastapi),
+            "orm_model_dump": (load_orm, encode_model_dump),
+            "fast_path": (load_rows, encode_fast),
+        }
+        results = {"dialect": engine.dialect.name, "limit": limit, "iterations": iterations}
+        bodies = {}
+        for name, (load, encode) in paths.items():
+            async def end_to_end():
+                return encode(await load(limit), limit)
+
+            body, total = await timed(end_to_end, iterations)
+            loaded = await load(limit)
+            _, encode_only = await timed(lambda: encode(loaded, limit), iterations)
+            bodies[name] = json.loads(body)
+            results[name] = {"end_to_end": summary(total), "encode_only": summary(encode_only), "bytes": len(body)}
+
+        results["identical_output"] = all(body == bodies["fast_path"] for body in bodies.values())
+        base = results["orm_fastapi"]
+        results["speedup_vs_orm_fastapi"] = {
+            "end_to_end": round(base["end_to_end"]["p50_ms"] / results["fast_path"]["end_to_end"]["p50_ms"], 2),
+            "encode_only": round(base["encode_only"]["p50_ms"] / results["fast_path"]["encode_only"]["p50_ms"], 2),
+        }
+    finally:
+        if added:
+            await cleanup()
+        await async_engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(json.dumps(asyncio.run(main(limit, iterations)), indent=2))
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Load test: run the API under uvicorn against a seeded database and drive a
+realistic traffic mix at fixed concurrency levels.
+
+Without --database-url a throwaway SQLite fixture is created, migrated and
+seeded. With --database-url (e.g. a local Postgres) the schema is migrated and
+seeded in place unless --no-seed is given; seeding appends rows, so point it
+at a scratch database. Rate limits are switched off for the server under test.
+
+Each virtual user loops over scenarios picked by weight from the mix:
+  scroll   GET /posts, then follows next_cursor for two more pages
+  hashtag  GET /hashtags/{hashtag}/posts
+  poll     GET /posts/new with If-None-Match, like the frontend poller
+  react    POST /post/{id}/react
+  create   POST /create
+  scan     POST /api/scans/track
+
+Reports throughput plus p50/p95/p99/max latency (ms) and status counts per
+endpoint and concurrency level as JSON. --compare diffs two reports and exits
+1 if any endpoint's p95 got worse by more than --threshold percent.
+
+Usage:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --posts 100000 --concurrency 10 50 100 --duration 30 -o run.json
+    python benchmarks/load_test.py --database-url postgresql://localhost/dumps_bench --workers 4
+    python benchmarks/load_test.py --mix read --concurrency 200
+    python benchmarks/load_test.py --compare baseline.json run.json --threshold 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+MIXES = {
+    "realistic": {"scroll": 40, "hashtag": 20, "poll": 20, "react": 10, "create": 5, "scan": 5},
+    "read": {"scroll": 60, "hashtag": 30, "poll": 10},
+    "write": {"react": 40, "create": 40, "scan": 20},
+}
+SCROLL_PAGES = 3
+PAGE_SIZE = 20
+REACTIONS = ["thumbs_up", "heart", "laugh", "angry"]
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# Fixture
+
+def migrate(database_url: str):
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=BACKEND_DIR, env=dict(os.environ, DATABASE_URL=database_url),
+        check=True, capture_output=True,
+    )
+
+
+def _post_lines(count: int, hashtags, users, rng: random.Random):
+    start = datetime.now(timezone.utc) - timedelta(days=30)
+    step = timedelta(days=30) / max(count, 1)
+    for i in range(count):
+        yield json.dumps({
+            "content": f"load test post {i} " + " ".join(rng.choices(["exam", "coffee", "library", "deadline", "party", "rent"], k=6)),
+            "hashtag": rng.choice(hashtags),
+            "user_token": rng.choice(users),
+            "fictional_name": "Anonymous",
+            "created_at": (start + step * i).isoformat(),
+            "reactions": {reaction: rng.randint(0, 20) for reaction in REACTIONS},
+        }) + "\n"
+
+
+def _thought_lines(count: int):
+    for i in range(count):
+        yield json.dumps({"content": f"load test thought {i}"}) + "\n"
+
+
+def _scan_lines(count: int):
+    for i in range(count):
+        yield json.dumps({"ip_address": f"10.0.{i // 256 % 256}.{i % 256}", "user_agent": "load-test"}) + "\n"
+
+
+def seed(args, hashtags, users) -> dict:
+    """Bulk load the fixture with app.core.bulk (COPY on Postgres)"""
+    os.environ["DATABASE_URL"] = args.database_url
+    from sqlalchemy import func, select
+    from app.core.bulk import import_rows
+    from app.core.database import engine
+    from app.models.models import Post
+
+    rng = random.Random(args.seed)
+    extra = max(args.posts // 10, 1)
+    seeded = {
+        "posts": import_rows(engine, "posts", "ndjson", _post_lines(args.posts, hashtags, users, rng)),
+        "wild_thoughts": import_rows(engine, "wild_thoughts", "ndjson", _thought_lines(extra)),
+        "scans": import_rows(engine, "scans", "ndjson", _scan_lines(extra)),
+    }
+    with engine.connect() as conn:
+        max_id = conn.scalar(select(func.max(Post.id))) or 0
+    engine.dispose()
+    return {"seeded": seeded, "max_post_id": max_id}
+
+
+# Server
+
+def start_server(args, port: int) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=args.database_url, RATE_LIMIT_ENABLED="0", IMAGE_PIPELINE="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"API server exited with code {server.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("API server did not start within 60s")
+
+
+# Load
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.recording = False
+
+    def add(self, endpoint: str, seconds: float, status):
+        if not self.recording:
+            return
+        self.latencies[endpoint].append(seconds * 1000)
+        self.statuses[endpoint][str(status)] += 1
+        if status == "error" or int(status) >= 400:
+            self.errors[endpoint] += 1
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values.sort()
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors[endpoint],
+                "rps": round(len(values) / elapsed, 1),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "max_ms": round(values[-1], 2),
+                "mean_ms": round(sum(values) / len(values), 2),
+                "status": dict(self.statuses[endpoint]),
+            }
+        total = sum(item["requests"] for item in endpoints.values())
+        return {
+            "requests": total,
+            "errors": sum(item["errors"] for item in endpoints.values()),
+            "rps": round(total / elapsed, 1),
+            "endpoints": endpoints,
+        }
+
+
+class VirtualUser:
+    def __init__(self, client, recorder: Recorder, hashtags, max_post_id: int, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.hashtags = hashtags
+        self.max_post_id = max_post_id
+        self.rng = rng
+        self.token = str(uuid.uuid4())
+        self.poll_etag = None
+        self.since = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+
+    async def call(self, endpoint: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception:
+            self.recorder.add(endpoint, time.perf_counter() - started, "error")
+            return None
+        self.recorder.add(endpoint, time.perf_counter() - started, response.status_code)
+        return response
+
+    async def scroll(self):
+        params = {"limit": PAGE_SIZE}
+        for _ in range(SCROLL_PAGES):
+            response = await self.call("GET /api/posts/posts", "GET", "/api/posts/posts", params=params)
+            if response is None or response.status_code != 200:
+                return
+            cursor = response.json().get("next_cursor")
+            if not cursor:
+                return
+            params = {"limit": PAGE_SIZE, "cursor": cursor}
+
+    async def hashtag(self):
+        await self.call(
+            "GET /api/posts/hashtags/{hashtag}/posts", "GET",
+            f"/api/posts/hashtags/{self.rng.choice(self.hashtags)}/posts", params={"limit": PAGE_SIZE},
+        )
+
+    async def poll(self):
+        headers = {"If-None-Match": self.poll_etag} if self.poll_etag else {}
+        response = await self.call("GET /api/posts/posts/new", "GET", "/api/posts/posts/new",
+                                   params={"since": self.since, "limit": PAGE_SIZE}, headers=headers)
+        if response is not None and response.status_code in (200, 304):
+            self.poll_etag = response.headers.get("ETag", self.poll_etag)
+
+    async def react(self):
+        post_id = self.rng.randint(1, self.max_post_id)
+        await self.call("POST /api/posts/post/{id}/react", "POST", f"/api/posts/post/{post_id}/react",
+                        params={"reaction": self.rng.choice(REACTIONS), "token": self.token})
+
+    async def create(self):
+        await self.call("POST /api/posts/create", "POST", "/api/posts/create", json={
+            "content": f"load test {uuid.uuid4().hex[:8]}",
+            "hashtag": self.rng.choice(self.hashtags),
+            "user_token": self.token,
+            "fictional_name": "Load Tester",
+        })
+
+    async def scan(self):
+        await self.call("POST /api/scans/track", "POST", "/api/scans/track")
+
+
+async def run_level(args, base_url: str, concurrency: int, hashtags, max_post_id: int) -> dict:
+    import httpx
+
+    recorder = Recorder()
+    scenarios, weights = zip(*MIXES[args.mix].items())
+    stop_at = time.monotonic() + args.warmup + args.duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        async def user(n: int):
+            rng = random.Random(f"{args.seed}-{concurrency}-{n}")
+            vu = VirtualUser(client, recorder, hashtags, max_post_id, rng)
+            while time.monotonic() < stop_at:
+                await getattr(vu, rng.choices(scenarios, weights)[0])()
+
+        async def clock():
+            await asyncio.sleep(args.warmup)
+            recorder.recording = True
+            started = time.perf_counter()
+            await asyncio.sleep(args.duration)
+            recorder.recording = False
+            return time.perf_counter() - started
+
+        timer = asyncio.create_task(clock())
+        await asyncio.gather(*(user(n) for n in range(concurrency)))
+        elapsed = await timer
+
+    return dict(concurrency=concurrency, **recorder.report(elapsed))
+
+
+def run(args) -> dict:
+    tempdir = None
+    if not args.database_url:
+        tempdir = tempfile.TemporaryDirectory(prefix="dumps-load-")
+        args.database_url = f"sqlite:///{tempdir.name}/loadtest.db?timeout=30"
+
+    hashtags = [f"tag{i}" for i in range(args.hashtags)]
+    users = [str(uuid.UUID(int=random.Random(args.seed + i).getrandbits(128))) for i in range(args.users)]
+
+    print(f"Migrating {args.database_url.split('@')[-1]}", file=sys.stderr)
+    migrate(args.database_url)
+    fixture = {"seeded": None, "max_post_id": args.posts}
+    if not args.no_seed:
+        print(f"Seeding {args.posts} posts", file=sys.stderr)
+        fixture = seed(args, hashtags, users)
+
+    port = free_port()
+    server = start_server(args, port)
+    try:
+        levels = []
+        for concurrency in args.concurrency:
+            print(f"Running {args.mix} mix at concurrency {concurrency} for {args.duration}s", file=sys.stderr)
+            levels.append(asyncio.run(run_level(
+                args, f"http://127.0.0.1:{port}", concurrency, hashtags, max(fixture["max_post_id"], 1)
+            )))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        if tempdir:
+            tempdir.cleanup()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "database": args.database_url.split(":")[0].split("+")[0],
+            "workers": args.workers,
+            "mix": args.mix,
+            "weights": MIXES[args.mix],
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "posts": args.posts,
+            "hashtags": args.hashtags,
+            "users": args.users,
+            "seed": args.seed,
+            "fixture": fixture["seeded"],
+        },
+        "levels": levels,
+    }
+
+
+def compare(baseline_path: str, current_path: str, threshold: float) -> int:
+    """Print per-endpoint rps/p95 changes; 1 if any p95 regressed past threshold %"""
+    with open(baseline_path) as f:
+        baseline = {level["concurrency"]: level for level in json.load(f)["levels"]}
+    with open(current_path) as f:
+        current = {level["concurrency"]: level for level in json.load(f)["levels"]}
+
+    changes, regressions = [], 0
+    for concurrency in sorted(set(baseline) & set(current)):
+        before, after = baseline[concurrency]["endpoints"], current[concurrency]["endpoints"]
+        for endpoint in sorted(set(before) & set(after)):
+            p95_before, p95_after = before[endpoint]["p95_ms"], after[endpoint]["p95_ms"]
+            change = (p95_after - p95_before) / p95_before * 100 if p95_before else 0.0
+            regressed = change > threshold
+            regressions += regressed
+            changes.append({
+                "concurrency": concurrency,
+                "endpoint": endpoint,
+                "rps": [before[endpoint]["rps"], after[endpoint]["rps"]],
+                "p95_ms": [p95_before, p95_after],
+                "p95_change_pct": round(change, 1),
+                "regressed": regressed,
+            })
+    print(json.dumps({"threshold_pct": threshold, "regressions": regressions, "changes": changes}, indent=2))
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the Dumps API")
+    parser.add_argument("--database-url", help="database to test against (default: fresh SQLite fixture)")
+    parser.add_argument("--no-seed", action="store_true", help="use the data already in --database-url")
+    parser.add_argument("--posts", type=int, default=20000, help="posts to seed (scans/thoughts get a tenth)")
+    parser.add_argument("--hashtags", type=int, default=20)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--mix", choices=list(MIXES), default="realistic")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--duration", type=float, default=15, help="measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before each level")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for data and traffic")
+    parser.add_argument("-o", "--output", help="also write the JSON report here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="diff two reports")
+    parser.add_argument("--threshold", type=float, default=10, help="allowed p95 regression in percent")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Script to bulk load or dump posts, wild thoughts and scans as NDJSON or CSV.
+Uses COPY on Postgres and batched executemany inserts elsewhere; memory stays
+flat however many rows go through. Format follows the file extension (.csv,
+anything else is NDJSON) unless --format is given; "-" means stdin/stdout.
+
+Usage:
+    python bulk_data.py export posts -o posts.ndjson
+    python bulk_data.py export scans --format csv > scans.csv
+    python bulk_data.py import posts -i posts.ndjson
+    python bulk_data.py import wild_thoughts -i thoughts.csv --truncate
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import engine
+from sqlalchemy.exc import SQLAlchemyError
+from app.core.bulk import BULK_BATCH_SIZE, FORMATS, TABLES, export_rows, guess_format, import_rows, truncate_table
+
+load_dotenv()
+
+def _open(path: str, mode: str, default):
+    if path == "-":
+        return contextlib.nullcontext(default)
+    return open(path, mode, encoding="utf-8", newline="")
+
+def main(args) -> int:
+    fmt = args.format or guess_format(args.file)
+    # Progress goes to stderr so exports to stdout stay clean
+    log = sys.stderr
+
+    try:
+        if args.action == "export":
+            with _open(args.file, "w", sys.stdout) as out:
+                result = export_rows(engine, args.table, fmt, out)
+            print(f"✅ Exported {result['rows']} {args.table} rows", file=log)
+        else:
+            if args.truncate:
+                truncate_table(engine, args.table)
+                print(f"   Emptied {args.table}", file=log)
+            with _open(args.file, "r", sys.stdin) as src:
+                result = import_rows(engine, args.table, fmt, src, batch_size=args.batch_size)
+            print(f"✅ Imported {result['rows']} {args.table} rows", file=log)
+            if result["skipped"]:
+                print(f"   Skipped {result['skipped']} rows whose id is already in {args.table}", file=log)
+    except (ValueError, OSError, SQLAlchemyError) as e:
+        print(f"❌ {args.action.capitalize()} failed: {e}", file=log)
+        return 1
+
+    print(f"   {result['seconds']}s, {result['rows_per_sec']} rows/sec", file=log)
+    print(json.dumps(dict(result, table=args.table, format=fmt)), file=log)
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import/export for dumps tables")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("table", choices=list(TABLES))
+    parser.add_argument("-i", "--input", dest="file_in", default="-", help="file to import (default stdin)")
+    parser.add_argument("-o", "--output", dest="file_out", default="-", help="file to export to (default stdout)")
+    parser.add_argument("--format", choices=FORMATS, help="ndjson or csv (default: from the file extension)")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE, help="rows per INSERT batch (non-Postgres)")
+    parser.add_argument("--truncate", action="store_true", help="delete existing rows before importing")
+    args = parser.parse_args()
+    args.file = args.file_in if args.action == "import" else args.file_out
+    sys.exit(main(args))
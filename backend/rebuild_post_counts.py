@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the post counters (global, per-hashtag, per-user) from the posts table.
+Run it once after deploying the counter table, and any time you suspect drift.
+
+Usage:
+    python rebuild_post_counts.py          # repair drift
+    python rebuild_post_counts.py --check  # only report drift
+"""
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.core.counters import rebuild_post_counts
+
+load_dotenv()
+
+def main(dry_run: bool):
+    db = SessionLocal()
+    
+    try:
+        drift = rebuild_post_counts(db, dry_run=dry_run)
+        
+        if not drift:
+            print("✅ All post counters are accurate!")
+            return
+        
+        for key, (stored, actual) in sorted(drift.items()):
+            print(f"   {key}: stored {stored}, actual {actual}")
+        print()
+        
+        if dry_run:
+            print(f"⚠️  {len(drift)} counters have drifted (run without --check to repair)")
+        else:
+            print(f"✅ Repaired {len(drift)} counters")
+        
+    except Exception as e:
+        print(f"❌ Error rebuilding post counters: {e}")
+        import traceback
+        traceback.print_exc()
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print()
+    print("=" * 60)
+    print("REBUILDING POST COUNTERS")
+    print("=" * 60)
+    print()
+    main(dry_run="--check" in sys.argv)
+    print()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Daily retention job: keeps the live posts and scan_tracker tables to recent
+months so their indexes stay small.
+
+- creates the next PARTITION_MONTHS_AHEAD monthly partitions (Postgres)
+- rolls scan_tracker rows older than SCAN_RETENTION_MONTHS into per-day
+  counts in scan_daily (the scan total doesn't change)
+- moves posts older than POST_RETENTION_MONTHS to ARCHIVE_DIR as one gzipped
+  NDJSON file per month; `bulk_data.py import posts -i <file>` restores one
+  (gunzip it first)
+
+Whole old months are dropped as partitions on Postgres and deleted elsewhere.
+Safe to rerun; run it from cron once a day.
+
+Usage:
+    python retention.py                         # run with the env defaults
+    python retention.py --dry-run               # only report what would go
+    python retention.py --post-months 6 --scan-months 1 --archive-dir /mnt/archive
+"""
+import argparse
+import json
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import engine
+from sqlalchemy.exc import SQLAlchemyError
+from app.core.retention import ARCHIVE_DIR, POST_RETENTION_MONTHS, SCAN_RETENTION_MONTHS, RetentionError, run_retention
+
+load_dotenv()
+
+def main(args) -> int:
+    try:
+        result = run_retention(
+            engine,
+            post_months=args.post_months,
+            scan_months=args.scan_months,
+            archive_dir=args.archive_dir,
+            dry_run=args.dry_run
+        )
+    except (RetentionError, OSError, SQLAlchemyError) as e:
+        print(f"❌ Retention failed: {e}")
+        return 1
+
+    verb = "Would move" if args.dry_run else "Moved"
+    for name in result["partitions_created"]:
+        print(f"   Created partition {name}")
+    for month in result["scans"]["months"]:
+        print(f"   scans {month['month']}: {month['rows']} rows -> {month['days']} daily counts")
+    for month in result["posts"]["months"]:
+        print(f"   posts {month['month']}: {month['rows']} rows -> {month['file'] or '-'}")
+    print(f"✅ {verb} {result['scans']['rows']} scans and {result['posts']['rows']} posts out of the live tables")
+    print(json.dumps(result))
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact old scans and archive old posts")
+    parser.add_argument("--post-months", type=int, default=POST_RETENTION_MONTHS, help="months of posts to keep live")
+    parser.add_argument("--scan-months", type=int, default=SCAN_RETENTION_MONTHS, help="months of raw scans to keep")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, help="where archived posts are written")
+    parser.add_argument("--dry-run", action="store_true", help="report only, change nothing")
+    args = parser.parse_args()
+    if args.post_months < 1 or args.scan_months < 1:
+        parser.error("keep at least one month")
+    sys.exit(main(args))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN every feed query and check that it is served by its index.
+A query passes when the plan uses the expected index and needs no separate sort
+step for its ORDER BY. Exits non-zero on any failure, so it can gate a deploy
+or run after `alembic upgrade head`.
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+from dotenv import load_dotenv
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import engine
+from app.core.pagination import encode_cursor, page_statement
+from app.core.serialization import feed_select
+from app.models.models import Post, WildThought
+
+load_dotenv()
+
+def feed_queries(dialect):
+    """(description, statement, expected index) for each hot read path"""
+    cursor = encode_cursor(datetime.now(timezone.utc) - timedelta(days=1), 1000)
+    since = datetime.now(timezone.utc) - timedelta(minutes=5)
+    return [
+        ("Global feed, first page",
+         page_statement(feed_select(), dialect, 20), "ix_posts_created_id"),
+        ("Global feed, cursor page",
+         page_statement(feed_select(), dialect, 20, cursor=cursor), "ix_posts_created_id"),
+        ("Hashtag feed, first page",
+         page_statement(feed_select(Post.hashtag == "general"), dialect, 20), "ix_posts_hashtag_created_id"),
+        ("Hashtag feed, cursor page",
+         page_statement(feed_select(Post.hashtag == "general"), dialect, 20, cursor=cursor),
+         "ix_posts_hashtag_created_id"),
+        ("My Dumps",
+         page_statement(feed_select(Post.user_token == "token"), dialect, 20), "ix_posts_user_token_created_id"),
+        ("New posts since",
+         feed_select(Post.created_at > since).order_by(Post.created_at.desc()).limit(50),
+         "ix_posts_created_id"),
+        ("New posts since, one hashtag",
+         feed_select(Post.created_at > since, Post.hashtag == "general")
+         .order_by(Post.created_at.desc()).limit(50),
+         "ix_posts_hashtag_created_id"),
+        ("Wild thoughts",
+         select(WildThought).order_by(WildThought.created_at.desc()).limit(20), "ix_wild_thoughts_created_id"),
+    ]
+
+def explain_sqlite(conn, stmt):
+    """Returns (index names used, whether a separate sort is needed)"""
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+    details = [row[-1] for row in rows]
+    indexes = {word for detail in details for word in detail.split() if word.startswith("ix_")}
+    sorts = any("TEMP B-TREE" in detail for detail in details)
+    return indexes, sorts
+
+def explain_postgres(conn, stmt):
+    compiled = stmt.compile(dialect=conn.dialect)
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()[0]["Plan"]
+    indexes, sorts = set(), False
+    nodes = [plan]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+        if node["Node Type"] in ("Sort", "Incremental Sort"):
+            sorts = True
+        nodes.extend(node.get("Plans", []))
+    return indexes, sorts
+
+def verify_indexes():
+    print("=" * 60)
+    print("FEED QUERY INDEX CHECK")
+    print("=" * 60)
+    print()
+
+    dialect = engine.dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        print(f"❌ EXPLAIN parsing not implemented for {dialect}")
+        return False
+
+    ok = True
+    with engine.connect() as conn:
+        if dialect == "postgresql":
+            # Tiny dev tables make a seq scan cheapest; we want to know the index *can* be used
+            conn.exec_driver_sql("SET enable_seqscan = off")
+        explain = explain_postgres if dialect == "postgresql" else explain_sqlite
+
+        for description, stmt, expected in feed_queries(dialect):
+            indexes, sorts = explain(conn, stmt)
+            if expected in indexes and not sorts:
+                print(f"  ✅ {description} - {expected}")
+            else:
+                ok = False
+                used = ", ".join(sorted(indexes)) or "no index"
+                print(f"  ❌ {description} - expected {expected}, plan uses {used}"
+                      + (" plus a sort" if sorts else ""))
+
+    print()
+    if ok:
+        print("✅ Every feed query is served by its index")
+    else:
+        print("❌ Some feed queries are not index-backed - did you run `alembic upgrade head`?")
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if verify_indexes() else 1)
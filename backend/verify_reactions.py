@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Script to verify that concurrent reactions never lose increments.
+Fires thousands of parallel reactions at one post and checks the final count.
+
+Usage:
+    python verify_reactions.py [reactions] [concurrency]
+"""
+import asyncio
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import AsyncSessionLocal
+from app.core.reactions import increment_reaction
+from app.models.models import Post
+
+load_dotenv()
+
+async def react_once(post_id: int, slots: asyncio.Semaphore):
+    async with slots:
+        async with AsyncSessionLocal() as db:
+            await increment_reaction(db, post_id, "heart")
+
+async def verify_reactions(total: int, concurrency: int):
+    async with AsyncSessionLocal() as db:
+        post = Post(content="Concurrency check", hashtag="loadtest", user_token="verify-reactions")
+        db.add(post)
+        await db.commit()
+        await db.refresh(post)
+        post_id = post.id
+        
+        print(f"🔥 Firing {total} reactions on post {post_id}, {concurrency} at a time...")
+        slots = asyncio.Semaphore(concurrency)
+        start = time.perf_counter()
+        await asyncio.gather(*(react_once(post_id, slots) for _ in range(total)))
+        elapsed = time.perf_counter() - start
+        
+        await db.refresh(post)
+        hearts = post.reactions.get("heart", 0)
+        print(f"   Took {elapsed:.2f}s ({total / elapsed:.0f} reactions/s)")
+        print(f"   Expected: {total}, counted: {hearts}")
+        
+        await db.delete(post)
+        await db.commit()
+        
+        if hearts == total:
+            print("✅ No increments lost!")
+        else:
+            print(f"❌ Lost {total - hearts} increments")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    print()
+    print("=" * 60)
+    print("REACTION CONCURRENCY CHECK")
+    print("=" * 60)
+    print()
+    asyncio.run(verify_reactions(total, concurrency))
+    print()
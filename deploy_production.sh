@@ -32,6 +32,11 @@ if [ ! -f .env ]; then
     exit 1
 fi
 
+# Apply schema migrations (the app no longer creates tables on startup)
+echo "Running database migrations..."
+alembic upgrade head
+python3 verify_indexes.py || echo "WARNING: some feed queries are not index-backed"
+
 # Kill any existing backend processes
 echo "Stopping existing backend processes..."
 pkill -f "uvicorn app.main:app" || true
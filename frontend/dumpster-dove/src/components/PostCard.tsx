@@ -3,6 +3,7 @@ import { formatDistanceToNow } from "date-fns";
 import { ReactionButton } from "./ReactionButton";
 import { Button } from "@/components/ui/button";
 import { Pencil, Trash2 } from "lucide-react";
+import type { ImageVariant } from "@/services/api";
 
 const getImageUrl = (imageUrl: string) => {
   if (imageUrl.startsWith('http')) {
@@ -16,6 +17,13 @@ const getImageUrl = (imageUrl: string) => {
   return `https://dumps.online${imageUrl}`;
 };
 
+// "url 320w, url 640w, ..." for one format, so the browser picks the smallest that fits
+const getSrcSet = (variants: ImageVariant[], format: string) =>
+  variants
+    .filter((variant) => variant.format === format)
+    .map((variant) => `${getImageUrl(variant.url)} ${variant.width}w`)
+    .join(", ");
+
 export interface Post {
   id: number;
   content: string;
@@ -23,6 +31,7 @@ export interface Post {
   hashtag: string;
   created_at: string;
   image_url?: string;
+  image_variants?: ImageVariant[] | null;
   user_token: string;
   reactions: {
     thumbs_up: number;
@@ -101,13 +110,21 @@ export const PostCard = ({ post, onReact, onHashtagClick, onEdit, onDelete, curr
 
         {post.image_url && (
           <div className="mt-3 rounded-lg overflow-hidden border border-border">
-            <img 
-              src={getImageUrl(post.image_url)} 
-              alt="Post image" 
-              loading="lazy"
-              className="w-full h-auto max-h-96 object-contain cursor-pointer hover:opacity-90 transition-opacity"
-              onClick={() => window.open(getImageUrl(post.image_url), '_blank')}
-            />
+            <picture>
+              {post.image_variants && ["avif", "webp"].map((format) => {
+                const srcSet = getSrcSet(post.image_variants!, format);
+                return srcSet ? (
+                  <source key={format} type={`image/${format}`} srcSet={srcSet} sizes="(max-width: 640px) 100vw, 640px" />
+                ) : null;
+              })}
+              <img 
+                src={getImageUrl(post.image_url)} 
+                alt="Post image" 
+                loading="lazy"
+                className="w-full h-auto max-h-96 object-contain cursor-pointer hover:opacity-90 transition-opacity"
+                onClick={() => window.open(getImageUrl(post.image_url), '_blank')}
+              />
+            </picture>
           </div>
         )}
         
@@ -172,47 +172,42 @@ const Feed = () => {
     window.scrollTo({ top: 0, behavior: 'auto' });
   }, []);
 
-  // Smart real-time updates - only fetch new posts since last check
+  // Real-time updates pushed over one shared stream (no polling)
   useEffect(() => {
-    if (!token || posts.length === 0) return;
-    
-    const interval = setInterval(async () => {
-      try {
-        // Get the timestamp of the most recent post we have
-        const latestPost = posts[0];
-        if (!latestPost) return;
-        
-        // Convert to ISO string for API
-        const since = new Date(latestPost.created_at).toISOString();
-        
-        // Only fetch posts newer than what we have
-        const response = await apiService.getNewPosts(since, selectedHashtag || undefined);
-        
-        if (response.posts.length > 0) {
-          // Add new posts to the beginning, avoiding duplicates
-          setPosts(prevPosts => {
-            const existingIds = new Set(prevPosts.map(p => p.id));
-            const newPosts = response.posts.filter(post => !existingIds.has(post.id));
-            
-            if (newPosts.length > 0) {
-              const updatedPosts = [...newPosts, ...prevPosts];
-              // Update cache with new posts
-              const cacheKey = `cached_posts_${selectedHashtag || 'all'}`;
-              localStorage.setItem(cacheKey, JSON.stringify(updatedPosts));
-              return updatedPosts;
-            }
-            
-            return prevPosts; // No new posts to add
-          });
-        }
-      } catch (err) {
-        console.error("Failed to fetch new posts:", err);
-        // Silently fail - don't show error for background updates
-      }
-    }, 30000); // Poll every 30 seconds instead of 10
-    
-    return () => clearInterval(interval);
-  }, [token, selectedHashtag, posts]);
+    if (!token) return;
+
+    const cacheKey = `cached_posts_${selectedHashtag || 'all'}`;
+    const savePosts = (updatedPosts: ApiPost[]) => {
+      localStorage.setItem(cacheKey, JSON.stringify(updatedPosts));
+      return updatedPosts;
+    };
+
+    const source = apiService.subscribeToPosts(selectedHashtag || undefined, {
+      onCreated: (post) => {
+        setPosts(prevPosts => {
+          if (prevPosts.some(p => p.id === post.id)) return prevPosts;
+          return savePosts([post, ...prevPosts]);
+        });
+      },
+      onUpdated: (post) => {
+        setPosts(prevPosts => savePosts(
+          prevPosts
+            .map(p => (p.id === post.id ? post : p))
+            .filter(p => !selectedHashtag || p.hashtag === selectedHashtag)
+        ));
+      },
+      onDeleted: ({ id }) => {
+        setPosts(prevPosts => savePosts(prevPosts.filter(p => p.id !== id)));
+      },
+      onReacted: ({ id, reactions }) => {
+        setPosts(prevPosts => prevPosts.map(p => (p.id === id ? { ...p, reactions } : p)));
+      },
+      // The server could not replay everything we missed - refetch the first page
+      onReset: () => { loadPosts(false, 1, true); },
+    });
+
+    return () => source.close();
+  }, [token, selectedHashtag]);
 
   const handleCreatePost = async (content: string, author: string, isAnonymous: boolean, hashtags: string[], image?: string) => {
     if (!token) {
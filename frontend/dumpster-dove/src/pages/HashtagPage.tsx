@@ -89,47 +89,50 @@ const HashtagPage = () => {
     loadPosts();
   }, [hashtag]);
 
-  // Smart real-time updates for hashtag page
+  // Real-time updates for this hashtag pushed over one stream (no polling)
   useEffect(() => {
-    if (!hashtag || posts.length === 0) return;
-    
-    const interval = setInterval(async () => {
-      try {
-        // Get the timestamp of the most recent post we have
-        const latestPost = posts[0];
-        if (!latestPost) return;
-        
-        // Convert to ISO string for API
-        const since = new Date(latestPost.created_at).toISOString();
-        
-        // Only fetch posts newer than what we have for this hashtag
-        const response = await apiService.getNewPosts(since, hashtag);
-        
-        if (response.posts.length > 0) {
-          // Add new posts to the beginning, avoiding duplicates
-          setPosts(prevPosts => {
-            const existingIds = new Set(prevPosts.map(p => p.id));
-            const newPosts = response.posts.filter(post => !existingIds.has(post.id));
-            
-            if (newPosts.length > 0) {
-              const updatedPosts = [...newPosts, ...prevPosts];
-              // Update cache with new posts
-              const cacheKey = `cached_posts_${hashtag}`;
-              localStorage.setItem(cacheKey, JSON.stringify(updatedPosts));
-              return updatedPosts;
-            }
-            
-            return prevPosts; // No new posts to add
-          });
+    if (!hashtag) return;
+
+    const cacheKey = `cached_posts_${hashtag}`;
+    const savePosts = (updatedPosts: ApiPost[]) => {
+      localStorage.setItem(cacheKey, JSON.stringify(updatedPosts));
+      return updatedPosts;
+    };
+
+    const source = apiService.subscribeToPosts(hashtag, {
+      onCreated: (post) => {
+        setPosts(prevPosts => {
+          if (prevPosts.some(p => p.id === post.id)) return prevPosts;
+          return savePosts([post, ...prevPosts]);
+        });
+      },
+      onUpdated: (post) => {
+        // A post moved to another hashtag drops off this page
+        setPosts(prevPosts => savePosts(
+          prevPosts
+            .map(p => (p.id === post.id ? post : p))
+            .filter(p => p.hashtag === hashtag)
+        ));
+      },
+      onDeleted: ({ id }) => {
+        setPosts(prevPosts => savePosts(prevPosts.filter(p => p.id !== id)));
+      },
+      onReacted: ({ id, reactions }) => {
+        setPosts(prevPosts => prevPosts.map(p => (p.id === id ? { ...p, reactions } : p)));
+      },
+      // The server could not replay everything we missed - refetch the first page
+      onReset: async () => {
+        try {
+          const response = await apiService.getHashtagPosts(hashtag);
+          setPosts(savePosts(response.posts));
+        } catch (err) {
+          console.error("Failed to refresh posts:", err);
         }
-      } catch (err) {
-        console.error("Failed to fetch new posts:", err);
-        // Silently fail - don't show error for background updates
-      }
-    }, 30000); // Poll every 30 seconds
-    
-    return () => clearInterval(interval);
-  }, [hashtag, posts]);
+      },
+    });
+
+    return () => source.close();
+  }, [hashtag]);
 
   const handleCreatePost = async (content: string, author: string, isAnonymous: boolean, hashtags: string[], image?: string) => {
     if (!token) return;
@@ -178,20 +181,13 @@ const HashtagPage = () => {
     if (!token) return;
     
     try {
-      await apiService.reactToPost(postId, reaction, token);
+      // A second tap takes the reaction back, so use the counts the API returns
+      const updatedPost = await apiService.reactToPost(postId, reaction, token);
       
       // Update the post in the list
       setPosts(prev => 
         prev.map(post => 
-          post.id === postId 
-            ? { 
-                ...post, 
-                reactions: { 
-                  ...post.reactions, 
-                  [reaction]: (post.reactions[reaction as keyof typeof post.reactions] || 0) + 1 
-                } 
-              } 
-            : post
+          post.id === postId ? updatedPost : post
         )
       );
     } catch (err) {
@@ -1,10 +1,19 @@
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'https://dumps.online';
 const AUTH_BASE_URL = import.meta.env.VITE_API_URL || 'https://dumps.online';
 
+export interface ImageVariant {
+  url: string;
+  width: number;
+  height: number;
+  format: string;
+  bytes: number;
+}
+
 export interface Post {
   id: number;
   content: string;
   image_url?: string;
+  image_variants?: ImageVariant[] | null;
   hashtag: string;
   created_at: string;
   user_token: string;
@@ -17,6 +26,20 @@ export interface Post {
   };
 }
 
+export interface PostSearchResponse {
+  posts: Post[];
+  query: string;
+  limit: number;
+  next_cursor?: string | null;
+}
+
+export interface TrendingHashtag {
+  hashtag: string;
+  score: number;
+  posts: number;
+  reactions: number;
+}
+
 export interface PostCreate {
   content: string;
   image_url?: string;
@@ -37,6 +60,15 @@ export interface PostListResponse {
   total: number;
   page: number;
   limit: number;
+  next_cursor?: string | null;
+}
+
+export interface LiveFeedHandlers {
+  onCreated?: (post: Post) => void;
+  onUpdated?: (post: Post) => void;
+  onDeleted?: (data: { id: number; hashtag: string }) => void;
+  onReacted?: (data: { id: number; hashtag: string; reactions: Post['reactions'] }) => void;
+  onReset?: () => void;
 }
 
 export interface TokenResponse {
@@ -48,9 +80,12 @@ export interface TokenResponse {
 class ApiService {
   private async request<T>(endpoint: string, options: RequestInit = {}): Promise<T> {
     const url = `${API_BASE_URL}${endpoint}`;
+    // Lets the API read from the primary right after this user writes (read-your-writes)
+    const userToken = localStorage.getItem('dumps_user_token');
     const response = await fetch(url, {
       headers: {
         'Content-Type': 'application/json',
+        ...(userToken ? { 'X-User-Token': userToken } : {}),
         ...options.headers,
       },
       ...options,
@@ -96,7 +131,7 @@ class ApiService {
     });
   }
 
-  async getPosts(hashtag?: string, page: number = 1, limit: number = 20): Promise<PostListResponse> {
+  async getPosts(hashtag?: string, page: number = 1, limit: number = 20, cursor?: string): Promise<PostListResponse> {
     const params = new URLSearchParams({
       page: page.toString(),
       limit: limit.toString(),
@@ -106,18 +141,50 @@ class ApiService {
       params.append('hashtag', hashtag);
     }
 
+    if (cursor) {
+      params.append('cursor', cursor);
+    }
+
     return this.request<PostListResponse>(`/api/posts/posts?${params.toString()}`);
   }
 
-  async getHashtagPosts(hashtag: string, page: number = 1, limit: number = 20): Promise<PostListResponse> {
+  async getHashtagPosts(hashtag: string, page: number = 1, limit: number = 20, cursor?: string): Promise<PostListResponse> {
     const params = new URLSearchParams({
       page: page.toString(),
       limit: limit.toString(),
     });
 
+    if (cursor) {
+      params.append('cursor', cursor);
+    }
+
     return this.request<PostListResponse>(`/api/posts/hashtags/${hashtag}/posts?${params.toString()}`);
   }
 
+  // Full-text search, best match first; pass next_cursor back for more
+  async searchPosts(query: string, hashtag?: string, limit: number = 20, cursor?: string): Promise<PostSearchResponse> {
+    const params = new URLSearchParams({
+      q: query,
+      limit: limit.toString(),
+    });
+
+    if (hashtag) {
+      params.append('hashtag', hashtag);
+    }
+    if (cursor) {
+      params.append('cursor', cursor);
+    }
+
+    return this.request<PostSearchResponse>(`/api/posts/search?${params.toString()}`);
+  }
+
+  async getTrendingHashtags(limit: number = 10): Promise<{ hashtags: TrendingHashtag[]; window_minutes: number; half_life_minutes: number }> {
+    const params = new URLSearchParams({ limit: limit.toString() });
+    return this.request<{ hashtags: TrendingHashtag[]; window_minutes: number; half_life_minutes: number }>(
+      `/api/posts/hashtags/trending?${params.toString()}`
+    );
+  }
+
   async getNewPosts(since: string, hashtag?: string, limit: number = 20): Promise<PostListResponse> {
     const params = new URLSearchParams({
       since: since,
@@ -131,6 +198,28 @@ class ApiService {
     return this.request<PostListResponse>(`/api/posts/posts/new?${params.toString()}`);
   }
 
+  // Live feed: one Server-Sent Events connection instead of polling getNewPosts.
+  // EventSource reconnects on its own and resends Last-Event-ID, so nothing is missed.
+  subscribeToPosts(hashtag: string | undefined, handlers: LiveFeedHandlers): EventSource {
+    const params = new URLSearchParams();
+    if (hashtag) {
+      params.append('hashtag', hashtag);
+    }
+
+    const source = new EventSource(`${API_BASE_URL}/api/posts/posts/stream?${params.toString()}`);
+    const listen = <T,>(event: string, handler?: (data: T) => void) => {
+      if (!handler) return;
+      source.addEventListener(event, (e) => handler(JSON.parse((e as MessageEvent).data)));
+    };
+
+    listen('post_created', handlers.onCreated);
+    listen('post_updated', handlers.onUpdated);
+    listen('post_deleted', handlers.onDeleted);
+    listen('post_reacted', handlers.onReacted);
+    listen('reset', handlers.onReset);
+    return source;
+  }
+
   async getMyPosts(token: string, page: number = 1, limit: number = 10): Promise<PostListResponse> {
     const params = new URLSearchParams({
       token,
@@ -216,6 +305,38 @@ class ApiService {
     }
   }
 
+  // Upload several images with one presign round trip (max 10)
+  async uploadImagesToS3(files: File[]): Promise<string[]> {
+    const { uploads } = await this.request<{ uploads: { upload_url: string; image_url: string }[] }>(
+      '/api/posts/upload/presigned-urls',
+      {
+        method: 'POST',
+        body: JSON.stringify({
+          files: files.map((file) => ({
+            filename: file.name,
+            content_type: file.type || 'image/jpeg'
+          }))
+        })
+      }
+    );
+
+    await Promise.all(uploads.map(async ({ upload_url }, index) => {
+      const file = files[index];
+      const uploadResponse = await fetch(upload_url, {
+        method: 'PUT',
+        body: file,
+        headers: {
+          'Content-Type': file.type || 'image/jpeg'
+        }
+      });
+      if (!uploadResponse.ok) {
+        throw new Error(`S3 upload failed: ${uploadResponse.statusText}`);
+      }
+    }));
+
+    return uploads.map(({ image_url }) => image_url);
+  }
+
   // Scan tracking
   async trackScan(): Promise<{ position: number; total: number; message: string }> {
     return this.request<{ position: number; total: number; message: string }>('/api/scans/track', {